@@ -0,0 +1,297 @@
+"""
+Benchmark de rendimiento sin red ni Gemini.
+
+Levanta fixture_server.py en un proceso aparte, apunta el scraper elegido a él, reemplaza el
+modelo de SAPAgent por FakeLLM y mide tablas/s, latencia p50/p99 por etapa y pico de RSS.
+
+    python benchmarks/bench.py --target async --limit 500 --latency-ms 50 --llm-delay-ms 800
+    python benchmarks/bench.py --target all --json > resultados.json
+
+Cada ejecución corre en un directorio temporal (contratos, logs y manifiesto no tocan el repo).
+"""
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, Optional
+
+from prometheus_client import REGISTRY
+
+BENCH_DIR = Path(__file__).resolve().parent
+REPO_DIR = BENCH_DIR.parent
+SCRAPER2_SRC = REPO_DIR / "sap_scrapper2" / "src"
+SCRAPER2_TEMPLATES = REPO_DIR / "sap_scrapper2" / "templates"
+SCRAPER_ROOT = REPO_DIR / "sap_scrapper"
+TARGETS = ("async", "sync", "orchestrator")
+
+sys.path.insert(0, str(BENCH_DIR))
+from fake_llm import FakeLLM  # noqa: E402
+from fixture_server import run_server  # noqa: E402
+from stages import StageTimer, peak_rss_mb  # noqa: E402
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_fixture_server(args) -> tuple:
+    """Arranca el servidor de fixtures y espera a que acepte conexiones"""
+    port = _free_port()
+    process = multiprocessing.Process(
+        target=run_server, args=("127.0.0.1", port), daemon=True,
+        kwargs=dict(min_fields=args.min_fields, max_fields=args.max_fields, index_tables=args.index_tables,
+                    latency_ms=args.latency_ms, jitter_ms=args.jitter_ms, error_rate=args.error_rate)
+    )
+    process.start()
+    deadline = time.monotonic() + 15
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=0.2).close()
+            return process, f"http://127.0.0.1:{port}/abap/tabl/"
+        except OSError:
+            time.sleep(0.05)
+    process.terminate()
+    raise RuntimeError("El servidor de fixtures no arrancó")
+
+
+def configure_environment(base_url: str, workdir: Path, args):
+    """Variables de entorno de ambos scrapers; deben estar antes de importar sus módulos"""
+    os.environ.update({
+        "BASE_URL": base_url,
+        "GOOGLE_API_KEY": os.environ.get("GOOGLE_API_KEY", "benchmark"),
+        "DELAY_BETWEEN_REQUESTS": "0",
+        "REQUESTS_PER_SECOND": "0",
+        "HTTP_CACHE_ENABLED": "false",
+        "LLM_CACHE_ENABLED": "false",
+        "CHANGE_TRACKING_ENABLED": "false",
+        "MANIFEST_PATH": str(workdir / "logs" / "manifest.jsonl"),
+        "LOG_FILE": str(workdir / "logs" / "scraper.log"),
+        "SCRAPER_BACKEND": "http",
+        "SCRAPER_RATE_LIMIT": "0",
+        "CHANGE_DETECTION_ENABLED": "false",
+        "CHANGELOG_DIR": str(workdir / "logs"),
+        "LOG_LEVEL": os.environ.get("LOG_LEVEL", "WARNING"),
+    })
+    if args.parse_mode:
+        os.environ["PARSE_MODE"] = args.parse_mode
+    if args.llm_cassette or args.llm_record:
+        os.environ.update({
+            "LLM_CASSETTE_MODE": "replay" if args.llm_cassette else "record",
+            "LLM_CASSETTE_PATH": str(Path(args.llm_cassette or args.llm_record).resolve()),
+            "LLM_CASSETTE_TIME_SCALE": str(args.llm_time_scale),
+        })
+
+
+def _sample(name: str, labels: Dict[str, str]) -> int:
+    return int(REGISTRY.get_sample_value(name, labels) or 0)
+
+
+def bench_sap_scrapper2(target: str, base_url: str, args, timer: StageTimer) -> Dict:
+    sys.path.insert(0, str(SCRAPER2_SRC))
+    import scraper as scraper_module
+
+    scraper = scraper_module.SAPTableScraper()
+    # Con cassette el agente reproduce (o graba contra Gemini) en lugar de usar el LLM falso
+    if scraper.agent and not scraper.agent.cassette:
+        scraper.agent.model = FakeLLM(args.llm_delay_ms, args.llm_jitter_ms)
+    if args.parse_workers is not None:
+        scraper.parse_workers = args.parse_workers
+
+    if target == "async":
+        timer.wrap(scraper, "fetch_bytes_async", "fetch")
+        # run_parser y no parse_detail_page: la función tiene que poder enviarse al pool de procesos
+        timer.wrap(scraper, "run_parser", "parse")
+        timer.wrap(scraper, "interpret_page_async", "interpret")
+        timer.wrap(scraper, "save_contract", "save")
+        started = time.perf_counter()
+        asyncio.run(scraper.run_async(limit=args.limit))
+    else:
+        timer.wrap(scraper, "fetch_html", "fetch")
+        timer.wrap(scraper_module, "parse_detail_page", "parse")
+        timer.wrap(scraper, "interpret_page", "interpret")
+        if scraper.agent:
+            timer.wrap(scraper.agent, "generate_data_contract", "contract")
+        timer.wrap(scraper, "save_contract", "save")
+        started = time.perf_counter()
+        scraper.run(limit=args.limit)
+    elapsed = time.perf_counter() - started
+
+    results = {result: _sample("scraper_tables_total", {"result": result}) for result in ("saved", "unchanged", "failed")}
+    # Llamadas que llegaron al modelo (falso o cassette), contadas por las métricas del agente
+    llm_calls = sum(_sample("scraper_llm_call_seconds_count", {"mode": mode}) for mode in ("sync", "async"))
+    return {"elapsed_s": elapsed, **results, "llm_calls": llm_calls}
+
+
+class MemoryStorage:
+    """Sustituto en memoria de TableStorage con la interfaz que usa el orquestador"""
+
+    def __init__(self):
+        self.tables: Dict[str, Dict] = {}
+        self.failed_writes = []
+
+    async def init_indexes(self):
+        pass
+
+    async def load_content_hashes(self) -> Dict[str, str]:
+        return {}
+
+    async def get_table(self, table_name: str) -> Optional[Dict]:
+        return self.tables.get(table_name)
+
+    async def buffer_table(self, table):
+        self.tables[table.table_name] = table.model_dump()
+
+    def start_flusher(self):
+        pass
+
+    async def close(self):
+        pass
+
+
+def bench_orchestrator(base_url: str, args, timer: StageTimer) -> Dict:
+    sys.path.insert(0, str(SCRAPER_ROOT))
+    from src.core.orchestrator import SAPTableOrchestrator
+
+    async def run() -> Dict:
+        orchestrator = SAPTableOrchestrator()
+        if args.storage == "memory":
+            orchestrator.storage = MemoryStorage()
+        orchestrator.scraper.base_url = base_url
+        timer.wrap(orchestrator.scraper, "get_tables_from_index", "index")
+        timer.wrap(orchestrator.scraper, "extract_table_details", "fetch+parse")
+        timer.wrap(orchestrator.storage, "buffer_table", "store")
+        timer.wrap(orchestrator.contract_handler, "save_contract", "save")
+        await orchestrator.init()
+        try:
+            return await orchestrator.process_all_tables()
+        finally:
+            await orchestrator.scraper.close()
+            orchestrator.contract_handler.close()
+
+    started = time.perf_counter()
+    stats = asyncio.run(run())
+    elapsed = time.perf_counter() - started
+    return {"elapsed_s": elapsed, "saved": stats["processed"] - stats["unchanged"],
+            "unchanged": stats["unchanged"], "failed": stats["failed"], "llm_calls": 0}
+
+
+def run_target(target: str, args) -> Dict:
+    """Ejecuta un objetivo en este proceso, con su propio servidor y directorio temporal"""
+    server, base_url = start_fixture_server(args)
+    workdir = Path(tempfile.mkdtemp(prefix=f"sap-bench-{target}-"))
+    previous_dir = os.getcwd()
+    try:
+        shutil.copytree(SCRAPER2_TEMPLATES, workdir / "templates")
+        (workdir / "logs").mkdir()
+        # Antes del chdir: las rutas de los cassettes son relativas al directorio de invocación
+        configure_environment(base_url, workdir, args)
+        os.chdir(workdir)
+        timer = StageTimer()
+        if target == "orchestrator":
+            result = bench_orchestrator(base_url, args, timer)
+        else:
+            result = bench_sap_scrapper2(target, base_url, args, timer)
+    finally:
+        os.chdir(previous_dir)
+        server.terminate()
+        server.join()
+        if not args.keep:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    completed = result["saved"] + result["unchanged"]
+    return {
+        "target": target,
+        "tables": completed + result["failed"],
+        **{key: result[key] for key in ("saved", "unchanged", "failed", "llm_calls")},
+        "elapsed_s": round(result["elapsed_s"], 3),
+        "tables_per_s": round(completed / result["elapsed_s"], 2) if result["elapsed_s"] else 0.0,
+        "peak_rss_mb": round(peak_rss_mb(), 1),
+        "stages": timer.summary(),
+        "workdir": str(workdir) if args.keep else None,
+    }
+
+
+def run_all(args) -> list:
+    """Un subproceso por objetivo: módulos, métricas y pico de RSS no se mezclan entre ellos"""
+    results = []
+    for target in TARGETS:
+        # El resultado va a un archivo: sap_scrapper escribe sus logs en stdout
+        with tempfile.NamedTemporaryFile(suffix=".json") as output:
+            command = [sys.executable, str(Path(__file__).resolve()), *sys.argv[1:],
+                       "--target", target, "--output", output.name]
+            completed = subprocess.run(command, capture_output=True, text=True)
+            if completed.returncode != 0:
+                lines = completed.stderr.strip().splitlines()
+                results.append({"target": target, "error": lines[-1] if lines else f"código {completed.returncode}"})
+                continue
+            results.extend(json.loads(Path(output.name).read_text(encoding="utf-8")))
+    return results
+
+
+def print_report(results: list):
+    for result in results:
+        if "error" in result:
+            print(f"\n[{result['target']}] error: {result['error']}")
+            continue
+        print(
+            f"\n[{result['target']}] {result['tables']} tablas en {result['elapsed_s']}s -> "
+            f"{result['tables_per_s']} tablas/s | guardadas {result['saved']}, sin cambios {result['unchanged']}, "
+            f"fallidas {result['failed']} | llamadas LLM {result['llm_calls']} | pico RSS {result['peak_rss_mb']} MB"
+        )
+        print(f"  {'etapa':<14}{'n':>8}{'p50 ms':>12}{'p99 ms':>12}")
+        for stage, numbers in result["stages"].items():
+            print(f"  {stage:<14}{numbers['count']:>8}{numbers['p50_ms']:>12}{numbers['p99_ms']:>12}")
+        if result.get("workdir"):
+            print(f"  directorio de trabajo: {result['workdir']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark offline de los scrapers contra un sapdatasheet local")
+    parser.add_argument("--target", choices=TARGETS + ("all",), default="async",
+                        help="async: SAPTableScraper.run_async, sync: SAPTableScraper.run, "
+                             "orchestrator: SAPTableOrchestrator de sap_scrapper, all: los tres")
+    parser.add_argument("--limit", type=int, default=200, help="Tablas a procesar (sap_scrapper2)")
+    parser.add_argument("--index-tables", type=int, default=20,
+                        help="Tablas por índice sintético (define el tamaño del recorrido del orquestador)")
+    parser.add_argument("--min-fields", type=int, default=5)
+    parser.add_argument("--max-fields", type=int, default=120)
+    parser.add_argument("--latency-ms", type=float, default=20.0, help="Latencia del servidor por petición")
+    parser.add_argument("--jitter-ms", type=float, default=5.0)
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fracción de respuestas 503")
+    parser.add_argument("--llm-delay-ms", type=float, default=500.0, help="Latencia del LLM falso")
+    parser.add_argument("--llm-jitter-ms", type=float, default=100.0)
+    parser.add_argument("--llm-cassette", help="Reproducir un cassette grabado con LLM_CASSETTE_MODE=record")
+    parser.add_argument("--llm-record", help="Grabar en este cassette el tráfico con el LLM real (requiere GOOGLE_API_KEY)")
+    parser.add_argument("--llm-time-scale", type=float, default=1.0,
+                        help="Factor sobre la latencia grabada en el cassette (0 = sin espera)")
+    parser.add_argument("--parse-mode", choices=["hybrid", "parser", "llm"],
+                        help="Modo de parseo de sap_scrapper2 (por defecto PARSE_MODE o hybrid)")
+    parser.add_argument("--parse-workers", type=int, help="Procesos de parseo del modo asíncrono")
+    parser.add_argument("--storage", choices=["memory", "mongodb"], default="memory",
+                        help="Almacenamiento del orquestador: en memoria o el MongoDB de MONGODB_URI")
+    parser.add_argument("--keep", action="store_true", help="Conservar el directorio temporal de cada ejecución")
+    parser.add_argument("--json", action="store_true", help="Salida en JSON")
+    parser.add_argument("--output", help="Escribir los resultados en JSON en este archivo")
+    args = parser.parse_args()
+
+    results = run_all(args) if args.target == "all" else [run_target(args.target, args)]
+    if args.output:
+        Path(args.output).write_text(json.dumps(results, indent=2), encoding="utf-8")
+    elif args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        print_report(results)
+
+
+if __name__ == "__main__":
+    main()
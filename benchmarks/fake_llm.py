@@ -0,0 +1,63 @@
+"""
+Modelo falso con la interfaz de google.generativeai.GenerativeModel que usa SAPAgent
+(generate_content / generate_content_async). Responde con un JSON armado a partir de los
+campos que aparecen en el prompt, tras una demora configurable que simula la latencia del LLM.
+"""
+import asyncio
+import json
+import random
+import re
+import time
+from typing import Dict
+
+FIELD_NAME = re.compile(r"\bF\d{4}\b")
+TABLE_SECTION = re.compile(r"### TABLA: (.+?)\n")
+
+
+class FakeResponse:
+    def __init__(self, text: str):
+        self.text = text
+        # Sin usage_metadata: SAPAgent estima los tokens igual que con un cliente que no lo informa
+        self.usage_metadata = None
+
+
+class FakeLLM:
+    def __init__(self, delay_ms: float = 0.0, jitter_ms: float = 0.0, seed: int = 0):
+        self.delay_ms = delay_ms
+        self.jitter_ms = jitter_ms
+        self.random = random.Random(seed)
+        self.calls = 0
+
+    def _delay(self) -> float:
+        self.calls += 1
+        return max(0.0, self.delay_ms + self.random.uniform(-self.jitter_ms, self.jitter_ms)) / 1000
+
+    @staticmethod
+    def _table(content: str, name: str = "") -> Dict:
+        fields = list(dict.fromkeys(FIELD_NAME.findall(content)))
+        return {
+            "table_name": name,
+            "description": f"Tabla {name}".strip(),
+            "category": "TRANSP",
+            "fields": [
+                {"name": field, "description": f"Campo {field}", "data_type": "CHAR",
+                 "is_key": number < 2, "is_nullable": number >= 2}
+                for number, field in enumerate(fields)
+            ]
+        }
+
+    def _answer(self, prompt: str) -> str:
+        sections = TABLE_SECTION.split(prompt)
+        if len(sections) > 1:
+            # Prompt por lotes: [preámbulo, clave1, contenido1, clave2, contenido2, ...]
+            keys, contents = sections[1::2], sections[2::2]
+            return json.dumps({key: self._table(content, key) for key, content in zip(keys, contents)})
+        return json.dumps(self._table(prompt))
+
+    def generate_content(self, prompt: str) -> FakeResponse:
+        time.sleep(self._delay())
+        return FakeResponse(self._answer(prompt))
+
+    async def generate_content_async(self, prompt: str) -> FakeResponse:
+        await asyncio.sleep(self._delay())
+        return FakeResponse(self._answer(prompt))
@@ -0,0 +1,153 @@
+"""
+Servidor local que imita a sapdatasheet.org para los benchmarks.
+
+- /abap/tabl/ y /abap/tabl/index-slash.html sirven sap_scrapper/example/sap_table.html
+  (índice real con 500 tablas), con los enlaces a índices también bajo `.index-links`
+- el resto de /abap/tabl/index-*.html son índices sintéticos con `index_tables` tablas
+- cualquier otra /abap/tabl/<nombre>.html es una página de detalle sintética con un número de
+  campos determinista entre `min_fields` y `max_fields`, válida para ambos scrapers
+
+La latencia (con jitter) y la tasa de errores 503 son configurables.
+"""
+import argparse
+import asyncio
+import hashlib
+import html
+import random
+import re
+from pathlib import Path
+from typing import Optional
+
+from aiohttp import web
+
+EXAMPLE_PAGE = Path(__file__).resolve().parent.parent / "sap_scrapper" / "example" / "sap_table.html"
+INDEX_LINK = re.compile(r'href="(index-[a-z0-9_]+\.html)"', re.IGNORECASE)
+DATA_TYPES = [("CHAR", 10), ("NUMC", 8), ("DATS", 8), ("CURR", 15), ("QUAN", 13), ("CLNT", 3), ("INT4", 10)]
+
+
+def _seed(name: str) -> int:
+    return int(hashlib.sha256(name.encode("utf-8")).hexdigest()[:8], 16)
+
+
+class FixtureSite:
+    def __init__(self, min_fields: int = 5, max_fields: int = 120, index_tables: int = 20,
+                 latency_ms: float = 0.0, jitter_ms: float = 0.0, error_rate: float = 0.0,
+                 seed: int = 0):
+        self.min_fields = min_fields
+        self.max_fields = max_fields
+        self.index_tables = index_tables
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.random = random.Random(seed)
+        self.requests = 0
+        self.errors = 0
+        example = EXAMPLE_PAGE.read_text(encoding="utf-8")
+        links = sorted(set(INDEX_LINK.findall(example)))
+        self.index_names = [link[len("index-"):-len(".html")] for link in links]
+        # El backend HTTP de sap_scrapper busca los índices en `.index-links`
+        index_links = "".join(f'<a href="{link}">{link}</a>' for link in links)
+        self.root_page = example.replace("</body>", f'<div class="index-links">{index_links}</div></body>', 1)
+
+    def app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_get("/abap/tabl/", self.handle_root)
+        app.router.add_get("/abap/tabl/{path:.+}", self.handle_page)
+        return app
+
+    async def _simulate_network(self) -> Optional[web.Response]:
+        self.requests += 1
+        delay = self.latency_ms + self.random.uniform(-self.jitter_ms, self.jitter_ms)
+        if delay > 0:
+            await asyncio.sleep(delay / 1000)
+        if self.error_rate and self.random.random() < self.error_rate:
+            self.errors += 1
+            return web.Response(status=503, text="fixture: error inyectado")
+        return None
+
+    async def handle_root(self, request: web.Request) -> web.Response:
+        return await self._simulate_network() or web.Response(text=self.root_page, content_type="text/html")
+
+    async def handle_page(self, request: web.Request) -> web.Response:
+        error = await self._simulate_network()
+        if error:
+            return error
+        path = request.match_info["path"]
+        match = re.fullmatch(r"index-([a-z0-9_]+)(?:-\d+)?\.html", path, re.IGNORECASE)
+        if match:
+            if match.group(1).lower() == "slash":
+                return web.Response(text=self.root_page, content_type="text/html")
+            return web.Response(text=self.index_page(match.group(1)), content_type="text/html")
+        if not path.endswith(".html"):
+            raise web.HTTPNotFound()
+        return web.Response(text=self.detail_page(path[:-len(".html")].strip("/")), content_type="text/html")
+
+    def index_page(self, index: str) -> str:
+        rows = []
+        for number in range(1, self.index_tables + 1):
+            name = f"Z{index.upper()}_{number:04d}"
+            rows.append(
+                f'<tr><td>{number}</td><td><a href="/abap/tabl/{name.lower()}.html">{name}</a></td>'
+                f'<td>Tabla sintética {name}</td><td>TRANSP</td><td>A</td></tr>'
+            )
+        links = "".join(f'<a href="index-{name}.html">{name.upper()}</a>' for name in self.index_names)
+        return (
+            f'<html><body><div class="card"><div class="card-header sapds-card-header">Index {index.upper()}</div>'
+            f'<table class="table"><tr><th>#</th><th>Table name</th><th>Short Description</th>'
+            f'<th>Table Category</th><th>Delivery Class</th></tr><tr><th></th><th></th><th></th><th></th><th></th></tr>'
+            f'{"".join(rows)}</table></div><div class="pagination">{links}</div></body></html>'
+        )
+
+    def detail_page(self, name: str) -> str:
+        """Página de detalle con los selectores de sap_scrapper2 (tarjeta + table.table) y de sap_scrapper (.field-row)"""
+        seed = _seed(name)
+        field_count = self.min_fields + seed % (self.max_fields - self.min_fields + 1)
+        table_name = html.escape(name.upper())
+        rows = []
+        for number in range(field_count):
+            data_type, length = DATA_TYPES[(seed + number) % len(DATA_TYPES)]
+            key_cell = '<span class="field-key">X</span> Key' if number < 2 else '<span class="field-key"></span>'
+            rows.append(
+                f'<tr class="field-row">'
+                f'<td>{key_cell}</td>'
+                f'<td class="field-name">F{number:04d}</td>'
+                f'<td class="field-description">Campo {number} de {table_name}</td>'
+                f'<td class="field-type">{data_type}</td>'
+                f'<td><span class="field-length">{length}</span></td></tr>'
+            )
+        # Relleno para acercar el tamaño de la página al de sapdatasheet (navegación, scripts, pie)
+        filler = "<nav>" + "<a href=\"#\">menu</a>" * 200 + "</nav><script>var x = 1;</script>"
+        return (
+            f'<html><head><title>{table_name}</title></head><body>{filler}'
+            f'<div class="card"><div class="card-header sapds-card-header">{table_name}</div>'
+            f'<div class="card-body sapds-card-body"><p class="table-description">Tabla sintética {table_name}</p>'
+            f'<span class="table-name">{table_name}</span><span class="table-category">TRANSP</span>'
+            f'<table class="table"><tr><th>Key</th><th>Field</th><th>Description</th><th>Type</th><th>Length</th></tr>'
+            f'<tr><th></th><th></th><th></th><th></th><th></th></tr>{"".join(rows)}</table></div></div></body></html>'
+        )
+
+
+def run_server(host: str, port: int, **options):
+    """Arranca el servidor de fixtures (bloqueante); pensado para un proceso aparte"""
+    site = FixtureSite(**options)
+    web.run_app(site.app(), host=host, port=port, print=None, access_log=None)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Servidor local de páginas de sapdatasheet para benchmarks")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--min-fields", type=int, default=5)
+    parser.add_argument("--max-fields", type=int, default=120)
+    parser.add_argument("--index-tables", type=int, default=20)
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--jitter-ms", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    args = parser.parse_args()
+    run_server(args.host, args.port, min_fields=args.min_fields, max_fields=args.max_fields,
+               index_tables=args.index_tables, latency_ms=args.latency_ms, jitter_ms=args.jitter_ms,
+               error_rate=args.error_rate)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""Medición de latencia por etapa envolviendo métodos y funciones existentes"""
+import functools
+import inspect
+import math
+import resource
+import sys
+import time
+from collections import defaultdict
+from typing import Dict, List
+
+
+def percentile(samples: List[float], fraction: float) -> float:
+    """Percentil por rango más cercano"""
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    rank = min(len(ordered), max(1, math.ceil(fraction * len(ordered)))) - 1
+    return ordered[rank]
+
+
+def peak_rss_mb() -> float:
+    """Pico de memoria residente del proceso (ru_maxrss está en KB en Linux y en bytes en macOS)"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+class StageTimer:
+    def __init__(self):
+        self.samples: Dict[str, List[float]] = defaultdict(list)
+
+    def _timed(self, stage: str, func):
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def wrapper(*args, **kwargs):
+                started = time.perf_counter()
+                try:
+                    return await func(*args, **kwargs)
+                finally:
+                    self.samples[stage].append(time.perf_counter() - started)
+        else:
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                started = time.perf_counter()
+                try:
+                    return func(*args, **kwargs)
+                finally:
+                    self.samples[stage].append(time.perf_counter() - started)
+        return wrapper
+
+    def wrap(self, owner, attribute: str, stage: str):
+        """Reemplaza owner.attribute (método de una instancia o función de un módulo) por su versión medida"""
+        setattr(owner, attribute, self._timed(stage, getattr(owner, attribute)))
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        return {
+            stage: {
+                "count": len(samples),
+                "p50_ms": round(percentile(samples, 0.50) * 1000, 2),
+                "p99_ms": round(percentile(samples, 0.99) * 1000, 2),
+            }
+            for stage, samples in self.samples.items()
+        }
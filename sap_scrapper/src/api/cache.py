@@ -0,0 +1,60 @@
+from collections import OrderedDict
+from typing import Optional, Tuple
+import hashlib
+import time
+
+
+def make_etag(body: bytes) -> str:
+    """ETag fuerte derivado del contenido serializado"""
+    return f'"{hashlib.sha256(body).hexdigest()[:32]}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Compara la cabecera If-None-Match con el ETag actual (admite listas y '*')"""
+    if not if_none_match:
+        return False
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == "*" or candidate == etag:
+            return True
+    return False
+
+
+class ResponseCache:
+    """Caché LRU con TTL de respuestas ya serializadas, en memoria del proceso"""
+
+    def __init__(self, max_entries: int, ttl_seconds: float):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, Tuple[float, bytes, str]]" = OrderedDict()
+
+    def get(self, key: str) -> Optional[Tuple[bytes, str]]:
+        """Devuelve (body, etag) si la entrada existe y no ha caducado"""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, body, etag = entry
+        if expires_at < time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return body, etag
+
+    def set(self, key: str, body: bytes) -> str:
+        """Guarda el cuerpo serializado y devuelve su ETag"""
+        etag = make_etag(body)
+        if self.max_entries <= 0:
+            return etag
+        self._entries[key] = (time.monotonic() + self.ttl_seconds, body, etag)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        return etag
+
+    def invalidate(self, key: str):
+        self._entries.pop(key, None)
+
+    def clear(self):
+        self._entries.clear()
@@ -0,0 +1,86 @@
+from collections import OrderedDict
+from datetime import datetime
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+import asyncio
+import uuid
+from ..core.logging import logger
+from ..models.table_schema import RefreshJob
+
+PENDING = "pending"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+
+
+class RefreshJobManager:
+    """
+    Ejecuta refrescos de tablas en segundo plano con un pool acotado de workers.
+    Un refresco pendiente o en curso se reutiliza para la misma tabla (single-flight).
+    """
+
+    def __init__(self, handler: Callable[[str], Awaitable[None]], workers: int, history_size: int = 1000):
+        self.handler = handler
+        self.workers = workers
+        self.history_size = history_size
+        self.jobs: "OrderedDict[str, RefreshJob]" = OrderedDict()
+        self._active: Dict[str, RefreshJob] = {}
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks: List[asyncio.Task] = []
+
+    def _start(self):
+        # La cola y los workers se crean dentro del event loop de la aplicación
+        self._queue = asyncio.Queue()
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    def submit(self, table_name: str) -> Tuple[RefreshJob, bool]:
+        """Encola un refresco y devuelve (job, creado); si ya hay uno activo para la tabla se devuelve ese"""
+        active = self._active.get(table_name)
+        if active is not None:
+            return active, False
+
+        if self._queue is None:
+            self._start()
+        job = RefreshJob(job_id=uuid.uuid4().hex, table_name=table_name, status=PENDING)
+        self.jobs[job.job_id] = job
+        self._active[table_name] = job
+        self._trim_history()
+        self._queue.put_nowait(job)
+        return job, True
+
+    def get(self, job_id: str) -> Optional[RefreshJob]:
+        return self.jobs.get(job_id)
+
+    def _trim_history(self):
+        """Descarta los trabajos terminados más antiguos cuando se supera el historial"""
+        excess = len(self.jobs) - self.history_size
+        for job_id in list(self.jobs):
+            if excess <= 0:
+                break
+            if self.jobs[job_id].status in (SUCCEEDED, FAILED):
+                del self.jobs[job_id]
+                excess -= 1
+
+    async def _worker(self):
+        while True:
+            job = await self._queue.get()
+            job.status = RUNNING
+            job.started_at = datetime.utcnow()
+            try:
+                await self.handler(job.table_name)
+                job.status = SUCCEEDED
+            except Exception as e:
+                logger.error(f"Error refreshing table {job.table_name}: {str(e)}")
+                job.status = FAILED
+                job.error = str(e)
+            finally:
+                job.finished_at = datetime.utcnow()
+                self._active.pop(job.table_name, None)
+                self._queue.task_done()
+
+    async def close(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        self._queue = None
+        self._active.clear()
@@ -1,35 +1,196 @@
-from fastapi import FastAPI, HTTPException, Query
-from typing import List, Optional
-from ..models.table_schema import SAPTable
-from ..storage.mongodb import MongoDBStorage
-from ..scraper.browser import TableScraper
+from fastapi import FastAPI, Header, HTTPException, Query, Request, Response
+from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
+from typing import Dict, List, Optional
+from urllib.parse import quote
+import base64
+import binascii
+from ..models.table_schema import RefreshJob, SAPTable, SearchPage, TablePage
+from ..models.data_contract import TableContract
+from ..contracts.contract_handler import ContractHandler
+from ..storage.mongodb import TableStorage
+from ..scraper.factory import create_scraper
+from ..core.config import settings
 from ..core.logging import logger
+from ..core.metrics import API_CACHE_HITS, API_REQUEST_SECONDS
+from .cache import ResponseCache, etag_matches
+from .jobs import RefreshJobManager
+import asyncio
+import time
 
 app = FastAPI(title="SAP Tables API")
-db = MongoDBStorage()
-scraper = TableScraper()
+db = TableStorage()
+scraper = create_scraper()
+# Respuestas serializadas de GET /tables/{table_name}: las tablas más consultadas no llegan a MongoDB
+response_cache = ResponseCache(settings.API_CACHE_MAX_ENTRIES, settings.API_CACHE_TTL)
+contract_handler = ContractHandler()
+_scraper_ready: Optional[asyncio.Lock] = None
+_scraper_started = False
+
+
+async def _ensure_scraper():
+    """Inicia el scraper la primera vez que se refresca una tabla"""
+    global _scraper_ready, _scraper_started
+    if _scraper_ready is None:
+        _scraper_ready = asyncio.Lock()
+    async with _scraper_ready:
+        if not _scraper_started:
+            await scraper.init()
+            _scraper_started = True
+
+
+def _table_url(table_name: str, current: Dict) -> str:
+    """URL guardada al extraer la tabla o, si no hay, la construida con el nombre codificado (/1BEA/... -> %2F1bea%2F...)"""
+    stored = current.get("metadata", {}).get("source_url") or current.get("url")
+    if stored:
+        return stored
+    return f"{scraper.base_url}{quote(table_name.lower(), safe='')}.html"
+
+
+async def _refresh(table_name: str):
+    """Vuelve a extraer una tabla, la guarda y descarta su respuesta cacheada"""
+    await _ensure_scraper()
+    current = await db.get_table(table_name) or {}
+    url = _table_url(table_name, current)
+    details = await scraper.extract_table_details(url)
+    contract = TableContract(
+        table_name=table_name,
+        description=current.get("description") or details.get("description") or "",
+        category=current.get("category", ""),
+        delivery_class=current.get("delivery_class", ""),
+        fields=details["fields"],
+        metadata={**current.get("metadata", {}), "source_url": url}
+    )
+    await db.store_table(contract)
+    await contract_handler.save_contract(contract)
+    response_cache.invalidate(table_name)
+
+
+refresh_jobs = RefreshJobManager(_refresh, settings.API_REFRESH_WORKERS)
+
+
+@app.middleware("http")
+async def record_request_metrics(request: Request, call_next):
+    started = time.perf_counter()
+    response = await call_next(request)
+    # Se usa la plantilla de la ruta para no crear una serie por cada nombre de tabla
+    route = request.scope.get("route")
+    path = route.path if route else "unmatched"
+    API_REQUEST_SECONDS.labels(request.method, path, str(response.status_code)).observe(time.perf_counter() - started)
+    return response
+
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics() -> Response:
+    return Response(content=generate_latest(), media_type=CONTENT_TYPE_LATEST)
+
+
+@app.on_event("shutdown")
+async def shutdown():
+    await refresh_jobs.close()
+    contract_handler.close()
+    if _scraper_started:
+        await scraper.close()
+
+
+def _encode_cursor(table_name: str) -> str:
+    return base64.urlsafe_b64encode(table_name.encode("utf-8")).decode("ascii")
+
+
+def _decode_cursor(token: str) -> str:
+    try:
+        return base64.b64decode(token.encode("ascii"), altchars=b"-_", validate=True).decode("utf-8")
+    except (binascii.Error, UnicodeError, ValueError):
+        raise HTTPException(status_code=400, detail="Invalid pagination token")
+
+
+def _parse_fields(fields: Optional[str]) -> Optional[List[str]]:
+    """Convierte 'table_name,description' en una proyección validada contra el contrato"""
+    if not fields:
+        return None
+    requested = [field.strip() for field in fields.split(",") if field.strip()]
+    unknown = [field for field in requested if field.split(".")[0] not in TableContract.model_fields]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(unknown)}")
+    # MongoDB rechaza proyectar un campo y uno de sus subcampos a la vez (path collision)
+    overlapping = sorted({
+        child for child in requested for parent in requested if child.startswith(f"{parent}.")
+    })
+    if overlapping:
+        raise HTTPException(status_code=400, detail=f"Overlapping fields: {', '.join(overlapping)}")
+    return requested
+
+
+def _table_response(body: bytes, etag: str, if_none_match: Optional[str]) -> Response:
+    headers = {"ETag": etag}
+    if etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+# :path admite tablas con namespace (/1BEA/BBEA_BDH llega como %2F1BEA%2FBBEA_BDH)
+@app.get("/tables/{table_name:path}", response_model=SAPTable)
+async def get_table(table_name: str, if_none_match: Optional[str] = Header(None)) -> Response:
+    cached = response_cache.get(table_name)
+    if cached:
+        API_CACHE_HITS.inc()
+        body, etag = cached
+        return _table_response(body, etag, if_none_match)
 
-@app.get("/tables/{table_name}")
-async def get_table(table_name: str) -> SAPTable:
     table_data = await db.get_table(table_name)
     if not table_data:
         raise HTTPException(status_code=404, detail="Table not found")
-    return SAPTable(**table_data)
+    body = SAPTable(**table_data).model_dump_json().encode("utf-8")
+    etag = response_cache.set(table_name, body)
+    return _table_response(body, etag, if_none_match)
 
-@app.post("/tables/{table_name}/refresh")
-async def refresh_table(table_name: str) -> SAPTable:
-    try:
-        table_data = await scraper.extract_table(table_name)
-        await db.store_table(table_data)
-        return SAPTable(**table_data)
-    except Exception as e:
-        logger.error(f"Error refreshing table {table_name}: {str(e)}")
-        raise HTTPException(status_code=500, detail="Error refreshing table")
+@app.post("/tables/{table_name:path}/refresh", status_code=202)
+async def refresh_table(table_name: str, response: Response) -> RefreshJob:
+    job, created = refresh_jobs.submit(table_name)
+    if not created:
+        logger.info(f"Refresh already in progress for {table_name}: job {job.job_id}")
+    response.headers["Location"] = f"/jobs/{job.job_id}"
+    return job
+
+@app.get("/jobs/{job_id}")
+async def get_job(job_id: str) -> RefreshJob:
+    job = refresh_jobs.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
 
 @app.get("/tables")
 async def list_tables(
-    skip: int = Query(0, ge=0),
-    limit: int = Query(100, ge=1, le=1000)
-) -> List[SAPTable]:
-    tables = await db.list_tables(skip, limit)
-    return [SAPTable(**table) for table in tables] 
\ No newline at end of file
+    next: Optional[str] = Query(None, description="Token de la página siguiente"),
+    limit: int = Query(100, ge=1, le=1000),
+    fields: Optional[str] = Query(None, description="Campos a devolver, separados por coma")
+) -> TablePage:
+    after = _decode_cursor(next) if next else None
+    tables, last = await db.list_tables(after, limit, _parse_fields(fields))
+    return TablePage(items=tables, next=_encode_cursor(last) if last else None)
+
+@app.get("/search")
+async def search_tables(
+    q: Optional[str] = Query(None, description="Texto libre sobre nombres y descripciones"),
+    field: Optional[str] = Query(None, description="Nombre exacto de campo, p. ej. MATNR"),
+    type: Optional[str] = Query(None, description="Tipo de dato del campo, p. ej. CURR"),
+    min_length: Optional[int] = Query(None, ge=0),
+    max_length: Optional[int] = Query(None, ge=0),
+    key: Optional[bool] = Query(None, description="Solo campos clave (true) o no clave (false)"),
+    category: Optional[str] = None,
+    delivery_class: Optional[str] = None,
+    skip: int = Query(0, ge=0, le=10000),
+    limit: int = Query(50, ge=1, le=500)
+) -> SearchPage:
+    filters = {
+        "text": q,
+        "field": field,
+        "field_type": type,
+        "min_length": min_length,
+        "max_length": max_length,
+        "key": key,
+        "category": category,
+        "delivery_class": delivery_class
+    }
+    if all(value is None or value == "" for value in filters.values()):
+        raise HTTPException(status_code=400, detail="At least one search criterion is required")
+    tables, has_more = await db.search_tables(skip=skip, limit=limit, **filters)
+    return SearchPage(items=tables, next_skip=skip + limit if has_more else None)
@@ -1,14 +1,29 @@
 import json
 import os
 from pathlib import Path
-from typing import Dict
+from typing import Dict, Optional
 from ..models.data_contract import TableContract
+from ..core.config import settings
 from ..core.logging import logger
+from .packed_store import PackedContractStore
+
+
+def contract_filename(table_name: str) -> str:
+    """Nombre de archivo del contrato; las tablas con namespace (/AIN/...) no pueden crear rutas absolutas"""
+    return f"{table_name.lower().replace('/', '_')}.json"
+
 
 class ContractHandler:
-    def __init__(self, contracts_dir: str = "contracts"):
+    def __init__(self, contracts_dir: str = "contracts", storage: Optional[str] = None):
         self.contracts_dir = Path(contracts_dir)
         self._ensure_contracts_directory()
+        # files: un JSON por tabla; packed: un único archivo append-only con índice de offsets
+        self.storage = (storage or settings.CONTRACT_STORAGE).lower()
+        self.store: Optional[PackedContractStore] = None
+        if self.storage == "packed":
+            self.store = PackedContractStore(str(self.contracts_dir / settings.CONTRACT_PACKED_FILE))
+        elif self.storage != "files":
+            raise ValueError(f"CONTRACT_STORAGE no soportado: {self.storage}")
         
     def _ensure_contracts_directory(self):
         """Asegura que exista el directorio de contratos"""
@@ -17,10 +32,15 @@ class ContractHandler:
     async def save_contract(self, contract: TableContract):
         """Guarda un contrato como archivo JSON"""
         try:
-            file_path = self.contracts_dir / f"{contract.table_name.lower()}.json"
+            # Convertir el contrato a diccionario serializable (fechas como ISO)
+            contract_dict = contract.model_dump(mode="json", exclude_none=True)
             
-            # Convertir el contrato a diccionario y formatear
-            contract_dict = contract.dict(exclude_none=True)
+            if self.store is not None:
+                self.store.put(contract.table_name.lower(), contract_dict)
+                logger.info(f"Contract saved: {contract.table_name}")
+                return
+            
+            file_path = self.contracts_dir / contract_filename(contract.table_name)
             
             # Guardar el archivo JSON con formato legible
             with open(file_path, 'w', encoding='utf-8') as f:
@@ -34,7 +54,13 @@ class ContractHandler:
             
     async def load_contract(self, table_name: str) -> Dict:
         """Carga un contrato desde archivo JSON"""
-        file_path = self.contracts_dir / f"{table_name.lower()}.json"
+        if self.store is not None:
+            contract = self.store.get(table_name.lower())
+            if contract is None:
+                logger.warning(f"Contract not found: {table_name}")
+            return contract
+            
+        file_path = self.contracts_dir / contract_filename(table_name)
         
         try:
             with open(file_path, 'r', encoding='utf-8') as f:
@@ -44,4 +70,9 @@ class ContractHandler:
             return None
         except Exception as e:
             logger.error(f"Error loading contract {table_name}: {str(e)}")
-            raise 
\ No newline at end of file
+            raise 
+
+    def close(self):
+        if self.store is not None:
+            self.store.close()
+            self.store = None
@@ -0,0 +1,49 @@
+import argparse
+import json
+from pathlib import Path
+from ..core.config import settings
+from ..core.logging import logger
+from .contract_handler import contract_filename
+from .packed_store import PackedContractStore
+
+
+def export_contracts(packed_path: str, output_dir: str) -> int:
+    """Exporta el almacén empaquetado a un archivo JSON legible por tabla"""
+    output = Path(output_dir)
+    output.mkdir(parents=True, exist_ok=True)
+    store = PackedContractStore(packed_path)
+    exported = 0
+    try:
+        # Lectura secuencial: solo la versión vigente de cada contrato
+        for key, contract in store.items():
+            with open(output / contract_filename(key), 'w', encoding='utf-8') as f:
+                json.dump(contract, f, indent=2, ensure_ascii=False)
+            exported += 1
+    finally:
+        store.close()
+    logger.info(f"{exported} contracts exported to {output}")
+    return exported
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Exporta el almacén de contratos empaquetado a archivos JSON")
+    parser.add_argument("--packed", default=str(Path("contracts") / settings.CONTRACT_PACKED_FILE))
+    parser.add_argument("--output", default="contracts")
+    parser.add_argument("--compact", action="store_true",
+                        help="Reescribe el almacén solo con la versión vigente de cada contrato")
+    args = parser.parse_args()
+
+    if args.compact:
+        store = PackedContractStore(args.packed)
+        try:
+            store.compact()
+            logger.info(f"Packed store compacted: {len(store)} contracts")
+        finally:
+            store.close()
+        return
+
+    export_contracts(args.packed, args.output)
+
+
+if __name__ == "__main__":
+    main()
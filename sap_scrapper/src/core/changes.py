@@ -0,0 +1,64 @@
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+import hashlib
+import json
+import re
+from ..models.data_contract import TableContract
+from .logging import logger
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def _normalize(value):
+    if isinstance(value, str):
+        return _WHITESPACE.sub(" ", value).strip()
+    return value
+
+
+def _field_signature(field: Dict) -> Dict:
+    return {key: _normalize(value) for key, value in field.items() if key != "name"}
+
+
+def content_hash(contract: TableContract) -> str:
+    """Hash normalizado de la descripción y la lista de campos de una tabla"""
+    payload = {
+        "description": _normalize(contract.description),
+        "fields": [
+            {key: _normalize(value) for key, value in field.model_dump().items()}
+            for field in contract.fields
+        ]
+    }
+    return hashlib.sha256(json.dumps(payload, sort_keys=True, ensure_ascii=False).encode("utf-8")).hexdigest()
+
+
+def diff_fields(previous: List[Dict], current: List[Dict]) -> Dict[str, List[str]]:
+    """Campos añadidos, eliminados y modificados entre dos versiones de una tabla"""
+    before = {field["name"]: _field_signature(field) for field in previous if field.get("name")}
+    after = {field["name"]: _field_signature(field) for field in current if field.get("name")}
+    diff = {
+        "added": sorted(set(after) - set(before)),
+        "removed": sorted(set(before) - set(after)),
+        "changed": sorted(name for name in set(after) & set(before) if after[name] != before[name])
+    }
+    return {key: value for key, value in diff.items() if value}
+
+
+def write_changelog(changes: Dict[str, Dict], directory: str) -> Optional[Path]:
+    """Escribe el changelog de la ejecución (solo si hubo cambios)"""
+    if not changes:
+        logger.info("No changes since the previous run")
+        return None
+    path = Path(directory)
+    path.mkdir(parents=True, exist_ok=True)
+    path = path / f"changelog-{datetime.utcnow().strftime('%Y%m%dT%H%M%S')}.json"
+    new = sum(1 for entry in changes.values() if entry["status"] == "new")
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({
+            "generated_at": datetime.utcnow().isoformat(),
+            "new_tables": new,
+            "changed_tables": len(changes) - new,
+            "tables": changes
+        }, f, indent=2, ensure_ascii=False)
+    logger.info(f"Changelog written: {new} new, {len(changes) - new} changed tables ({path})")
+    return path
@@ -8,8 +8,27 @@ load_dotenv()
 class Settings(BaseSettings):
     MONGODB_URI: str = os.getenv("MONGODB_URI", "mongodb://localhost:27017")
     DATABASE_NAME: str = os.getenv("DATABASE_NAME", "sap_tables")
+    MONGODB_BULK_SIZE: int = int(os.getenv("MONGODB_BULK_SIZE", "500"))
+    MONGODB_FLUSH_INTERVAL: float = float(os.getenv("MONGODB_FLUSH_INTERVAL", "5"))
     TEMPLATE_PATH: str = os.getenv("TEMPLATE_PATH", "./templates/data_contract_template.json")
+    CONTRACT_STORAGE: str = os.getenv("CONTRACT_STORAGE", "files")
+    CONTRACT_PACKED_FILE: str = os.getenv("CONTRACT_PACKED_FILE", "contracts.jsonl")
+    CHANGE_DETECTION_ENABLED: bool = os.getenv("CHANGE_DETECTION_ENABLED", "true").lower() == "true"
+    CHANGELOG_DIR: str = os.getenv("CHANGELOG_DIR", "logs")
     SCRAPER_RATE_LIMIT: int = int(os.getenv("SCRAPER_RATE_LIMIT", "2"))
+    SCRAPER_WORKERS: int = int(os.getenv("SCRAPER_WORKERS", "8"))
+    SCRAPER_INDEX_WORKERS: int = int(os.getenv("SCRAPER_INDEX_WORKERS", "2"))
+    SCRAPER_QUEUE_SIZE: int = int(os.getenv("SCRAPER_QUEUE_SIZE", "500"))
+    SCRAPER_QUEUE_REPORT_INTERVAL: int = int(os.getenv("SCRAPER_QUEUE_REPORT_INTERVAL", "10"))
+    SCRAPER_BACKEND: str = os.getenv("SCRAPER_BACKEND", "playwright")
+    SCRAPER_HTTP_POOL_SIZE: int = int(os.getenv("SCRAPER_HTTP_POOL_SIZE", "10"))
+    SCRAPER_HTTP_TIMEOUT: int = int(os.getenv("SCRAPER_HTTP_TIMEOUT", "30"))
+    SCRAPER_PAGE_POOL_SIZE: int = int(os.getenv("SCRAPER_PAGE_POOL_SIZE", "4"))
+    SCRAPER_BLOCK_RESOURCES: bool = os.getenv("SCRAPER_BLOCK_RESOURCES", "true").lower() == "true"
+    API_CACHE_MAX_ENTRIES: int = int(os.getenv("API_CACHE_MAX_ENTRIES", "1024"))
+    API_CACHE_TTL: int = int(os.getenv("API_CACHE_TTL", "300"))
+    API_REFRESH_WORKERS: int = int(os.getenv("API_REFRESH_WORKERS", "2"))
+    METRICS_PORT: int = int(os.getenv("METRICS_PORT", "0"))
     LOG_LEVEL: str = os.getenv("LOG_LEVEL", "INFO")
 
 settings = Settings() 
\ No newline at end of file
@@ -0,0 +1,38 @@
+from prometheus_client import Counter, Gauge, Histogram, start_http_server
+from .config import settings
+from .logging import logger
+
+FETCH_SECONDS = Histogram(
+    "sap_scraper_fetch_seconds", "Latencia de descarga de páginas", ["backend"]
+)
+HTTP_RESPONSES = Counter(
+    "sap_scraper_http_responses_total", "Respuestas HTTP por código (error = excepción de red)", ["status"]
+)
+PARSE_SECONDS = Histogram(
+    "sap_scraper_parse_seconds", "Tiempo de extracción de datos de una página", ["page"]
+)
+QUEUE_DEPTH = Gauge(
+    "sap_scraper_queue_depth", "Items pendientes en cada cola del orquestador", ["queue"]
+)
+TABLES_TOTAL = Counter(
+    "sap_scraper_tables_total", "Tablas procesadas por resultado", ["result"]
+)
+MONGO_WRITE_SECONDS = Histogram(
+    "sap_mongo_write_seconds", "Latencia de escrituras en MongoDB", ["operation"]
+)
+MONGO_WRITE_ERRORS = Counter(
+    "sap_mongo_write_errors_total", "Documentos que no se pudieron escribir en MongoDB"
+)
+API_REQUEST_SECONDS = Histogram(
+    "sap_api_request_seconds", "Latencia de las peticiones a la API", ["method", "route", "status"]
+)
+API_CACHE_HITS = Counter(
+    "sap_api_cache_hits_total", "Respuestas de GET /tables/{table_name} servidas desde la caché"
+)
+
+
+def start_metrics_server():
+    """Expone /metrics para el scraper en METRICS_PORT (0 = desactivado)"""
+    if settings.METRICS_PORT:
+        start_http_server(settings.METRICS_PORT)
+        logger.info(f"Metrics available on port {settings.METRICS_PORT}")
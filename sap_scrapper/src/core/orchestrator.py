@@ -1,58 +1,171 @@
-from ..scraper.browser import TableIndexScraper
+from ..scraper.factory import create_scraper
 from ..storage.mongodb import TableStorage
 from ..models.data_contract import TableContract
 from ..contracts.contract_handler import ContractHandler
-from typing import List
+from .config import settings
+from .changes import content_hash, diff_fields, write_changelog
+from typing import Dict, List, Optional, Set
 import asyncio
 from .logging import logger
+from .metrics import QUEUE_DEPTH, TABLES_TOTAL
 
 class SAPTableOrchestrator:
     def __init__(self):
-        self.scraper = TableIndexScraper()
+        # El backend aplica SCRAPER_RATE_LIMIT a cada petición, compartido por todos los workers
+        self.scraper = create_scraper()
         self.storage = TableStorage()
         self.contract_handler = ContractHandler()
+        self.stats: Dict[str, int] = {}
+        # Hash de contenido de cada tabla ya almacenada y cambios detectados en esta ejecución
+        self.known_hashes: Dict[str, str] = {}
+        self.changes: Dict[str, Dict] = {}
         
     async def init(self):
         await self.scraper.init()
         await self.storage.init_indexes()
         
-    async def process_all_tables(self):
-        """Procesa todas las tablas disponibles"""
-        # Obtener índices
-        index_pages = await self.scraper.get_index_pages()
-        
-        for index_url in index_pages:
+    async def process_table(self, table_info: dict) -> bool:
+        """Extrae los detalles de una tabla, la almacena y guarda su contrato"""
+        try:
+            # Obtener detalles y crear contrato
+            details = await self.scraper.extract_table_details(table_info["url"])
+            contract = TableContract(
+                table_name=table_info["name"],
+                description=table_info["description"],
+                category=table_info["category"],
+                delivery_class=table_info["delivery_class"],
+                fields=details["fields"],
+                # La API refresca la tabla desde esta URL (los nombres con namespace no se pueden reconstruir)
+                metadata={"source_url": table_info["url"]}
+            )
+            
+            # Sin cambios desde la última ejecución: no se reescribe ni cambia last_updated
+            if settings.CHANGE_DETECTION_ENABLED:
+                digest = content_hash(contract)
+                previous_hash = self.known_hashes.get(contract.table_name)
+                if previous_hash == digest:
+                    self.stats["unchanged"] += 1
+                    TABLES_TOTAL.labels("unchanged").inc()
+                    return True
+                contract.metadata["content_hash"] = digest
+                await self._record_change(contract, previous_hash)
+                self.known_hashes[contract.table_name] = digest
+            
+            # Almacenar en MongoDB (se escribe en bloque al vaciar el buffer)
+            await self.storage.buffer_table(contract)
+            
+            # Guardar contrato como archivo JSON
+            await self.contract_handler.save_contract(contract)
+            
+            logger.info(f"Processed table: {table_info['name']}")
+            TABLES_TOTAL.labels("saved").inc()
+            return True
+            
+        except Exception as e:
+            logger.error(f"Error processing table {table_info['name']}: {str(e)}")
+            TABLES_TOTAL.labels("failed").inc()
+            return False
+
+    async def _record_change(self, contract: TableContract, previous_hash: Optional[str]):
+        """Anota en el changelog si la tabla es nueva o qué campos cambiaron"""
+        if previous_hash is None:
+            self.changes[contract.table_name] = {"status": "new", "fields": len(contract.fields)}
+            return
+        previous = await self.storage.get_table(contract.table_name) or {}
+        current = [field.model_dump() for field in contract.fields]
+        self.changes[contract.table_name] = {"status": "changed", **diff_fields(previous.get("fields", []), current)}
+
+    async def _index_worker(self, index_queue: asyncio.Queue, table_queue: asyncio.Queue, seen: Set[str]):
+        """Lee páginas de índice y encola sus tablas y sus páginas de paginación"""
+        while True:
+            index_url = await index_queue.get()
             try:
-                # Procesar cada página del índice
                 tables, pagination = await self.scraper.get_tables_from_index(index_url)
-                
-                # Procesar tablas encontradas
-                for table_info in tables:
-                    try:
-                        # Obtener detalles y crear contrato
-                        details = await self.scraper.extract_table_details(table_info["url"])
-                        contract = TableContract(
-                            table_name=table_info["name"],
-                            description=table_info["description"],
-                            category=table_info["category"],
-                            delivery_class=table_info["delivery_class"],
-                            fields=details["fields"]
-                        )
-                        
-                        # Almacenar en MongoDB
-                        await self.storage.store_table(contract)
-                        
-                        # Guardar contrato como archivo JSON
-                        await self.contract_handler.save_contract(contract)
-                        
-                        logger.info(f"Processed table: {table_info['name']}")
-                        
-                    except Exception as e:
-                        logger.error(f"Error processing table {table_info['name']}: {str(e)}")
-                        
-                # Procesar páginas adicionales
+                self.stats["index_pages"] += 1
+
                 for page_url in pagination:
-                    await self.process_index_page(page_url)
-                    
+                    if page_url and page_url not in seen:
+                        seen.add(page_url)
+                        index_queue.put_nowait(page_url)
+
+                for table_info in tables:
+                    if not table_info.get("url"):
+                        continue
+                    # La cola de tablas es acotada: si los workers van lentos, el índice espera
+                    await table_queue.put(table_info)
+                    self.stats["queued"] += 1
             except Exception as e:
-                logger.error(f"Error processing index {index_url}: {str(e)}") 
\ No newline at end of file
+                logger.error(f"Error processing index {index_url}: {str(e)}")
+            finally:
+                index_queue.task_done()
+
+    async def _table_worker(self, table_queue: asyncio.Queue):
+        """Procesa tablas de la cola hasta que se cancela"""
+        while True:
+            table_info = await table_queue.get()
+            try:
+                if await self.process_table(table_info):
+                    self.stats["processed"] += 1
+                else:
+                    self.stats["failed"] += 1
+            finally:
+                table_queue.task_done()
+
+    async def _report_queues(self, index_queue: asyncio.Queue, table_queue: asyncio.Queue):
+        """Registra periódicamente la profundidad de cada cola y el avance"""
+        while True:
+            await asyncio.sleep(settings.SCRAPER_QUEUE_REPORT_INTERVAL)
+            logger.info(
+                f"Colas - índices: {index_queue.qsize()}, tablas: {table_queue.qsize()} | "
+                f"índices leídos: {self.stats['index_pages']}, encoladas: {self.stats['queued']}, "
+                f"procesadas: {self.stats['processed']}, fallidas: {self.stats['failed']}"
+            )
+
+    async def process_all_tables(self) -> Dict[str, int]:
+        """Procesa todas las tablas disponibles con una cola de trabajo y un pool de workers"""
+        self.stats = {"index_pages": 0, "queued": 0, "processed": 0, "unchanged": 0, "failed": 0}
+        self.changes = {}
+        if settings.CHANGE_DETECTION_ENABLED:
+            self.known_hashes = await self.storage.load_content_hashes()
+            logger.info(f"Hashes de contenido cargados: {len(self.known_hashes)} tablas")
+        index_queue: asyncio.Queue = asyncio.Queue()
+        table_queue: asyncio.Queue = asyncio.Queue(maxsize=settings.SCRAPER_QUEUE_SIZE)
+        QUEUE_DEPTH.labels("index").set_function(index_queue.qsize)
+        QUEUE_DEPTH.labels("table").set_function(table_queue.qsize)
+
+        # Obtener índices
+        index_pages = await self.scraper.get_index_pages()
+        seen = set(index_pages)
+        for index_url in index_pages:
+            index_queue.put_nowait(index_url)
+
+        index_workers = [
+            asyncio.create_task(self._index_worker(index_queue, table_queue, seen))
+            for _ in range(settings.SCRAPER_INDEX_WORKERS)
+        ]
+        table_workers = [
+            asyncio.create_task(self._table_worker(table_queue))
+            for _ in range(settings.SCRAPER_WORKERS)
+        ]
+        reporter = asyncio.create_task(self._report_queues(index_queue, table_queue))
+        self.storage.start_flusher()
+
+        try:
+            # Primero se agotan los índices (que alimentan la cola de tablas) y luego las tablas
+            await index_queue.join()
+            await table_queue.join()
+        finally:
+            for task in index_workers + table_workers + [reporter]:
+                task.cancel()
+            await asyncio.gather(*index_workers, *table_workers, reporter, return_exceptions=True)
+            await self.storage.close()
+        self.stats["write_errors"] = len(self.storage.failed_writes)
+        if settings.CHANGE_DETECTION_ENABLED:
+            write_changelog(self.changes, settings.CHANGELOG_DIR)
+
+        logger.info(
+            f"Scraping completado - índices: {self.stats['index_pages']}, "
+            f"procesadas: {self.stats['processed']} ({self.stats['unchanged']} sin cambios), "
+            f"fallidas: {self.stats['failed']}, errores de escritura: {self.stats['write_errors']}"
+        )
+        return self.stats
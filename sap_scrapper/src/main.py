@@ -1,8 +1,10 @@
 import asyncio
 from core.orchestrator import SAPTableOrchestrator
 from core.logging import logger
+from core.metrics import start_metrics_server
 
 async def main():
+    start_metrics_server()
     orchestrator = SAPTableOrchestrator()
     await orchestrator.init()
     
@@ -11,7 +13,9 @@ async def main():
     except Exception as e:
         logger.error(f"Error en el proceso principal: {str(e)}")
     finally:
-        await orchestrator.scraper.browser.close()
+        await orchestrator.storage.close()
+        orchestrator.contract_handler.close()
+        await orchestrator.scraper.close()
 
 if __name__ == "__main__":
     asyncio.run(main()) 
\ No newline at end of file
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field
-from typing import List, Optional, Dict
+from typing import Any, List, Optional, Dict
 from datetime import datetime
 
 class SAPField(BaseModel):
@@ -14,4 +14,21 @@ class SAPTable(BaseModel):
     description: str = Field(..., description="Descripción de la tabla")
     fields: List[SAPField] = Field(..., description="Campos de la tabla")
     technical_settings: Dict[str, str] = Field(default_factory=dict, description="Configuraciones técnicas")
-    last_updated: datetime = Field(default_factory=datetime.utcnow, description="Última actualización") 
\ No newline at end of file
+    last_updated: datetime = Field(default_factory=datetime.utcnow, description="Última actualización") 
+
+class TablePage(BaseModel):
+    items: List[Dict[str, Any]] = Field(..., description="Tablas de la página")
+    next: Optional[str] = Field(None, description="Token opaco para pedir la página siguiente")
+
+class SearchPage(BaseModel):
+    items: List[Dict[str, Any]] = Field(..., description="Tablas encontradas, ordenadas por relevancia")
+    next_skip: Optional[int] = Field(None, description="Valor de skip para la página siguiente")
+
+class RefreshJob(BaseModel):
+    job_id: str = Field(..., description="Identificador del trabajo")
+    table_name: str = Field(..., description="Tabla a refrescar")
+    status: str = Field(..., description="pending, running, succeeded o failed")
+    error: Optional[str] = Field(None, description="Error si el refresco falló")
+    created_at: datetime = Field(default_factory=datetime.utcnow, description="Fecha de creación")
+    started_at: Optional[datetime] = Field(None, description="Inicio de la ejecución")
+    finished_at: Optional[datetime] = Field(None, description="Fin de la ejecución")
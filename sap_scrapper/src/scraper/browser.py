@@ -1,39 +1,68 @@
 from playwright.async_api import async_playwright, Browser, Page
 from typing import Dict, List, Optional
-import asyncio
 from ..core.logging import logger
 from ..core.config import settings
+from ..core.metrics import FETCH_SECONDS, HTTP_RESPONSES
+from .page_pool import PagePool
+from .rate_limiter import RateLimiter
+from urllib.parse import urlparse
 import backoff
 
 class TableIndexScraper:
-    def __init__(self):
+    def __init__(self, rate_limiter: Optional[RateLimiter] = None):
+        self.playwright = None
+        self.rate_limiter = rate_limiter or RateLimiter(0)
         self.browser: Optional[Browser] = None
         self.context = None
+        self.pool: Optional[PagePool] = None
         self.base_url = "https://www.sapdatasheet.org/abap/tabl/"
         
     async def init(self):
-        playwright = await async_playwright().start()
-        self.browser = await playwright.chromium.launch(headless=True)
+        self.playwright = await async_playwright().start()
+        self.browser = await self.playwright.chromium.launch(headless=True)
         self.context = await self.browser.new_context()
+        # Páginas reutilizables: no se abre ni cierra una página por cada URL
+        self.pool = PagePool(
+            self.context,
+            settings.SCRAPER_PAGE_POOL_SIZE,
+            urlparse(self.base_url).hostname,
+            block_resources=settings.SCRAPER_BLOCK_RESOURCES
+        )
+        await self.pool.init()
+
+    async def close(self):
+        if self.pool:
+            await self.pool.close()
+        if self.browser:
+            await self.browser.close()
+        if self.playwright:
+            await self.playwright.stop()
         
     async def get_index_pages(self) -> List[str]:
         """Obtiene todas las páginas índice (A-Z, CLUSTER, POOL, SLASH)"""
-        page = await self.context.new_page()
-        await page.goto(self.base_url)
-        
-        # Extraer links de índices
-        index_links = await page.evaluate("""() => {
-            return Array.from(document.querySelectorAll('.index-links a')).map(a => a.href);
-        }""")
+        async with self.pool.page() as page:
+            await self._goto(page, self.base_url)
+            
+            # Extraer links de índices
+            index_links = await page.evaluate("""() => {
+                return Array.from(document.querySelectorAll('.index-links a')).map(a => a.href);
+            }""")
         
-        await page.close()
         return index_links
         
     async def get_tables_from_index(self, index_url: str) -> List[Dict]:
         """Extrae las tablas de una página de índice"""
-        page = await self.context.new_page()
-        await page.goto(index_url)
-        
+        async with self.pool.page() as page:
+            await self._goto(page, index_url)
+            return await self._extract_index(page)
+
+    async def _goto(self, page: Page, url: str):
+        await self.rate_limiter.acquire()
+        with FETCH_SECONDS.labels("playwright").time():
+            response = await page.goto(url, wait_until="domcontentloaded")
+        HTTP_RESPONSES.labels(str(response.status) if response else "error").inc()
+
+    async def _extract_index(self, page: Page):
         # Extraer información de tablas
         tables = await page.evaluate("""() => {
             return Array.from(document.querySelectorAll('table tr')).slice(2).map(row => {
@@ -54,15 +83,16 @@ class TableIndexScraper:
             return Array.from(document.querySelectorAll('.pagination a')).map(a => a.href);
         }""")
         
-        await page.close()
         return tables, pagination_links
 
     @backoff.on_exception(backoff.expo, Exception, max_tries=3)
     async def extract_table_details(self, table_url: str) -> Dict:
         """Extrae los detalles de una tabla específica"""
-        page = await self.context.new_page()
-        await page.goto(table_url)
-        
+        async with self.pool.page() as page:
+            await self._goto(page, table_url)
+            return await self._extract_details(page)
+
+    async def _extract_details(self, page: Page) -> Dict:
         # Extraer detalles completos de la tabla
         details = await page.evaluate("""() => {
             return {
@@ -78,5 +108,4 @@ class TableIndexScraper:
             };
         }""")
         
-        await page.close()
-        return details
\ No newline at end of file
+        return details
@@ -0,0 +1,21 @@
+from typing import Optional
+from ..core.config import settings
+from .browser import TableIndexScraper
+from .http_backend import HTTPTableIndexScraper
+from .rate_limiter import RateLimiter
+
+
+def create_scraper(rate_limiter: Optional[RateLimiter] = None):
+    """
+    Crea el backend de scraping configurado en SCRAPER_BACKEND (playwright o http).
+    Cada petición al sitio, incluidos reintentos y el respaldo con Playwright, consume un
+    token de SCRAPER_RATE_LIMIT.
+    """
+    if rate_limiter is None:
+        rate_limiter = RateLimiter(settings.SCRAPER_RATE_LIMIT, burst=settings.SCRAPER_RATE_LIMIT)
+    backend = settings.SCRAPER_BACKEND.lower()
+    if backend == "http":
+        return HTTPTableIndexScraper(rate_limiter)
+    if backend == "playwright":
+        return TableIndexScraper(rate_limiter)
+    raise ValueError(f"SCRAPER_BACKEND no soportado: {settings.SCRAPER_BACKEND}")
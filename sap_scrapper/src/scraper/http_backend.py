@@ -0,0 +1,142 @@
+import aiohttp
+from lxml import html as lxml_html
+from typing import Dict, List, Optional, Tuple
+import asyncio
+from ..core.logging import logger
+from ..core.config import settings
+from ..core.metrics import FETCH_SECONDS, HTTP_RESPONSES, PARSE_SECONDS
+from .browser import TableIndexScraper
+from .rate_limiter import RateLimiter
+import backoff
+
+# Por debajo de este texto visible se asume que la página necesita JavaScript para renderizarse
+MIN_RENDERED_TEXT = 200
+
+
+class HTTPTableIndexScraper:
+    """
+    Backend sin navegador: las páginas de sapdatasheet se renderizan en el servidor,
+    así que basta con HTTP y selectores lxml. Solo se recurre a Playwright cuando
+    una página realmente necesita JavaScript.
+    """
+
+    def __init__(self, rate_limiter: Optional[RateLimiter] = None):
+        self.session: Optional[aiohttp.ClientSession] = None
+        # Sin limitador no hay límite de ritmo (rate 0)
+        self.rate_limiter = rate_limiter or RateLimiter(0)
+        self.base_url = "https://www.sapdatasheet.org/abap/tabl/"
+        self._fallback: Optional[TableIndexScraper] = None
+        self._fallback_lock: Optional[asyncio.Lock] = None
+
+    async def init(self):
+        connector = aiohttp.TCPConnector(limit=settings.SCRAPER_HTTP_POOL_SIZE)
+        timeout = aiohttp.ClientTimeout(total=settings.SCRAPER_HTTP_TIMEOUT)
+        self.session = aiohttp.ClientSession(connector=connector, timeout=timeout)
+        self._fallback_lock = asyncio.Lock()
+
+    async def close(self):
+        if self.session:
+            await self.session.close()
+        if self._fallback:
+            await self._fallback.close()
+
+    async def _fetch(self, url: str):
+        # Un token por petición: los reintentos de backoff también pasan por aquí
+        await self.rate_limiter.acquire()
+        try:
+            with FETCH_SECONDS.labels("http").time():
+                async with self.session.get(url) as response:
+                    HTTP_RESPONSES.labels(str(response.status)).inc()
+                    response.raise_for_status()
+                    body = await response.read()
+        except (aiohttp.ClientConnectionError, asyncio.TimeoutError):
+            HTTP_RESPONSES.labels("error").inc()
+            raise
+        with PARSE_SECONDS.labels("html").time():
+            doc = lxml_html.fromstring(body, base_url=url)
+        doc.make_links_absolute(url)
+        return doc
+
+    def _requires_javascript(self, doc) -> bool:
+        """Una página sin el contenido esperado y casi sin texto se renderiza en el cliente"""
+        text = doc.text_content().strip()
+        return bool(doc.cssselect('noscript')) or len(text) < MIN_RENDERED_TEXT
+
+    async def _browser(self) -> TableIndexScraper:
+        """Inicia Playwright solo la primera vez que se necesita"""
+        async with self._fallback_lock:
+            if self._fallback is None:
+                logger.info("Página requiere JavaScript, iniciando Playwright como respaldo")
+                fallback = TableIndexScraper(self.rate_limiter)
+                await fallback.init()
+                self._fallback = fallback
+        return self._fallback
+
+    @staticmethod
+    def _text(element) -> Optional[str]:
+        return element.text_content() if element is not None else None
+
+    @staticmethod
+    def _first(element, selector: str):
+        found = element.cssselect(selector)
+        return found[0] if found else None
+
+    async def get_index_pages(self) -> List[str]:
+        """Obtiene todas las páginas índice (A-Z, CLUSTER, POOL, SLASH)"""
+        doc = await self._fetch(self.base_url)
+        index_links = [a.get('href') for a in doc.cssselect('.index-links a')]
+        if not index_links and self._requires_javascript(doc):
+            return await (await self._browser()).get_index_pages()
+        return index_links
+
+    async def get_tables_from_index(self, index_url: str) -> Tuple[List[Dict], List[str]]:
+        """Extrae las tablas de una página de índice"""
+        doc = await self._fetch(index_url)
+
+        tables = []
+        for row in doc.cssselect('table tr')[2:]:
+            cells = row.cssselect('td')
+            if len(cells) < 5:
+                continue
+            link = self._first(cells[1], 'a')
+            tables.append({
+                "number": cells[0].text_content().strip(),
+                "name": link.text_content().strip() if link is not None else None,
+                "description": cells[2].text_content().strip(),
+                "category": cells[3].text_content().strip(),
+                "delivery_class": cells[4].text_content().strip(),
+                "url": link.get('href') if link is not None else None
+            })
+
+        if not tables and self._requires_javascript(doc):
+            return await (await self._browser()).get_tables_from_index(index_url)
+
+        # Obtener páginas adicionales del índice
+        pagination_links = [a.get('href') for a in doc.cssselect('.pagination a')]
+        return tables, pagination_links
+
+    @backoff.on_exception(backoff.expo, Exception, max_tries=3)
+    async def extract_table_details(self, table_url: str) -> Dict:
+        """Extrae los detalles de una tabla específica"""
+        doc = await self._fetch(table_url)
+
+        fields = []
+        for row in doc.cssselect('.field-row'):
+            key = self._first(row, '.field-key')
+            fields.append({
+                "name": self._text(self._first(row, '.field-name')),
+                "type": self._text(self._first(row, '.field-type')),
+                "length": self._text(self._first(row, '.field-length')),
+                "description": self._text(self._first(row, '.field-description')),
+                "key": key is not None and key.text_content() == 'X'
+            })
+
+        if not fields and self._requires_javascript(doc):
+            return await (await self._browser()).extract_table_details(table_url)
+
+        return {
+            "name": self._text(self._first(doc, '.table-name')),
+            "description": self._text(self._first(doc, '.table-description')),
+            "fields": fields
+        }
+
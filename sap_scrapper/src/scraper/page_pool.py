@@ -0,0 +1,77 @@
+from playwright.async_api import BrowserContext, Page, Route
+from contextlib import asynccontextmanager
+from typing import List, Optional
+from urllib.parse import urlparse
+import asyncio
+from ..core.logging import logger
+
+# Recursos que no aportan nada a la extracción de datos del DOM
+BLOCKED_RESOURCE_TYPES = {"image", "stylesheet", "font", "media"}
+
+
+class PagePool:
+    """Pool de páginas reutilizables que bloquea imágenes, CSS, fuentes y scripts de terceros"""
+
+    def __init__(self, context: BrowserContext, size: int, allowed_host: str, block_resources: bool = True):
+        self.context = context
+        self.size = size
+        self.allowed_host = allowed_host
+        self.block_resources = block_resources
+        # Cola de páginas libres; None marca un hueco cuya página hay que volver a crear
+        self._pages: Optional[asyncio.Queue] = None
+        self._all_pages: List[Page] = []
+
+    async def init(self):
+        if self.block_resources:
+            await self.context.route("**/*", self._handle_route)
+        self._pages = asyncio.Queue()
+        for _ in range(self.size):
+            await self._pages.put(await self._new_page())
+
+    async def _new_page(self) -> Page:
+        page = await self.context.new_page()
+        self._all_pages.append(page)
+        return page
+
+    async def _handle_route(self, route: Route):
+        request = route.request
+        if request.resource_type in BLOCKED_RESOURCE_TYPES:
+            await route.abort()
+            return
+        host = urlparse(request.url).hostname or ""
+        is_third_party = not (host == self.allowed_host or host.endswith(f".{self.allowed_host}"))
+        if request.resource_type == "script" and is_third_party:
+            await route.abort()
+            return
+        await route.continue_()
+
+    @asynccontextmanager
+    async def page(self):
+        """Toma una página del pool y la devuelve al terminar (o la reemplaza si se cerró)"""
+        page = await self._pages.get()
+        if page is None:
+            # Hueco liberado por un reemplazo fallido: se vuelve a intentar crear la página
+            try:
+                page = await self._new_page()
+            except Exception:
+                self._pages.put_nowait(None)
+                raise
+        try:
+            yield page
+        finally:
+            if page.is_closed():
+                self._all_pages.remove(page)
+                try:
+                    page = await self._new_page()
+                except Exception as e:
+                    logger.error(f"Error recreando página del pool: {str(e)}")
+                    # El hueco vuelve a la cola para que nadie espere una página que no va a volver
+                    self._pages.put_nowait(None)
+                    raise
+            self._pages.put_nowait(page)
+
+    async def close(self):
+        for page in self._all_pages:
+            if not page.is_closed():
+                await page.close()
+        self._all_pages = []
@@ -0,0 +1,33 @@
+import asyncio
+import time
+from typing import Optional
+
+
+class RateLimiter:
+    """Token bucket asíncrono: permite `rate` peticiones por segundo con ráfagas de hasta `burst`"""
+
+    def __init__(self, rate: float, burst: float = 1.0):
+        self.rate = rate
+        self.burst = max(burst, 1.0)
+        self.tokens = self.burst
+        self.updated = time.monotonic()
+        self._lock: Optional[asyncio.Lock] = None
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def acquire(self):
+        """Espera hasta que haya un token disponible y lo consume"""
+        if self.rate <= 0:
+            return
+        # El lock se crea dentro del event loop y atiende a los que esperan en orden de llegada
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            self._refill()
+            while self.tokens < 1:
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+                self._refill()
+            self.tokens -= 1
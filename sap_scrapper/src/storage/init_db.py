@@ -2,6 +2,7 @@ from motor.motor_asyncio import AsyncIOMotorClient
 import asyncio
 from ..core.config import settings
 from ..core.logging import logger
+from .search import create_search_indexes
 
 async def init_mongodb():
     try:
@@ -14,9 +15,10 @@ async def init_mongodb():
         logger.info("Conexión a MongoDB establecida")
         
         # Crear colecciones e índices
-        await db.tables.create_index("table_name", unique=True)
-        await db.tables.create_index("category")
-        await db.tables.create_index("delivery_class")
+        await db.sap_tables.create_index("table_name", unique=True)
+        await db.sap_tables.create_index("category")
+        await db.sap_tables.create_index("delivery_class")
+        await create_search_indexes(db.sap_tables)
         
         logger.info("Índices de MongoDB creados correctamente")
         
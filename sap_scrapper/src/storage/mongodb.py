@@ -1,34 +1,161 @@
 from motor.motor_asyncio import AsyncIOMotorClient
-from typing import Dict, List, Optional
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError, PyMongoError
+from typing import Dict, List, Optional, Tuple
+import asyncio
 from ..core.config import settings
+from ..core.logging import logger
+from ..core.metrics import MONGO_WRITE_ERRORS, MONGO_WRITE_SECONDS
 from ..models.data_contract import TableContract
+from .search import build_search_pipeline, create_search_indexes
 
 class TableStorage:
     def __init__(self):
         self.client = AsyncIOMotorClient(settings.MONGODB_URI)
         self.db = self.client[settings.DATABASE_NAME]
         self.collection = self.db.sap_tables
+        # Buffer de escritura: una entrada por tabla, la última versión gana
+        self.batch_size = settings.MONGODB_BULK_SIZE
+        self.flush_interval = settings.MONGODB_FLUSH_INTERVAL
+        self._buffer: Dict[str, TableContract] = {}
+        self._flush_lock: Optional[asyncio.Lock] = None
+        self._flusher: Optional[asyncio.Task] = None
+        self.failed_writes: List[str] = []
         
     async def init_indexes(self):
         """Crear índices necesarios"""
         await self.collection.create_index("table_name", unique=True)
         await self.collection.create_index("category")
         await self.collection.create_index("delivery_class")
+        await create_search_indexes(self.collection)
         
     async def store_table(self, table: TableContract) -> str:
         """Almacena o actualiza una tabla"""
-        result = await self.collection.update_one(
-            {"table_name": table.table_name},
-            {"$set": table.dict()},
-            upsert=True
-        )
+        with MONGO_WRITE_SECONDS.labels("update_one").time():
+            result = await self.collection.update_one(
+                {"table_name": table.table_name},
+                {"$set": table.dict()},
+                upsert=True
+            )
         return str(result.upserted_id or result.modified_count)
         
+    async def buffer_table(self, table: TableContract):
+        """Acumula una tabla para escribirla en bloque; vacía el buffer al llegar al tamaño de lote"""
+        self._buffer[table.table_name] = table
+        if len(self._buffer) >= self.batch_size:
+            await self.flush()
+
+    def start_flusher(self):
+        """Inicia la tarea que vacía el buffer cada MONGODB_FLUSH_INTERVAL segundos"""
+        if self._flusher is None or self._flusher.done():
+            self._flusher = asyncio.create_task(self._flush_periodically())
+
+    async def _flush_periodically(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.error(f"Error en el vaciado periódico del buffer: {str(e)}")
+
+    async def flush(self, final: bool = False) -> Dict[str, int]:
+        """
+        Escribe el buffer con un bulk_write no ordenado de upserts. Si falla la conexión el lote
+        vuelve al buffer para el siguiente vaciado; en el vaciado final se registra como fallido.
+        """
+        if self._flush_lock is None:
+            self._flush_lock = asyncio.Lock()
+        async with self._flush_lock:
+            if not self._buffer:
+                return {"upserted": 0, "modified": 0, "failed": 0}
+            tables = list(self._buffer.values())
+            self._buffer = {}
+            operations = [
+                UpdateOne({"table_name": table.table_name}, {"$set": table.dict()}, upsert=True)
+                for table in tables
+            ]
+            try:
+                with MONGO_WRITE_SECONDS.labels("bulk_write").time():
+                    result = await self.collection.bulk_write(operations, ordered=False)
+                details = result.bulk_api_result
+            except BulkWriteError as e:
+                # Con ordered=False el resto del lote se escribe; se informa cada documento fallido
+                details = e.details
+                for error in details.get("writeErrors", []):
+                    table_name = tables[error["index"]].table_name
+                    self.failed_writes.append(table_name)
+                    MONGO_WRITE_ERRORS.inc()
+                    logger.error(f"Error guardando tabla {table_name}: {error.get('errmsg')}")
+            except PyMongoError as e:
+                if final:
+                    self.failed_writes.extend(table.table_name for table in tables)
+                    MONGO_WRITE_ERRORS.inc(len(tables))
+                    logger.error(f"Bulk write de {len(tables)} tablas fallido: {str(e)}")
+                    return {"upserted": 0, "modified": 0, "failed": len(tables)}
+                # Las versiones encoladas mientras tanto son más recientes y se conservan
+                self._buffer = {**{table.table_name: table for table in tables}, **self._buffer}
+                logger.warning(f"Bulk write de {len(tables)} tablas fallido, se reintentará: {str(e)}")
+                return {"upserted": 0, "modified": 0, "failed": 0}
+
+            stats = {
+                "upserted": details.get("nUpserted", 0),
+                "modified": details.get("nModified", 0),
+                "failed": len(details.get("writeErrors", []))
+            }
+            logger.info(f"Bulk write de {len(operations)} tablas: {stats}")
+            return stats
+
+    async def close(self):
+        """Detiene el vaciado periódico y escribe lo que quede en el buffer"""
+        if self._flusher is not None:
+            self._flusher.cancel()
+            try:
+                await self._flusher
+            except asyncio.CancelledError:
+                pass
+            self._flusher = None
+        await self.flush(final=True)
+
+    async def load_content_hashes(self) -> Dict[str, str]:
+        """Hash de contenido de cada tabla almacenada, para omitir las que no cambiaron"""
+        cursor = self.collection.find(
+            {"metadata.content_hash": {"$exists": True}},
+            {"_id": 0, "table_name": 1, "metadata.content_hash": 1}
+        )
+        return {doc["table_name"]: doc["metadata"]["content_hash"] async for doc in cursor}
+
     async def get_table(self, table_name: str) -> Optional[Dict]:
         """Obtiene una tabla por nombre"""
         return await self.collection.find_one({"table_name": table_name})
         
-    async def list_tables(self, skip: int = 0, limit: int = 100) -> List[Dict]:
-        collection = self.db.tables
-        cursor = collection.find().skip(skip).limit(limit)
-        return await cursor.to_list(length=limit) 
\ No newline at end of file
+    async def list_tables(
+        self,
+        after: Optional[str] = None,
+        limit: int = 100,
+        fields: Optional[List[str]] = None
+    ) -> Tuple[List[Dict], Optional[str]]:
+        """
+        Lista tablas ordenadas por nombre a partir de `after` (paginación por clave sobre el índice único).
+        Devuelve la página y el último nombre si quedan más tablas.
+        """
+        query = {"table_name": {"$gt": after}} if after else {}
+        projection = {"_id": 0}
+        if fields:
+            projection.update({field: 1 for field in fields})
+            projection["table_name"] = 1
+        # Se pide un documento extra para saber si hay página siguiente sin contar la colección
+        cursor = self.collection.find(query, projection).sort("table_name", 1).limit(limit + 1)
+        tables = await cursor.to_list(length=limit + 1)
+        if len(tables) > limit:
+            tables = tables[:limit]
+            return tables, tables[-1]["table_name"]
+        return tables, None
+
+    async def search_tables(self, skip: int = 0, limit: int = 50, **filters) -> Tuple[List[Dict], bool]:
+        """
+        Busca tablas por texto, campos (nombre, tipo, longitud, clave), categoría y clase de entrega.
+        Devuelve los resultados ordenados por relevancia y si hay más páginas.
+        """
+        pipeline = build_search_pipeline(skip=skip, limit=limit, **filters)
+        results = await self.collection.aggregate(pipeline).to_list(length=limit + 1)
+        return results[:limit], len(results) > limit
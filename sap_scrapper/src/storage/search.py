@@ -0,0 +1,107 @@
+from pymongo import ASCENDING, TEXT
+from typing import Dict, List, Optional
+
+# Un único índice de texto por colección: nombre de tabla y campos pesan más que las descripciones
+TEXT_INDEX_WEIGHTS = {
+    "table_name": 10,
+    "fields.name": 5,
+    "description": 2,
+    "fields.description": 1
+}
+
+
+async def create_search_indexes(collection):
+    """Índices multikey sobre los campos de cada tabla y un índice de texto para búsqueda libre"""
+    await collection.create_index([("fields.name", ASCENDING)])
+    await collection.create_index([("fields.type", ASCENDING), ("fields.length", ASCENDING)])
+    await collection.create_index(
+        [(path, TEXT) for path in TEXT_INDEX_WEIGHTS],
+        weights=TEXT_INDEX_WEIGHTS,
+        name="catalog_text",
+        default_language="none"
+    )
+
+
+def _field_conditions(
+    field: Optional[str],
+    field_type: Optional[str],
+    min_length: Optional[int],
+    max_length: Optional[int],
+    key: Optional[bool]
+) -> Dict:
+    """Condiciones sobre un mismo elemento de `fields` (p. ej. un campo CURR de longitud > 15)"""
+    conditions = {}
+    if field:
+        conditions["name"] = field.upper()
+    if field_type:
+        conditions["type"] = field_type.upper()
+    length = {}
+    if min_length is not None:
+        length["$gte"] = min_length
+    if max_length is not None:
+        length["$lte"] = max_length
+    if length:
+        conditions["length"] = length
+    if key is not None:
+        conditions["key"] = key
+    return conditions
+
+
+def _matched_fields_expression(conditions: Dict) -> Dict:
+    """Traduce las condiciones de $elemMatch a una expresión $filter para devolver solo los campos que coinciden"""
+    clauses = []
+    for name, condition in conditions.items():
+        path = f"$$field.{name}"
+        if isinstance(condition, dict):
+            clauses.extend({op: [path, value]} for op, value in condition.items())
+        else:
+            clauses.append({"$eq": [path, condition]})
+    return {"$filter": {"input": "$fields", "as": "field", "cond": {"$and": clauses}}}
+
+
+def build_search_pipeline(
+    text: Optional[str] = None,
+    field: Optional[str] = None,
+    field_type: Optional[str] = None,
+    min_length: Optional[int] = None,
+    max_length: Optional[int] = None,
+    key: Optional[bool] = None,
+    category: Optional[str] = None,
+    delivery_class: Optional[str] = None,
+    skip: int = 0,
+    limit: int = 50
+) -> List[Dict]:
+    """Construye el pipeline de agregación: filtra por índices, ordena por relevancia y pagina"""
+    match: Dict = {}
+    if text:
+        match["$text"] = {"$search": text}
+    if category:
+        match["category"] = category
+    if delivery_class:
+        match["delivery_class"] = delivery_class
+    conditions = _field_conditions(field, field_type, min_length, max_length, key)
+    if conditions:
+        match["fields"] = {"$elemMatch": conditions}
+
+    pipeline: List[Dict] = [{"$match": match}]
+    if text:
+        pipeline.append({"$addFields": {"score": {"$meta": "textScore"}}})
+        pipeline.append({"$sort": {"score": -1, "table_name": 1}})
+    else:
+        pipeline.append({"$sort": {"table_name": 1}})
+
+    projection = {
+        "_id": 0,
+        "table_name": 1,
+        "description": 1,
+        "category": 1,
+        "delivery_class": 1
+    }
+    if text:
+        projection["score"] = 1
+    if conditions:
+        projection["matched_fields"] = _matched_fields_expression(conditions)
+
+    # Se pide un documento extra para saber si hay página siguiente
+    pipeline.extend([{"$skip": skip}, {"$limit": limit + 1}, {"$project": projection}])
+    return pipeline
@@ -0,0 +1,99 @@
+import asyncio
+import copy
+import os
+import threading
+from types import SimpleNamespace
+from typing import Dict, List, Optional
+
+import pytest
+
+# La configuración se lee al importar src.core.config: sin MongoDB, sin Playwright y contratos en archivos
+os.environ.setdefault("CONTRACT_STORAGE", "files")
+os.environ.setdefault("SCRAPER_BACKEND", "http")
+os.environ.setdefault("SCRAPER_RATE_LIMIT", "0")
+
+
+def make_table(name: str, description: str = "", fields: Optional[List[Dict]] = None, **extra) -> Dict:
+    """Documento de tabla con la forma que devuelve GET /tables/{table_name}"""
+    fields = fields if fields is not None else [
+        {"name": "MANDT", "data_type": "CLNT", "length": 3, "description": "Client", "key_field": True}
+    ]
+    return {"table_name": name, "description": description or f"Tabla {name}", "fields": fields, **extra}
+
+
+class FakeStorage:
+    """TableStorage en memoria con los métodos que usa la API"""
+
+    def __init__(self, tables=()):
+        self.tables = {table["table_name"]: table for table in tables}
+        self.list_calls: List[Optional[List[str]]] = []
+        self.search_calls: List[Dict] = []
+        self.search_results: List[Dict] = []
+        self.reads = 0
+
+    async def get_table(self, table_name: str) -> Optional[Dict]:
+        self.reads += 1
+        return copy.deepcopy(self.tables.get(table_name))
+
+    async def store_table(self, table) -> str:
+        self.tables[table.table_name] = table.model_dump()
+        return table.table_name
+
+    async def list_tables(self, after=None, limit=100, fields=None):
+        self.list_calls.append(fields)
+        names = sorted(name for name in self.tables if after is None or name > after)
+        page = names[:limit]
+        top_level = {field.split(".")[0] for field in fields or []} | {"table_name"}
+        items = [
+            {key: value for key, value in self.tables[name].items() if not fields or key in top_level}
+            for name in page
+        ]
+        return items, page[-1] if len(names) > limit else None
+
+    async def search_tables(self, skip=0, limit=50, **filters):
+        self.search_calls.append(filters)
+        return self.search_results[skip:skip + limit], len(self.search_results) > skip + limit
+
+
+class FakeScraper:
+    """Backend de scraping que anota las URLs pedidas y espera a `gate` antes de responder"""
+
+    base_url = "https://www.sapdatasheet.org/abap/tabl/"
+
+    def __init__(self):
+        self.urls: List[str] = []
+        self.gate = threading.Event()
+        self.gate.set()
+
+    async def extract_table_details(self, table_url: str) -> Dict:
+        self.urls.append(table_url)
+        while not self.gate.is_set():
+            await asyncio.sleep(0.01)
+        return {
+            "description": "Refrescada",
+            "fields": [{"name": "MANDT", "type": "CLNT", "length": 3, "description": "Client", "key": True}]
+        }
+
+    async def close(self):
+        pass
+
+
+@pytest.fixture
+def api(tmp_path, monkeypatch):
+    """Cliente de la API con almacenamiento, scraper, caché y trabajos aislados por test"""
+    from fastapi.testclient import TestClient
+    from src.api import routes
+    from src.api.cache import ResponseCache
+    from src.api.jobs import RefreshJobManager
+    from src.contracts.contract_handler import ContractHandler
+
+    storage = FakeStorage()
+    scraper = FakeScraper()
+    monkeypatch.setattr(routes, "db", storage)
+    monkeypatch.setattr(routes, "scraper", scraper)
+    monkeypatch.setattr(routes, "_scraper_started", True)
+    monkeypatch.setattr(routes, "response_cache", ResponseCache(16, 300))
+    monkeypatch.setattr(routes, "contract_handler", ContractHandler(str(tmp_path / "contracts"), "files"))
+    monkeypatch.setattr(routes, "refresh_jobs", RefreshJobManager(routes._refresh, 2))
+    with TestClient(routes.app) as client:
+        yield SimpleNamespace(client=client, storage=storage, scraper=scraper, contracts=tmp_path / "contracts")
@@ -0,0 +1,79 @@
+import time
+
+from .conftest import make_table
+
+NAMESPACED = "/1BEA/BBEA_BDH"
+
+
+def _wait_for(api, job_id, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        job = api.client.get(f"/jobs/{job_id}").json()
+        if job["status"] in ("succeeded", "failed"):
+            return job
+        time.sleep(0.01)
+    raise AssertionError(f"El trabajo {job_id} no terminó")
+
+
+def test_concurrent_refreshes_share_one_job(api):
+    api.storage.tables["MARA"] = make_table("MARA", "Datos generales", category="TRANSP")
+    api.client.get("/tables/MARA")
+    api.scraper.gate.clear()
+
+    first = api.client.post("/tables/MARA/refresh")
+    second = api.client.post("/tables/MARA/refresh")
+    assert first.status_code == second.status_code == 202
+    job_id = first.json()["job_id"]
+    assert second.json()["job_id"] == job_id
+    assert first.headers["Location"] == f"/jobs/{job_id}"
+    assert api.client.get(f"/jobs/{job_id}").json()["status"] in ("pending", "running")
+
+    api.scraper.gate.set()
+    job = _wait_for(api, job_id)
+    assert job["status"] == "succeeded"
+    assert job["started_at"] and job["finished_at"]
+    assert len(api.scraper.urls) == 1
+
+    # Se guardan la tabla y el contrato, y la respuesta cacheada se descarta
+    stored = api.storage.tables["MARA"]
+    assert stored["description"] == "Datos generales"
+    assert stored["category"] == "TRANSP"
+    assert (api.contracts / "mara.json").exists()
+    assert api.storage.reads == 2
+    api.storage.tables["MARA"] = make_table("MARA", "Datos generales")
+    api.client.get("/tables/MARA")
+    assert api.storage.reads == 3
+
+    # Terminado el trabajo, un nuevo refresco crea otro
+    assert api.client.post("/tables/MARA/refresh").json()["job_id"] != job_id
+
+
+def test_failed_refresh_reports_the_error(api):
+    async def broken(table_url):
+        raise RuntimeError("timeout")
+
+    api.scraper.extract_table_details = broken
+    job = _wait_for(api, api.client.post("/tables/MARA/refresh").json()["job_id"])
+    assert job["status"] == "failed"
+    assert job["error"] == "timeout"
+
+
+def test_unknown_job_is_404(api):
+    assert api.client.get("/jobs/desconocido").status_code == 404
+
+
+def test_refresh_uses_the_stored_source_url(api):
+    url = "https://www.sapdatasheet.org/abap/tabl/%2f1bea%2fbbea_bdh.html"
+    api.storage.tables[NAMESPACED] = make_table(NAMESPACED, metadata={"source_url": url, "content_hash": "abc"})
+    job = _wait_for(api, api.client.post("/tables/%2F1BEA%2FBBEA_BDH/refresh").json()["job_id"])
+    assert job["status"] == "succeeded"
+    assert job["table_name"] == NAMESPACED
+    assert api.scraper.urls == [url]
+    assert api.storage.tables[NAMESPACED]["metadata"] == {"source_url": url, "content_hash": "abc"}
+    assert (api.contracts / "_1bea_bbea_bdh.json").exists()
+
+
+def test_refresh_without_stored_url_encodes_the_name(api):
+    job = _wait_for(api, api.client.post("/tables/%2F1BEA%2FBBEA_BDH/refresh").json()["job_id"])
+    assert job["status"] == "succeeded"
+    assert api.scraper.urls == ["https://www.sapdatasheet.org/abap/tabl/%2F1bea%2Fbbea_bdh.html"]
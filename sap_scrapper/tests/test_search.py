@@ -0,0 +1,66 @@
+from src.storage.search import build_search_pipeline
+
+
+def _stage(pipeline, name):
+    return next(stage[name] for stage in pipeline if name in stage)
+
+
+def test_field_conditions_apply_to_the_same_field():
+    pipeline = build_search_pipeline(field="matnr", field_type="char", min_length=18, max_length=40, key=True)
+
+    # Un solo $elemMatch: un campo CHAR clave de 18 a 40, no un campo CHAR y otro distinto de esa longitud
+    assert _stage(pipeline, "$match") == {
+        "fields": {"$elemMatch": {"name": "MATNR", "type": "CHAR", "length": {"$gte": 18, "$lte": 40}, "key": True}}
+    }
+    assert _stage(pipeline, "$project")["matched_fields"] == {"$filter": {
+        "input": "$fields",
+        "as": "field",
+        "cond": {"$and": [
+            {"$eq": ["$$field.name", "MATNR"]},
+            {"$eq": ["$$field.type", "CHAR"]},
+            {"$gte": ["$$field.length", 18]},
+            {"$lte": ["$$field.length", 40]},
+            {"$eq": ["$$field.key", True]}
+        ]}
+    }}
+
+
+def test_text_search_is_ordered_by_score_then_name():
+    pipeline = build_search_pipeline(text="material plant", category="TRANSP", skip=20, limit=10)
+    assert _stage(pipeline, "$match") == {"$text": {"$search": "material plant"}, "category": "TRANSP"}
+    assert _stage(pipeline, "$addFields") == {"score": {"$meta": "textScore"}}
+    assert list(_stage(pipeline, "$sort").items()) == [("score", -1), ("table_name", 1)]
+    assert _stage(pipeline, "$project")["score"] == 1
+    assert "matched_fields" not in _stage(pipeline, "$project")
+
+    # La paginación va después del orden y pide un documento extra para saber si hay más
+    stages = [next(iter(stage)) for stage in pipeline]
+    assert stages.index("$sort") < stages.index("$skip") < stages.index("$limit")
+    assert _stage(pipeline, "$skip") == 20
+    assert _stage(pipeline, "$limit") == 11
+
+
+def test_without_text_results_are_ordered_by_name():
+    pipeline = build_search_pipeline(field_type="CURR")
+    assert _stage(pipeline, "$sort") == {"table_name": 1}
+    assert not any("$addFields" in stage for stage in pipeline)
+
+
+def test_search_endpoint_passes_filters_and_pages(api):
+    api.storage.search_results = [{"table_name": f"T{n:03}"} for n in range(3)]
+    response = api.client.get("/search", params={"field": "MATNR", "type": "CHAR", "key": "true", "limit": 2})
+    assert response.status_code == 200
+    assert response.json() == {"items": [{"table_name": "T000"}, {"table_name": "T001"}], "next_skip": 2}
+    assert api.storage.search_calls[-1] == {
+        "text": None, "field": "MATNR", "field_type": "CHAR", "min_length": None, "max_length": None,
+        "key": True, "category": None, "delivery_class": None
+    }
+
+    last = api.client.get("/search", params={"field": "MATNR", "skip": 2, "limit": 2}).json()
+    assert last["next_skip"] is None
+
+
+def test_search_without_criteria_is_rejected(api):
+    assert api.client.get("/search").status_code == 400
+    assert api.client.get("/search", params={"q": ""}).status_code == 400
+    assert api.storage.search_calls == []
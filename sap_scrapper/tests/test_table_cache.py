@@ -0,0 +1,57 @@
+from types import SimpleNamespace
+
+from src.api import cache
+from src.api.cache import ResponseCache
+
+from .conftest import make_table
+
+
+def test_etag_revalidation_returns_304_without_reading_storage(api):
+    api.storage.tables["MARA"] = make_table("MARA")
+    first = api.client.get("/tables/MARA")
+    assert first.status_code == 200
+    etag = first.headers["ETag"]
+    assert first.json()["table_name"] == "MARA"
+
+    for header in (etag, f"W/{etag}", f'"otro", {etag}', "*"):
+        response = api.client.get("/tables/MARA", headers={"If-None-Match": header})
+        assert response.status_code == 304
+        assert response.headers["ETag"] == etag
+        assert response.content == b""
+    assert api.storage.reads == 1
+
+    assert api.client.get("/tables/MARA", headers={"If-None-Match": '"otro"'}).status_code == 200
+
+
+def test_missing_table_is_404(api):
+    assert api.client.get("/tables/ZZZZ").status_code == 404
+
+
+def test_entries_expire_after_ttl(api, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(cache, "time", SimpleNamespace(monotonic=lambda: now[0]))
+    api.storage.tables["MARA"] = make_table("MARA", "Datos generales")
+    etag = api.client.get("/tables/MARA").headers["ETag"]
+
+    # Dentro del TTL se sirve la respuesta cacheada aunque el documento haya cambiado
+    api.storage.tables["MARA"] = make_table("MARA", "Datos generales de material")
+    now[0] += 299
+    assert api.client.get("/tables/MARA").json()["description"] == "Datos generales"
+
+    now[0] += 2
+    response = api.client.get("/tables/MARA", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.json()["description"] == "Datos generales de material"
+    assert response.headers["ETag"] != etag
+    assert api.storage.reads == 2
+
+
+def test_least_recently_used_entry_is_evicted():
+    responses = ResponseCache(max_entries=2, ttl_seconds=300)
+    responses.set("MARA", b"mara")
+    responses.set("MARC", b"marc")
+    responses.get("MARA")
+    responses.set("MAKT", b"makt")
+    assert responses.get("MARC") is None
+    assert responses.get("MARA")[0] == b"mara"
+    assert responses.get("MAKT")[0] == b"makt"
@@ -0,0 +1,41 @@
+from .conftest import make_table
+
+
+def _seed(api, *names):
+    for name in names:
+        api.storage.tables[name] = make_table(name, category="TRANSP")
+
+
+def test_pages_follow_the_opaque_cursor(api):
+    _seed(api, "MAKT", "MARA", "MARC")
+    first = api.client.get("/tables", params={"limit": 2}).json()
+    assert [table["table_name"] for table in first["items"]] == ["MAKT", "MARA"]
+
+    second = api.client.get("/tables", params={"limit": 2, "next": first["next"]}).json()
+    assert [table["table_name"] for table in second["items"]] == ["MARC"]
+    assert second["next"] is None
+
+
+def test_invalid_cursor_is_rejected(api):
+    assert api.client.get("/tables", params={"next": "%%%"}).status_code == 400
+
+
+def test_projection_is_validated_and_passed_to_storage(api):
+    _seed(api, "MARA")
+    response = api.client.get("/tables", params={"fields": "description, fields.name"})
+    assert response.status_code == 200
+    assert api.storage.list_calls[-1] == ["description", "fields.name"]
+    assert set(response.json()["items"][0]) == {"table_name", "description", "fields"}
+
+
+def test_unknown_fields_are_rejected(api):
+    response = api.client.get("/tables", params={"fields": "description,owner"})
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Unknown fields: owner"
+
+
+def test_overlapping_fields_are_rejected_before_reaching_mongodb(api):
+    response = api.client.get("/tables", params={"fields": "fields,fields.name,description"})
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Overlapping fields: fields.name"
+    assert api.storage.list_calls == []
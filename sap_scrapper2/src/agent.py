@@ -1,20 +1,65 @@
 import os
 import json
-from typing import Dict, Any
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, List, Optional, Tuple
 import google.generativeai as genai
 from dotenv import load_dotenv
 import re
+import time
+import logging
+
+from html_minimizer import minimize_html, estimate_tokens
+from llm_cache import LLMCache
+from llm_cassette import CassetteMiss, LLMCassette, REPLAY
+from metrics import LLM_CACHE_HITS, LLM_CALL_SECONDS, LLM_ERRORS, LLM_TOKENS
+
+logger = logging.getLogger(__name__)
+
+# Incrementar al cambiar cualquier prompt para invalidar la caché de respuestas
+PROMPT_VERSION = "3"
 
 class SAPAgent:
     def __init__(self):
         load_dotenv()
+        # Cassette: record graba el tráfico con el LLM, replay lo reproduce sin red (off por defecto)
+        cassette_mode = os.getenv('LLM_CASSETTE_MODE', 'off').lower()
+        self.model_name = os.getenv('LLM_MODEL', 'gemini-pro')
         self.api_key = os.getenv('GOOGLE_API_KEY')
-        if not self.api_key:
-            raise ValueError("GOOGLE_API_KEY no encontrada en variables de entorno")
-            
-        # Configurar Gemini
-        genai.configure(api_key=self.api_key)
-        self.model = genai.GenerativeModel('gemini-pro')
+        if cassette_mode == REPLAY:
+            self.model = None
+        else:
+            if not self.api_key:
+                raise ValueError("GOOGLE_API_KEY no encontrada en variables de entorno")
+
+            # Configurar Gemini
+            genai.configure(api_key=self.api_key)
+            self.model = genai.GenerativeModel(self.model_name)
+
+        self.cassette: Optional[LLMCassette] = None
+        if cassette_mode != 'off':
+            self.cassette = LLMCassette(
+                os.getenv('LLM_CASSETTE_PATH', 'cassettes/llm_cassette.jsonl'),
+                cassette_mode,
+                model=self.model,
+                model_name=self.model_name,
+                time_scale=float(os.getenv('LLM_CASSETTE_TIME_SCALE', 1.0))
+            )
+            self.model = self.cassette
+
+        # Límite de llamadas concurrentes al LLM, independiente del límite de descargas
+        self.max_concurrency = int(os.getenv('LLM_MAX_CONCURRENCY', 4))
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+        self.cache = None
+        # Con cassette no se usa la caché: las respuestas cacheadas no se grabarían ni se reproducirían
+        if os.getenv('LLM_CACHE_ENABLED', 'true').lower() == 'true' and not self.cassette:
+            self.cache = LLMCache(
+                os.getenv('LLM_CACHE_PATH', 'cache/llm_cache.sqlite'),
+                float(os.getenv('LLM_CACHE_TTL_HOURS', 720)) * 3600,
+                int(os.getenv('LLM_CACHE_MAX_ENTRIES', 50000))
+            )
 
     def _clean_json_response(self, text: str) -> str:
         """Limpia la respuesta para obtener solo el JSON válido"""
@@ -23,13 +68,20 @@ class SAPAgent:
         text = re.sub(r'\s*```', '', text)
         return text.strip()
 
-    def _make_completion(self, prompt: str) -> Dict:
-        """Método helper para hacer completions con manejo de errores"""
-        try:
-            print(f"Usando API key: {self.api_key[:10]}...")
-            
-            # Agregar instrucción explícita para JSON
-            prompt_with_json = f"""
+    def _cached_completion(self, prompt: str) -> Tuple[Optional[str], Optional[Dict]]:
+        """Devuelve la clave de caché del prompt y la respuesta cacheada si existe"""
+        if not self.cache:
+            return None, None
+        cache_key = self.cache.make_key(self.model_name, PROMPT_VERSION, prompt)
+        cached = self.cache.get(cache_key)
+        if cached is not None:
+            LLM_CACHE_HITS.inc()
+            logger.debug("Respuesta LLM servida desde caché")
+        return cache_key, cached
+
+    def _wrap_prompt(self, prompt: str) -> str:
+        """Agrega instrucción explícita para JSON"""
+        return f"""
             Analiza la siguiente información y devuelve un JSON válido.
             No incluyas bloques de código markdown.
 
@@ -37,37 +89,107 @@ class SAPAgent:
 
             La respuesta DEBE ser un JSON válido y bien formateado.
             """
-            
-            response = self.model.generate_content(prompt_with_json)
-            
-            print("\nRespuesta completa:", response.text)
-            
-            try:
-                clean_response = self._clean_json_response(response.text)
-                print("\nRespuesta limpia:", clean_response)
-                return json.loads(clean_response)
-            except json.JSONDecodeError as e:
-                print(f"Error decodificando JSON: {e}")
-                print("Contenido recibido:", response.text)
-                return {}
-            
+
+    def _record_usage(self, prompt: str, response, started: float, mode: str):
+        """Registra latencia y tokens de una llamada; usa el conteo del modelo si lo informa"""
+        LLM_CALL_SECONDS.labels(mode).observe(time.perf_counter() - started)
+        usage = getattr(response, 'usage_metadata', None)
+        prompt_tokens = getattr(usage, 'prompt_token_count', None) or estimate_tokens(prompt)
+        completion_tokens = getattr(usage, 'candidates_token_count', None) or estimate_tokens(response.text)
+        LLM_TOKENS.labels('prompt').inc(prompt_tokens)
+        LLM_TOKENS.labels('completion').inc(completion_tokens)
+
+    def _parse_completion(self, text: str, cache_key: Optional[str]) -> Dict:
+        """Parsea la respuesta del modelo y la cachea si es un JSON válido"""
+        logger.debug(f"Respuesta completa: {text}")
+
+        try:
+            clean_response = self._clean_json_response(text)
+            result = json.loads(clean_response)
+            # Solo se cachean resultados parseados correctamente
+            if cache_key and result:
+                self.cache.set(cache_key, result)
+            return result
+        except json.JSONDecodeError as e:
+            LLM_ERRORS.labels('json').inc()
+            logger.warning(f"Error decodificando JSON: {e}")
+            logger.debug(f"Contenido recibido: {text}")
+            return {}
+
+    def _make_completion(self, prompt: str) -> Dict:
+        """Método helper para hacer completions con manejo de errores"""
+        cache_key, cached = self._cached_completion(prompt)
+        if cached is not None:
+            return cached
+
+        try:
+            wrapped = self._wrap_prompt(prompt)
+            started = time.perf_counter()
+            response = self.model.generate_content(wrapped)
+            self._record_usage(wrapped, response, started, 'sync')
+            return self._parse_completion(response.text, cache_key)
+
+        except CassetteMiss as e:
+            LLM_ERRORS.labels('cassette_miss').inc()
+            logger.warning(f"Respuesta no disponible en el cassette: {e}")
+            return {}
         except Exception as e:
-            print(f"Error en completion: {str(e)}")
-            print(f"Tipo de error: {type(e)}")
+            LLM_ERRORS.labels('api').inc()
+            logger.error(f"Error en completion ({type(e).__name__}): {e}")
+            return {}
+
+    async def _make_completion_async(self, prompt: str) -> Dict:
+        """Versión asíncrona de _make_completion, limitada a LLM_MAX_CONCURRENCY llamadas en vuelo"""
+        cache_key, cached = self._cached_completion(prompt)
+        if cached is not None:
+            return cached
+
+        # El semáforo se crea dentro del event loop que lo va a usar
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        try:
+            wrapped = self._wrap_prompt(prompt)
+            async with self._semaphore:
+                # La latencia se mide sin la espera del semáforo
+                started = time.perf_counter()
+                if hasattr(self.model, 'generate_content_async'):
+                    response = await self.model.generate_content_async(wrapped)
+                else:
+                    # Clientes sin API asíncrona: pool de hilos acotado
+                    if self._executor is None:
+                        self._executor = ThreadPoolExecutor(max_workers=self.max_concurrency)
+                    loop = asyncio.get_running_loop()
+                    response = await loop.run_in_executor(self._executor, self.model.generate_content, wrapped)
+            self._record_usage(wrapped, response, started, 'async')
+            return self._parse_completion(response.text, cache_key)
+
+        except CassetteMiss as e:
+            LLM_ERRORS.labels('cassette_miss').inc()
+            logger.warning(f"Respuesta no disponible en el cassette: {e}")
+            return {}
+        except Exception as e:
+            LLM_ERRORS.labels('api').inc()
+            logger.error(f"Error en completion ({type(e).__name__}): {e}")
             return {}
 
     def interpret_table_structure(self, html_content: str) -> Dict[str, Any]:
         """Interpreta la estructura de una tabla SAP desde el HTML usando Gemini"""
-        prompt = f"""
-        Analiza el siguiente HTML de una tabla SAP y extrae su estructura.
+        content, stats = minimize_html(html_content)
+        return self.interpret_table_content(content, stats)
+
+    def _table_prompt(self, content: str) -> str:
+        return f"""
+        Analiza el siguiente contenido de una página de tabla SAP y extrae su estructura.
+        Las tablas HTML vienen como filas separadas por tabuladores.
         Identifica:
         1. Nombre de la tabla
         2. Descripción
         3. Categoría
         4. Campos y sus propiedades
         
-        HTML:
-        {html_content}
+        Contenido:
+        {content}
         
         Responde en formato JSON siguiendo esta estructura:
         {{
@@ -85,13 +207,111 @@ class SAPAgent:
             ]
         }}
         """
-        return self._make_completion(prompt)
+
+    def _attach_prompt_stats(self, result: Dict[str, Any], stats: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        if result and stats:
+            logger.info(
+                f"Prompt minimizado: {stats['original_tokens']} -> {stats['minimized_tokens']} tokens "
+                f"({stats['reduction_pct']}% menos)"
+            )
+            result["_prompt_stats"] = stats
+        return result
+
+    def interpret_table_content(self, content: str, stats: Dict[str, Any] = None) -> Dict[str, Any]:
+        """Interpreta una página ya minimizada (texto compacto, tablas en TSV)"""
+        result = self._make_completion(self._table_prompt(content))
+        return self._attach_prompt_stats(result, stats)
+
+    async def interpret_table_content_async(self, content: str, stats: Dict[str, Any] = None) -> Dict[str, Any]:
+        """Versión asíncrona de interpret_table_content"""
+        result = await self._make_completion_async(self._table_prompt(content))
+        return self._attach_prompt_stats(result, stats)
+
+    def _batch_prompt(self, contents: Dict[str, str]) -> str:
+        pages = "\n\n".join(f"### TABLA: {key}\n{content}" for key, content in contents.items())
+        return f"""
+        Analiza las siguientes páginas de tablas SAP. Cada página comienza con una línea
+        "### TABLA: <clave>" y las tablas HTML vienen como filas separadas por tabuladores.
+        Para cada página identifica nombre, descripción, categoría y campos.
+        
+        {pages}
+        
+        Responde con un único objeto JSON cuyas claves sean exactamente las claves indicadas
+        ({", ".join(contents)}) y cuyo valor para cada una siga esta estructura:
+        {{
+            "table_name": str,
+            "description": str,
+            "category": str,
+            "fields": [
+                {{
+                    "name": str,
+                    "description": str,
+                    "data_type": str,
+                    "is_key": bool,
+                    "is_nullable": bool
+                }}
+            ]
+        }}
+        """
+
+    async def interpret_tables_batch_async(self, items: Dict[str, Tuple[str, Optional[Dict[str, Any]]]]) -> Dict[str, Dict[str, Any]]:
+        """
+        Interpreta varias páginas minimizadas en un solo prompt.
+        items: clave -> (contenido, estadísticas). Las tablas que vuelven ausentes o
+        malformadas se reintentan de forma individual.
+        """
+        results: Dict[str, Dict[str, Any]] = {}
+        pending: Dict[str, str] = {}
+        cache_keys: Dict[str, Optional[str]] = {}
+        for key, (content, stats) in items.items():
+            # La caché se consulta por tabla, con la misma clave que el prompt individual
+            cache_key, cached = self._cached_completion(self._table_prompt(content))
+            if cached is not None:
+                results[key] = self._attach_prompt_stats(cached, stats)
+            else:
+                pending[key] = content
+                cache_keys[key] = cache_key
+
+        batch_result: Dict[str, Any] = {}
+        if len(pending) > 1:
+            batch_result = await self._make_completion_async(self._batch_prompt(pending))
+            if not isinstance(batch_result, dict):
+                batch_result = {}
+
+        retries = []
+        for key in pending:
+            table_info = batch_result.get(key)
+            if isinstance(table_info, dict) and isinstance(table_info.get("fields"), list) and table_info["fields"]:
+                if cache_keys[key]:
+                    self.cache.set(cache_keys[key], table_info)
+                results[key] = self._attach_prompt_stats(table_info, items[key][1])
+            else:
+                retries.append(key)
+
+        if retries:
+            if len(pending) > 1:
+                logger.info(f"Reintentando individualmente {len(retries)} de {len(pending)} tablas del lote")
+            retried = await asyncio.gather(*(self.interpret_table_content_async(*items[key]) for key in retries))
+            results.update(zip(retries, retried))
+
+        return results
+
+    @staticmethod
+    def _contract_input(table_info: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Contenido estable de la tabla para el prompt del contrato: sin claves internas (_metadata,
+        _prompt_stats) ni la fecha de scraping, para que la caché y los cassettes acierten entre ejecuciones.
+        """
+        stable = {key: value for key, value in table_info.items() if not key.startswith('_')}
+        if isinstance(stable.get("source"), dict):
+            stable["source"] = {key: value for key, value in stable["source"].items() if key != "scrape_timestamp"}
+        return stable
 
     def generate_data_contract(self, table_info: Dict[str, Any]) -> Dict[str, Any]:
         """Genera un contrato de datos basado en la información de la tabla"""
         prompt = f"""
         Genera un contrato de datos para una tabla SAP con la siguiente información:
-        {json.dumps(table_info, indent=2)}
+        {json.dumps(self._contract_input(table_info), indent=2, sort_keys=True)}
         
         El contrato debe seguir exactamente la estructura del template y mapear los campos 
         de la tabla SAP a los campos correspondientes del contrato.
@@ -111,4 +331,71 @@ class SAPAgent:
         }}
         """
         validation = self._make_completion(prompt)
-        return validation["is_valid"]
\ No newline at end of file
+        return validation["is_valid"]
+
+
+class LLMBatcher:
+    """Agrupa tablas pequeñas en prompts multi-tabla hasta un presupuesto de tokens"""
+
+    def __init__(self, agent: SAPAgent, token_budget: int, max_wait: float):
+        self.agent = agent
+        self.token_budget = token_budget
+        self.max_wait = max_wait
+        self._pending: List[Tuple[str, str, Optional[Dict[str, Any]], asyncio.Future]] = []
+        self._pending_tokens = 0
+        self._timer: Optional[asyncio.Task] = None
+        self._tasks = set()
+
+    async def submit(self, key: str, content: str, stats: Dict[str, Any] = None) -> Dict[str, Any]:
+        """Encola una tabla y espera su resultado"""
+        tokens = estimate_tokens(content)
+        if self._pending and (
+            self._pending_tokens + tokens > self.token_budget or any(p[0] == key for p in self._pending)
+        ):
+            self._flush()
+
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append((key, content, stats, future))
+        self._pending_tokens += tokens
+
+        if self._pending_tokens >= self.token_budget:
+            self._flush()
+        elif self._timer is None:
+            self._timer = asyncio.create_task(self._flush_later())
+        return await future
+
+    async def _flush_later(self):
+        await asyncio.sleep(self.max_wait)
+        self._timer = None
+        self._flush()
+
+    def _flush(self):
+        """Envía el lote pendiente sin esperar su resultado"""
+        if self._timer is not None and self._timer is not asyncio.current_task():
+            self._timer.cancel()
+        self._timer = None
+        batch, self._pending, self._pending_tokens = self._pending, [], 0
+        if batch:
+            task = asyncio.create_task(self._run(batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, batch):
+        try:
+            results = await self.agent.interpret_tables_batch_async(
+                {key: (content, stats) for key, content, stats, _ in batch}
+            )
+            for key, _, _, future in batch:
+                if not future.done():
+                    future.set_result(results.get(key, {}))
+        except Exception as e:
+            logger.error(f"Error procesando lote de {len(batch)} tablas: {e}")
+            for _, _, _, future in batch:
+                if not future.done():
+                    future.set_result({})
+
+    async def close(self):
+        """Envía lo pendiente y espera a que terminen los lotes en curso"""
+        self._flush()
+        if self._tasks:
+            await asyncio.gather(*self._tasks)
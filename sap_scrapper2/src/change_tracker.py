@@ -0,0 +1,124 @@
+import os
+import re
+import json
+import sqlite3
+import hashlib
+import logging
+from datetime import datetime
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+_WHITESPACE = re.compile(r'\s+')
+
+
+def _normalize(value):
+    if isinstance(value, str):
+        return _WHITESPACE.sub(' ', value).strip()
+    return value
+
+
+def content_hash(parsed: Dict, parse_mode: str) -> str:
+    """
+    Hash normalizado del contenido de una página parseada: los campos y la descripción si el
+    parser la entendió, o el contenido minimizado que iría al LLM si no.
+    """
+    table_info = parsed.get("table_info")
+    if table_info:
+        payload = {
+            "description": _normalize(table_info.get("description", "")),
+            "fields": [
+                {key: _normalize(value) for key, value in field.items()}
+                for field in table_info.get("fields", [])
+            ]
+        }
+        source = "fields:" + json.dumps(payload, sort_keys=True, ensure_ascii=False)
+    else:
+        source = "content:" + _normalize(parsed.get("content", ""))
+    return hashlib.sha256(f"{parse_mode}|{source}".encode('utf-8')).hexdigest()
+
+
+def field_signatures(fields: List[Dict]) -> Dict[str, str]:
+    """Firma compacta por nombre de campo para detectar altas, bajas y cambios"""
+    signatures = {}
+    for field in fields:
+        name = field.get("name")
+        if not name:
+            continue
+        attributes = {key: _normalize(value) for key, value in field.items() if key != "name"}
+        signatures[name] = json.dumps(attributes, sort_keys=True, ensure_ascii=False)
+    return signatures
+
+
+class ChangeTracker:
+    """Hash de contenido y firma de campos de cada tabla, persistidos entre ejecuciones en SQLite"""
+
+    def __init__(self, path: str):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.conn = sqlite3.connect(path)
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS tables ("
+            "name TEXT PRIMARY KEY, content_hash TEXT NOT NULL, fields TEXT NOT NULL, updated_at TEXT NOT NULL)"
+        )
+        self.conn.commit()
+        self.changes: Dict[str, Dict] = {}
+
+    def is_unchanged(self, table_name: str, digest: str) -> bool:
+        row = self.conn.execute("SELECT content_hash FROM tables WHERE name = ?", (table_name,)).fetchone()
+        return row is not None and row[0] == digest
+
+    def commit(self, table_name: str, digest: str, fields: List[Dict]):
+        """Guarda el nuevo estado de la tabla y anota en el changelog qué campos cambiaron"""
+        row = self.conn.execute("SELECT content_hash, fields FROM tables WHERE name = ?", (table_name,)).fetchone()
+        if row is not None and row[0] == digest:
+            # Reprocesada sin cambios (p. ej. con --force): no va al changelog
+            self.conn.execute(
+                "UPDATE tables SET updated_at = ? WHERE name = ?", (datetime.utcnow().isoformat(), table_name)
+            )
+            self.conn.commit()
+            return
+
+        current = field_signatures(fields)
+        if row is None:
+            self.changes[table_name] = {"status": "new", "fields": len(current)}
+        else:
+            previous = json.loads(row[1])
+            entry = {
+                "added": sorted(set(current) - set(previous)),
+                "removed": sorted(set(previous) - set(current)),
+                "changed": sorted(name for name in set(current) & set(previous) if current[name] != previous[name])
+            }
+            entry = {key: value for key, value in entry.items() if value}
+            # El hash también cambia por la descripción o el orden de los campos
+            self.changes[table_name] = {"status": "changed", **entry}
+
+        self.conn.execute(
+            "INSERT OR REPLACE INTO tables (name, content_hash, fields, updated_at) VALUES (?, ?, ?, ?)",
+            (table_name, digest, json.dumps(current, ensure_ascii=False), datetime.utcnow().isoformat())
+        )
+        self.conn.commit()
+
+    def write_changelog(self, directory: str) -> Optional[str]:
+        """Escribe el changelog de la ejecución (solo si hubo cambios) y devuelve su ruta"""
+        if not self.changes:
+            logger.info("Sin cambios respecto de la ejecución anterior")
+            return None
+        os.makedirs(directory, exist_ok=True)
+        timestamp = datetime.utcnow().strftime('%Y%m%dT%H%M%S')
+        path = os.path.join(directory, f"changelog-{timestamp}.json")
+        new = sum(1 for entry in self.changes.values() if entry["status"] == "new")
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({
+                "generated_at": datetime.utcnow().isoformat(),
+                "new_tables": new,
+                "changed_tables": len(self.changes) - new,
+                "tables": self.changes
+            }, f, indent=2, ensure_ascii=False)
+        logger.info(f"Changelog: {new} tablas nuevas, {len(self.changes) - new} modificadas ({path})")
+        return path
+
+    def close(self):
+        self.conn.close()
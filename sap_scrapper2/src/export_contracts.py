@@ -0,0 +1,71 @@
+import os
+import json
+import logging
+import argparse
+
+from packed_store import PackedContractStore
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+
+def contract_relpath(key: str) -> str:
+    """
+    Ruta relativa del archivo de un contrato a partir de su clave. Normaliza las claves antiguas
+    con namespace vacío (/_1BEA_...) y rechaza las que saldrían del directorio de salida.
+    """
+    parts = [part for part in key.replace('\\', '/').split('/') if part not in ('', '.')]
+    if not parts or '..' in parts:
+        raise ValueError(f"Clave de contrato no válida: {key!r}")
+    return os.path.join(*parts) + '.json'
+
+
+def export_contracts(packed_path: str, output_dir: str) -> int:
+    """Exporta el almacén empaquetado a un JSON legible por tabla (contracts/<namespace>/<tabla>.json)"""
+    store = PackedContractStore(packed_path)
+    exported = 0
+    created_dirs = set()
+    try:
+        # Lectura secuencial: solo la versión vigente de cada contrato
+        for key, contract in store.items():
+            try:
+                filename = os.path.join(output_dir, contract_relpath(key))
+            except ValueError as err:
+                logger.warning(f"{err}, se omite")
+                continue
+            directory = os.path.dirname(filename)
+            if directory not in created_dirs:
+                os.makedirs(directory, exist_ok=True)
+                created_dirs.add(directory)
+            with open(filename, 'w', encoding='utf-8') as f:
+                json.dump(contract, f, indent=2, ensure_ascii=False)
+            exported += 1
+    finally:
+        store.close()
+    logger.info(f"{exported} contratos exportados a {output_dir}")
+    return exported
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Exporta el almacén de contratos empaquetado a archivos JSON')
+    parser.add_argument('--packed', default=os.getenv('CONTRACT_PACKED_PATH', 'contracts/contracts.jsonl'),
+                        help='Archivo empaquetado de contratos')
+    parser.add_argument('--output', default='contracts', help='Directorio de salida')
+    parser.add_argument('--compact', action='store_true',
+                        help='Reescribe el almacén solo con la versión vigente de cada contrato')
+    args = parser.parse_args()
+
+    if args.compact:
+        store = PackedContractStore(args.packed)
+        try:
+            store.compact()
+            logger.info(f"Almacén compactado: {len(store)} contratos")
+        finally:
+            store.close()
+        return
+
+    export_contracts(args.packed, args.output)
+
+
+if __name__ == "__main__":
+    main()
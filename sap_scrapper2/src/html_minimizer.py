@@ -0,0 +1,69 @@
+import os
+import re
+from typing import Dict, Tuple
+from bs4 import BeautifulSoup, NavigableString
+
+# Elementos que no aportan nada a la interpretación de la tabla
+NOISE_TAGS = ["script", "style", "noscript", "iframe", "ins", "svg", "select",
+              "nav", "header", "footer", "form", "link", "meta", "img"]
+
+MAX_INPUT_CHARS = int(os.getenv('LLM_MAX_INPUT_CHARS', 100000))
+
+
+def estimate_tokens(text: str) -> int:
+    """Estimación aproximada de tokens (~4 caracteres por token)"""
+    return (len(text) + 3) // 4
+
+
+def _table_to_tsv(table) -> str:
+    """Convierte una tabla HTML en filas separadas por tabuladores"""
+    rows = []
+    for row in table.select("tr"):
+        cells = [re.sub(r'\s+', ' ', cell.get_text(" ")).strip() for cell in row.select("th, td")]
+        if any(cells):
+            rows.append("\t".join(cells))
+    return "\n".join(rows)
+
+
+def minimize_html(html: str, max_chars: int = MAX_INPUT_CHARS) -> Tuple[str, Dict]:
+    """
+    Reduce una página de sapdatasheet a la tarjeta de contenido y su tabla de campos
+    en texto compacto (tablas en TSV). Devuelve el texto y estadísticas de ahorro.
+    """
+    return minimize_soup(BeautifulSoup(html, 'lxml'), len(html), max_chars)
+
+
+def minimize_soup(soup: BeautifulSoup, original_chars: int, max_chars: int = MAX_INPUT_CHARS) -> Tuple[str, Dict]:
+    """Igual que minimize_html sobre una página ya parseada (el soup se modifica)"""
+    for tag in soup(NOISE_TAGS):
+        tag.decompose()
+
+    header = soup.select_one(".sapds-card-header")
+    root = header.find_parent(class_="card") if header else None
+    if root is None:
+        root = soup.body or soup
+
+    for table in root.select("table"):
+        table.replace_with(NavigableString(f"\n{_table_to_tsv(table)}\n"))
+
+    lines = []
+    for line in root.get_text("\n").split("\n"):
+        line = re.sub(r'[  ]+', ' ', line).strip(' ')
+        if line.strip():
+            lines.append(line)
+    content = "\n".join(lines)
+
+    if max_chars and len(content) > max_chars:
+        content = content[:max_chars] + "\n[contenido truncado]"
+
+    original_tokens = (original_chars + 3) // 4
+    minimized_tokens = estimate_tokens(content)
+    stats = {
+        "original_chars": original_chars,
+        "minimized_chars": len(content),
+        "original_tokens": original_tokens,
+        "minimized_tokens": minimized_tokens,
+        "saved_tokens": original_tokens - minimized_tokens,
+        "reduction_pct": round(100 * (1 - minimized_tokens / original_tokens), 1) if original_tokens else 0.0
+    }
+    return content, stats
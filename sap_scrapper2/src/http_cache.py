@@ -0,0 +1,93 @@
+import os
+import sqlite3
+import time
+import logging
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class HTTPCache:
+    """Caché persistente de respuestas HTTP con validación condicional (ETag / Last-Modified)"""
+
+    def __init__(self, path: str, max_bytes: int):
+        self.path = path
+        self.max_bytes = max_bytes
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS responses (
+                url TEXT PRIMARY KEY,
+                body BLOB NOT NULL,
+                etag TEXT,
+                last_modified TEXT,
+                size INTEGER NOT NULL,
+                last_access REAL NOT NULL
+            )
+        """)
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_last_access ON responses (last_access)")
+        self.conn.commit()
+        self.total_bytes = self.conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+
+    def get(self, url: str) -> Optional[Dict]:
+        """Devuelve la entrada cacheada de una URL o None"""
+        row = self.conn.execute(
+            "SELECT body, etag, last_modified FROM responses WHERE url = ?", (url,)
+        ).fetchone()
+        if not row:
+            return None
+        return {"body": row[0], "etag": row[1], "last_modified": row[2]}
+
+    def conditional_headers(self, entry: Optional[Dict]) -> Dict[str, str]:
+        """Construye las cabeceras If-None-Match / If-Modified-Since de una entrada"""
+        headers = {}
+        if entry:
+            if entry.get("etag"):
+                headers["If-None-Match"] = entry["etag"]
+            if entry.get("last_modified"):
+                headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    def touch(self, url: str):
+        """Marca la entrada como usada recientemente (LRU)"""
+        self.conn.execute("UPDATE responses SET last_access = ? WHERE url = ?", (time.time(), url))
+        self.conn.commit()
+
+    def store(self, url: str, body: bytes, headers) -> None:
+        """Guarda una respuesta si trae validadores con los que revalidarla después"""
+        etag = headers.get("ETag")
+        last_modified = headers.get("Last-Modified")
+        if not etag and not last_modified:
+            return
+        if len(body) > self.max_bytes:
+            return
+        previous = self.conn.execute("SELECT size FROM responses WHERE url = ?", (url,)).fetchone()
+        if previous:
+            self.total_bytes -= previous[0]
+        self.conn.execute(
+            "INSERT OR REPLACE INTO responses (url, body, etag, last_modified, size, last_access) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            (url, body, etag, last_modified, len(body), time.time())
+        )
+        self.total_bytes += len(body)
+        self._evict()
+        self.conn.commit()
+
+    def _evict(self):
+        """Elimina las entradas menos usadas hasta quedar bajo el límite de tamaño"""
+        if self.total_bytes <= self.max_bytes:
+            return
+        evicted = 0
+        cursor = self.conn.execute("SELECT url, size FROM responses ORDER BY last_access ASC")
+        for url, size in cursor.fetchall():
+            if self.total_bytes <= self.max_bytes:
+                break
+            self.conn.execute("DELETE FROM responses WHERE url = ?", (url,))
+            self.total_bytes -= size
+            evicted += 1
+        logger.debug(f"Caché HTTP: {evicted} entradas desalojadas")
+
+    def close(self):
+        self.conn.close()
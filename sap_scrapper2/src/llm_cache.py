@@ -0,0 +1,86 @@
+import os
+import re
+import json
+import time
+import hashlib
+import sqlite3
+import logging
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class LLMCache:
+    """Caché persistente de respuestas del LLM direccionada por contenido"""
+
+    def __init__(self, path: str, ttl_seconds: float, max_entries: int):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS completions (
+                key TEXT PRIMARY KEY,
+                response TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                last_access REAL NOT NULL
+            )
+        """)
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_completions_access ON completions (last_access)")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_completions_created ON completions (created_at)")
+        self.conn.commit()
+
+    @staticmethod
+    def make_key(model_name: str, prompt_version: str, prompt: str) -> str:
+        """Hash del modelo, versión del prompt y entrada normalizada"""
+        normalized = re.sub(r'\s+', ' ', prompt).strip()
+        digest = hashlib.sha256()
+        for part in (model_name, prompt_version, normalized):
+            digest.update(part.encode('utf-8'))
+            digest.update(b'\0')
+        return digest.hexdigest()
+
+    def get(self, key: str) -> Optional[Dict]:
+        """Devuelve la respuesta cacheada si existe y no ha expirado"""
+        row = self.conn.execute(
+            "SELECT response, created_at FROM completions WHERE key = ?", (key,)
+        ).fetchone()
+        if not row:
+            return None
+        now = time.time()
+        if self.ttl_seconds and now - row[1] > self.ttl_seconds:
+            self.conn.execute("DELETE FROM completions WHERE key = ?", (key,))
+            self.conn.commit()
+            return None
+        self.conn.execute("UPDATE completions SET last_access = ? WHERE key = ?", (now, key))
+        self.conn.commit()
+        return json.loads(row[0])
+
+    def set(self, key: str, response: Dict):
+        """Guarda una respuesta ya parseada como JSON"""
+        now = time.time()
+        self.conn.execute(
+            "INSERT OR REPLACE INTO completions (key, response, created_at, last_access) VALUES (?, ?, ?, ?)",
+            (key, json.dumps(response, ensure_ascii=False), now, now)
+        )
+        self._evict(now)
+        self.conn.commit()
+
+    def _evict(self, now: float):
+        """Elimina entradas expiradas y las menos usadas si se supera el máximo"""
+        if self.ttl_seconds:
+            self.conn.execute("DELETE FROM completions WHERE created_at < ?", (now - self.ttl_seconds,))
+        count = self.conn.execute("SELECT COUNT(*) FROM completions").fetchone()[0]
+        if count > self.max_entries:
+            self.conn.execute(
+                "DELETE FROM completions WHERE key IN "
+                "(SELECT key FROM completions ORDER BY last_access ASC LIMIT ?)",
+                (count - self.max_entries,)
+            )
+            logger.debug(f"Caché LLM: {count - self.max_entries} entradas desalojadas")
+
+    def close(self):
+        self.conn.close()
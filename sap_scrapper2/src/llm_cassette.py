@@ -0,0 +1,150 @@
+import os
+import re
+import json
+import time
+import asyncio
+import hashlib
+import logging
+import threading
+from types import SimpleNamespace
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+RECORD = 'record'
+REPLAY = 'replay'
+
+
+class CassetteMiss(Exception):
+    """El prompt no está grabado en el cassette"""
+
+
+class CassetteResponse:
+    """Respuesta con la misma forma que la de GenerativeModel (text y usage_metadata)"""
+
+    def __init__(self, text: str, prompt_tokens: Optional[int] = None, completion_tokens: Optional[int] = None):
+        self.text = text
+        self.usage_metadata = SimpleNamespace(
+            prompt_token_count=prompt_tokens, candidates_token_count=completion_tokens
+        )
+
+
+class LLMCassette:
+    """
+    Envuelve el modelo del agente. En modo record llama al modelo real y graba cada prompt,
+    respuesta y latencia en un JSONL; en modo replay sirve las respuestas del archivo sin red,
+    esperando la latencia grabada multiplicada por time_scale (0 = sin espera).
+    """
+
+    def __init__(self, path: str, mode: str, model=None, model_name: str = '', time_scale: float = 1.0):
+        if mode not in (RECORD, REPLAY):
+            raise ValueError(f"LLM_CASSETTE_MODE no soportado: {mode}")
+        if mode == RECORD and model is None:
+            raise ValueError("El modo record necesita el modelo real")
+        self.path = path
+        self.mode = mode
+        self.model = model
+        self.model_name = model_name
+        self.time_scale = time_scale
+        self._lock = threading.Lock()
+        # Un prompt puede grabarse varias veces: se reproducen en orden y se repite la última
+        self._entries: Dict[str, List[Dict]] = {}
+        self._positions: Dict[str, int] = {}
+
+        if mode == REPLAY:
+            self._load()
+        else:
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            logger.info(f"Grabando llamadas al LLM en {path}")
+
+    @staticmethod
+    def make_key(prompt: str) -> str:
+        """Hash del prompt normalizado (los cambios de espacios no invalidan la grabación)"""
+        normalized = re.sub(r'\s+', ' ', prompt).strip()
+        return hashlib.sha256(normalized.encode('utf-8')).hexdigest()
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            raise FileNotFoundError(f"Cassette no encontrado: {self.path}")
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for number, line in enumerate(f, 1):
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    # Una grabación interrumpida deja la última línea incompleta
+                    logger.warning(f"Línea {number} del cassette ilegible, se ignora")
+                    continue
+                self._entries.setdefault(entry["key"], []).append(entry)
+        logger.info(f"Cassette cargado: {sum(len(e) for e in self._entries.values())} respuestas de {self.path}")
+
+    def _next_entry(self, prompt: str) -> Dict:
+        key = self.make_key(prompt)
+        entries = self._entries.get(key)
+        if not entries:
+            raise CassetteMiss(f"prompt {key[:12]} no grabado en {self.path}")
+        with self._lock:
+            position = self._positions.get(key, 0)
+            self._positions[key] = position + 1
+        return entries[min(position, len(entries) - 1)]
+
+    def _replay_response(self, entry: Dict) -> CassetteResponse:
+        if entry.get("error"):
+            raise RuntimeError(f"(grabado) {entry['error']}")
+        return CassetteResponse(entry["response"], entry.get("prompt_tokens"), entry.get("completion_tokens"))
+
+    def _write(self, prompt: str, started: float, response=None, error: Optional[Exception] = None):
+        entry = {
+            "key": self.make_key(prompt),
+            "model": self.model_name,
+            "latency": round(time.perf_counter() - started, 4),
+            "prompt": prompt,
+        }
+        if error is not None:
+            entry["error"] = f"{type(error).__name__}: {error}"
+        else:
+            usage = getattr(response, 'usage_metadata', None)
+            entry["response"] = response.text
+            entry["prompt_tokens"] = getattr(usage, 'prompt_token_count', None)
+            entry["completion_tokens"] = getattr(usage, 'candidates_token_count', None)
+        line = json.dumps(entry, ensure_ascii=False) + "\n"
+        # Se abre en cada escritura: frente a la latencia del LLM no pesa y una interrupción no pierde líneas
+        with self._lock, open(self.path, 'a', encoding='utf-8') as f:
+            f.write(line)
+
+    def generate_content(self, prompt: str):
+        if self.mode == REPLAY:
+            entry = self._next_entry(prompt)
+            time.sleep(entry["latency"] * self.time_scale)
+            return self._replay_response(entry)
+
+        started = time.perf_counter()
+        try:
+            response = self.model.generate_content(prompt)
+            # Acceder a text aquí: las respuestas bloqueadas fallan al leerlo
+            response.text
+        except Exception as e:
+            self._write(prompt, started, error=e)
+            raise
+        self._write(prompt, started, response)
+        return response
+
+    async def generate_content_async(self, prompt: str):
+        if self.mode == REPLAY:
+            entry = self._next_entry(prompt)
+            await asyncio.sleep(entry["latency"] * self.time_scale)
+            return self._replay_response(entry)
+
+        started = time.perf_counter()
+        try:
+            if hasattr(self.model, 'generate_content_async'):
+                response = await self.model.generate_content_async(prompt)
+            else:
+                response = await asyncio.to_thread(self.model.generate_content, prompt)
+            response.text
+        except Exception as e:
+            self._write(prompt, started, error=e)
+            raise
+        self._write(prompt, started, response)
+        return response
@@ -0,0 +1,79 @@
+import os
+import json
+import logging
+from datetime import datetime
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+PENDING = 'pending'
+FETCHED = 'fetched'
+INTERPRETED = 'interpreted'
+SAVED = 'saved'
+UNCHANGED = 'unchanged'
+FAILED = 'failed'
+
+
+class RunManifest:
+    """
+    Manifiesto append-only (JSONL) con el estado de cada tabla de una ejecución.
+    Cada cambio de estado se escribe en una línea para que sobreviva a una interrupción.
+    """
+
+    def __init__(self, path: str, resume: bool = False):
+        self.path = path
+        self.states: Dict[str, Dict] = {}
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        if resume:
+            self._load()
+            done = sum(1 for entry in self.states.values() if entry["state"] in (SAVED, UNCHANGED))
+            failed = sum(1 for entry in self.states.values() if entry["state"] == FAILED)
+            logger.info(f"Reanudando ejecución: {done} tablas completadas, {failed} fallidas a reintentar")
+
+        # Sin --resume se empieza un manifiesto nuevo
+        self._file = open(path, 'a' if resume else 'w', encoding='utf-8')
+        if resume and self._file.tell() > 0 and not self._ends_with_newline():
+            self._file.write("\n")
+
+    def _ends_with_newline(self) -> bool:
+        with open(self.path, 'rb') as f:
+            f.seek(-1, os.SEEK_END)
+            return f.read(1) == b"\n"
+
+    def _load(self):
+        """Reconstruye el último estado de cada tabla a partir del archivo"""
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    # Línea incompleta por una interrupción a mitad de escritura
+                    continue
+                self.states[entry["table"]] = entry
+
+    def record(self, table_name: str, state: str, error: Optional[str] = None):
+        """Registra un cambio de estado de una tabla"""
+        entry = {"table": table_name, "state": state, "ts": datetime.utcnow().isoformat()}
+        if error:
+            entry["error"] = error
+        self.states[table_name] = entry
+        self._file.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        self._file.flush()
+
+    def is_done(self, table_name: str) -> bool:
+        entry = self.states.get(table_name)
+        return bool(entry) and entry["state"] in (SAVED, UNCHANGED)
+
+    def summary(self) -> Dict[str, int]:
+        counts: Dict[str, int] = {}
+        for entry in self.states.values():
+            counts[entry["state"]] = counts.get(entry["state"], 0) + 1
+        return counts
+
+    def close(self):
+        self._file.close()
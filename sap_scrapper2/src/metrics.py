@@ -0,0 +1,57 @@
+import os
+import logging
+from typing import Optional
+
+from prometheus_client import Counter, Gauge, Histogram, REGISTRY, start_http_server, write_to_textfile
+
+logger = logging.getLogger(__name__)
+
+HTTP_FETCH_SECONDS = Histogram(
+    'scraper_http_fetch_seconds', 'Latencia de las descargas HTTP', ['mode']
+)
+HTTP_RESPONSES = Counter(
+    'scraper_http_responses_total', 'Respuestas HTTP por código (error = excepción de red)', ['status']
+)
+PARSE_SECONDS = Histogram(
+    'scraper_parse_seconds', 'Tiempo de parseo de páginas (incluye la espera del pool de procesos)', ['parser']
+)
+QUEUE_DEPTH = Gauge(
+    'scraper_queue_depth', 'Items pendientes en cada cola del pipeline', ['queue']
+)
+TABLES_TOTAL = Counter(
+    'scraper_tables_total', 'Tablas procesadas por resultado', ['result']
+)
+LLM_CALL_SECONDS = Histogram(
+    'scraper_llm_call_seconds', 'Latencia de las llamadas al LLM', ['mode'],
+    buckets=(0.5, 1, 2, 5, 10, 20, 30, 60, 120)
+)
+LLM_TOKENS = Counter(
+    'scraper_llm_tokens_total', 'Tokens enviados y recibidos del LLM', ['direction']
+)
+LLM_CACHE_HITS = Counter(
+    'scraper_llm_cache_hits_total', 'Respuestas del LLM servidas desde la caché'
+)
+LLM_ERRORS = Counter(
+    'scraper_llm_errors_total', 'Llamadas al LLM fallidas', ['kind']
+)
+
+
+def start_metrics_server() -> Optional[int]:
+    """Expone /metrics en METRICS_PORT si está definido"""
+    port = int(os.getenv('METRICS_PORT', 0))
+    if port:
+        start_http_server(port)
+        logger.info(f"Métricas disponibles en http://0.0.0.0:{port}/metrics")
+        return port
+    return None
+
+
+def dump_metrics_textfile():
+    """Escribe las métricas en METRICS_TEXTFILE (formato textfile de node_exporter) si está definido"""
+    path = os.getenv('METRICS_TEXTFILE')
+    if path:
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        write_to_textfile(path, REGISTRY)
+        logger.info(f"Métricas escritas en {path}")
@@ -0,0 +1,207 @@
+# Mismo archivo en sap_scrapper2/src/packed_store.py y sap_scrapper/src/contracts/packed_store.py:
+# cada proyecto se construye con su propio directorio como contexto de Docker y no puede importar
+# el del otro. sap_scrapper2/tests/test_packed_store.py comprueba que las dos copias sigan iguales.
+import os
+import json
+import mmap
+import logging
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:  # Windows: sin bloqueo entre procesos, solo debe escribir uno a la vez
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+
+class PackedContractStore:
+    """
+    Almacén append-only de contratos: un archivo de datos con una línea `clave\\tjson` por versión
+    y un índice `clave\\toffset\\tlongitud` para leer cualquier contrato con un solo acceso vía mmap.
+    La última versión escrita de cada clave es la vigente.
+
+    Varios procesos pueden usar el mismo almacén (por ejemplo la API y el orquestador): cada escritura
+    toma un bloqueo exclusivo sobre `<archivo>.lock` y antes de añadir incorpora al índice en memoria
+    las entradas que hayan escrito los demás.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.index_path = f"{path}.idx"
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._lock_file = open(f"{path}.lock", 'a')
+        self._mmap: Optional[mmap.mmap] = None
+        with self._locked():
+            self._open()
+            self._sync_index(repair=True)
+            self._recover_tail()
+
+    @contextmanager
+    def _locked(self):
+        if fcntl is None:
+            yield
+            return
+        fcntl.flock(self._lock_file.fileno(), fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(self._lock_file.fileno(), fcntl.LOCK_UN)
+
+    def _open(self):
+        self.index: Dict[str, Tuple[int, int]] = {}
+        # Bytes del índice ya incorporados a self.index
+        self._index_pos = 0
+        self._data = open(self.path, 'ab+')
+        self._index_file = open(self.index_path, 'ab+')
+
+    def _close_files(self):
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap = None
+        if not self._data.closed:
+            self._data.close()
+        if not self._index_file.closed:
+            self._index_file.close()
+
+    def _replaced(self) -> bool:
+        """True si otro proceso compactó el almacén y los descriptores apuntan a los archivos viejos"""
+        try:
+            return os.stat(self.path).st_ino != os.fstat(self._data.fileno()).st_ino
+        except FileNotFoundError:
+            return False
+
+    def _sync_index(self, repair: bool = False):
+        """
+        Incorpora las entradas del índice escritas desde la última lectura. Con repair (solo bajo el
+        bloqueo) una línea a medias es de un escritor interrumpido y se recorta, para que la siguiente
+        entrada no quede pegada a ella.
+        """
+        if self._replaced():
+            self._close_files()
+            self._open()
+        self._index_file.seek(self._index_pos)
+        for line in self._index_file:
+            if not line.endswith(b'\n'):
+                if repair:
+                    self._index_file.truncate(self._index_pos)
+                    logger.warning(f"Entrada incompleta descartada en {self.index_path} (offset {self._index_pos})")
+                break
+            parts = line.decode('utf-8').rstrip('\n').split('\t')
+            if len(parts) == 3:
+                self.index[parts[0]] = (int(parts[1]), int(parts[2]))
+            self._index_pos += len(line)
+
+    def _indexed_end(self) -> int:
+        return max((offset + length for offset, length in self.index.values()), default=0)
+
+    def _recover_tail(self):
+        """Indexa los registros escritos tras la última entrada del índice y descarta una línea a medias"""
+        size = os.path.getsize(self.path)
+        start = self._indexed_end()
+        if start >= size:
+            return
+        self._data.seek(start)
+        offset = start
+        recovered = 0
+        for line in self._data:
+            if not line.endswith(b'\n'):
+                self._data.truncate(offset)
+                logger.warning(f"Registro incompleto descartado en {self.path} (offset {offset})")
+                break
+            key = line.split(b'\t', 1)[0].decode('utf-8')
+            self._add_to_index(key, offset, len(line))
+            offset += len(line)
+            recovered += 1
+        self._index_file.flush()
+        if recovered:
+            logger.info(f"Índice de {self.path} reconstruido con {recovered} registros")
+
+    def _add_to_index(self, key: str, offset: int, length: int):
+        # Solo bajo el bloqueo y tras _sync_index: el índice termina justo en self._index_pos
+        entry = f"{key}\t{offset}\t{length}\n".encode('utf-8')
+        self._index_file.write(entry)
+        self._index_pos += len(entry)
+        self.index[key] = (offset, length)
+
+    def put(self, key: str, contract: Dict):
+        """Añade una nueva versión del contrato al final del archivo"""
+        record = f"{key}\t{json.dumps(contract, ensure_ascii=False, separators=(',', ':'))}\n".encode('utf-8')
+        with self._locked():
+            self._sync_index(repair=True)
+            self._data.seek(0, os.SEEK_END)
+            offset = self._data.tell()
+            self._data.write(record)
+            self._data.flush()
+            self._add_to_index(key, offset, len(record))
+            self._index_file.flush()
+
+    def _view(self, end: int) -> mmap.mmap:
+        # El archivo crece con cada escritura: se vuelve a mapear solo si el registro queda fuera
+        if self._mmap is None or len(self._mmap) < end:
+            if self._mmap is not None:
+                self._mmap.close()
+            self._mmap = mmap.mmap(self._data.fileno(), 0, access=mmap.ACCESS_READ)
+        return self._mmap
+
+    @staticmethod
+    def _decode(record: bytes) -> Dict:
+        return json.loads(record.split(b'\t', 1)[1])
+
+    def get(self, key: str) -> Optional[Dict]:
+        """Lee la versión vigente de un contrato con un acceso directo a su offset"""
+        self._sync_index()
+        location = self.index.get(key)
+        if location is None:
+            return None
+        offset, length = location
+        view = self._view(offset + length)
+        return self._decode(view[offset:offset + length])
+
+    def __contains__(self, key: str) -> bool:
+        self._sync_index()
+        return key in self.index
+
+    def __len__(self) -> int:
+        self._sync_index()
+        return len(self.index)
+
+    def keys(self) -> List[str]:
+        self._sync_index()
+        return list(self.index)
+
+    def items(self) -> Iterator[Tuple[str, Dict]]:
+        """Recorre el archivo secuencialmente devolviendo solo la versión vigente de cada clave"""
+        self._sync_index()
+        offset = 0
+        with open(self.path, 'rb') as f:
+            for line in f:
+                key = line.split(b'\t', 1)[0].decode('utf-8')
+                if self.index.get(key, (None,))[0] == offset:
+                    yield key, self._decode(line)
+                offset += len(line)
+
+    def compact(self):
+        """Reescribe el almacén solo con las versiones vigentes"""
+        tmp_path = f"{self.path}.tmp"
+        tmp_index = f"{self.index_path}.tmp"
+        with self._locked():
+            self._sync_index(repair=True)
+            with open(tmp_path, 'wb') as data, open(tmp_index, 'wb') as idx:
+                offset = 0
+                for key, (start, length) in sorted(self.index.items(), key=lambda item: item[1][0]):
+                    record = self._view(start + length)[start:start + length]
+                    data.write(record)
+                    idx.write(f"{key}\t{offset}\t{length}\n".encode('utf-8'))
+                    offset += length
+            self._close_files()
+            os.replace(tmp_path, self.path)
+            os.replace(tmp_index, self.index_path)
+            self._open()
+            self._sync_index()
+
+    def close(self):
+        self._close_files()
+        if not self._lock_file.closed:
+            self._lock_file.close()
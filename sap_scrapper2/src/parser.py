@@ -1,18 +1,26 @@
-from typing import Dict, List
+from typing import Dict, List, Union
+from urllib.parse import urljoin
 from bs4 import BeautifulSoup
 import logging
+import re
+
+from html_minimizer import minimize_soup
 
 logger = logging.getLogger(__name__)
 
+# Páginas del índice: index-a.html, index-slash-3.html, ...
+INDEX_PAGE_PATTERN = re.compile(r'(^|/)index-[a-z0-9_]+(-\d+)?\.html$', re.IGNORECASE)
+
 def parse_table_data(soup: BeautifulSoup) -> Dict:
     """
     Parsea el HTML de una tabla SAP y extrae la información relevante
     """
     try:
         # Obtener información básica de la tabla
+        description_elem = soup.select_one(".sapds-card-body p")
         table_info = {
             "name": soup.select_one(".sapds-card-header").text.strip(),
-            "description": soup.select_one(".sapds-card-body p").text.strip(),
+            "description": description_elem.text.strip() if description_elem else "",
             "fields": []
         }
 
@@ -48,4 +56,60 @@ def parse_table_data(soup: BeautifulSoup) -> Dict:
         return table_info
     except Exception as e:
         logger.error(f"Error parseando tabla: {e}")
-        return {} 
\ No newline at end of file
+        return {}
+
+
+def is_usable(table_info: Dict) -> bool:
+    """Indica si el resultado del parser puede usarse sin pasar por el LLM"""
+    if not table_info or not table_info.get("fields"):
+        return False
+    return table_info.get("_metadata", {}).get("is_complete", False)
+
+
+def parse_detail_page(raw: Union[bytes, str], parse_mode: str) -> Dict:
+    """
+    Parsea la página de detalle de una tabla y devuelve un diccionario compacto:
+    categoría, resultado del parser y, si hace falta el LLM, la página minimizada.
+    Es una función de módulo para poder ejecutarse en un ProcessPoolExecutor.
+    """
+    soup = BeautifulSoup(raw, 'lxml')
+    category_elem = soup.select_one(".table-category")
+    result = {
+        "category": category_elem.text.strip() if category_elem else "Unknown",
+        "table_info": {}
+    }
+
+    if parse_mode != 'llm':
+        table_info = parse_table_data(soup)
+        if parse_mode == 'parser' or is_usable(table_info):
+            result["table_info"] = table_info
+
+    if not result["table_info"] and parse_mode != 'parser':
+        result["content"], result["stats"] = minimize_soup(soup, len(raw))
+    return result
+
+
+def parse_index_page(raw: Union[bytes, str], page_url: str) -> Dict:
+    """Extrae las tablas listadas en una página de índice y los enlaces a otros índices"""
+    soup = BeautifulSoup(raw, 'lxml')
+    tables = []
+    for row in soup.select("table.table tr")[2:]:  # Saltamos los encabezados
+        cols = row.select("td")
+        if len(cols) >= 3:
+            table_link = cols[1].select_one("a")
+            if table_link:
+                # Construir la URL absoluta respecto de la página de índice
+                tables.append({
+                    "name": table_link.text.strip(),
+                    "url": urljoin(page_url, table_link.get("href", "")),
+                    "description": cols[2].text.strip()
+                })
+
+    # Enlaces a otros índices (A-Z, CLUSTER, POOL, SLASH) y a sus páginas
+    links = []
+    for link in soup.select("a[href]"):
+        href = link.get("href", "")
+        if INDEX_PAGE_PATTERN.search(href):
+            links.append(urljoin(page_url, href))
+
+    return {"tables": tables, "links": links}
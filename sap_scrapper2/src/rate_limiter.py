@@ -0,0 +1,57 @@
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from typing import Dict
+from urllib.parse import urlparse
+
+
+class TokenBucket:
+    """Token bucket asíncrono: entrega `rate` tokens por segundo con ráfagas de hasta `capacity`"""
+
+    def __init__(self, rate: float, capacity: float = 1.0):
+        self.rate = rate
+        self.capacity = max(capacity, 1.0)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        # El lock garantiza que los que esperan se atiendan en orden de llegada
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def acquire(self):
+        """Espera hasta que haya un token disponible y lo consume"""
+        if self.rate <= 0:
+            return
+        async with self._lock:
+            self._refill()
+            while self.tokens < 1:
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+                self._refill()
+            self.tokens -= 1
+
+
+class RateLimiter:
+    """Limita las peticiones en vuelo y su ritmo por host"""
+
+    def __init__(self, max_concurrency: int, requests_per_second: float, burst: float = 1.0):
+        self.max_concurrency = max_concurrency
+        self.requests_per_second = requests_per_second
+        self.burst = burst
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._buckets: Dict[str, TokenBucket] = {}
+
+    def _bucket_for(self, url: str) -> TokenBucket:
+        host = urlparse(url).netloc
+        if host not in self._buckets:
+            self._buckets[host] = TokenBucket(self.requests_per_second, self.burst)
+        return self._buckets[host]
+
+    @asynccontextmanager
+    async def limit(self, url: str):
+        """Reserva un slot de concurrencia y un token del host antes de ejecutar la petición"""
+        async with self._semaphore:
+            await self._bucket_for(url).acquire()
+            yield
@@ -3,18 +3,25 @@ import json
 import logging
 import time
 from datetime import datetime
-from typing import Dict, List, Optional, Set
+from typing import AsyncIterator, Dict, Iterable, List, Optional, Set
 import argparse
 import asyncio
 import aiohttp
+from concurrent.futures import ProcessPoolExecutor
 
 import requests
-from bs4 import BeautifulSoup
 from dotenv import load_dotenv
 
-from parser import parse_table_data
+from parser import parse_detail_page, parse_index_page
 from generator import generate_contract
-from agent import SAPAgent
+from agent import SAPAgent, LLMBatcher
+from rate_limiter import RateLimiter
+from http_cache import HTTPCache
+from manifest import RunManifest, PENDING, FETCHED, INTERPRETED, SAVED, FAILED, UNCHANGED
+from change_tracker import ChangeTracker, content_hash
+from metrics import (HTTP_FETCH_SECONDS, HTTP_RESPONSES, PARSE_SECONDS, QUEUE_DEPTH, TABLES_TOTAL,
+                     start_metrics_server, dump_metrics_textfile)
+from packed_store import PackedContractStore
 
 # Cargar variables de entorno
 load_dotenv()
@@ -27,42 +34,68 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+PARSE_MODES = ('hybrid', 'parser', 'llm')
+
+# Marca de fin de cola entre etapas del pipeline
+_STOP = object()
+
 class SAPTableScraper:
-    def __init__(self):
+    def __init__(self, parse_mode: Optional[str] = None):
         self.base_url = os.getenv('BASE_URL', 'https://www.sapdatasheet.org/abap/tabl/')
         self.delay = int(os.getenv('DELAY_BETWEEN_REQUESTS', 2))
         self.max_retries = int(os.getenv('MAX_RETRIES', 3))
+        self.max_concurrency = int(os.getenv('MAX_CONCURRENT_REQUESTS', 5))
+        # Procesos para parsear HTML fuera del event loop (0 = parseo en el mismo hilo)
+        self.parse_workers = int(os.getenv('PARSE_WORKERS', 0))
+        self.parse_pool: Optional[ProcessPoolExecutor] = None
+        # Por defecto se conserva el ritmo de DELAY_BETWEEN_REQUESTS, pero sin serializar las peticiones
+        default_rps = 1 / self.delay if self.delay > 0 else 0
+        self.requests_per_second = float(os.getenv('REQUESTS_PER_SECOND', default_rps))
+        self.rate_burst = float(os.getenv('RATE_LIMIT_BURST', 1))
         self.session = requests.Session()
-        self.agent = SAPAgent()
+        self.http_cache: Optional[HTTPCache] = None
+        if os.getenv('HTTP_CACHE_ENABLED', 'true').lower() == 'true':
+            self.http_cache = HTTPCache(
+                os.getenv('HTTP_CACHE_PATH', 'cache/http_cache.sqlite'),
+                int(os.getenv('HTTP_CACHE_MAX_MB', 500)) * 1024 * 1024
+            )
+        # hybrid: parser determinista y LLM solo si el parser falla o queda incompleto
+        self.parse_mode = parse_mode or os.getenv('PARSE_MODE', 'hybrid')
+        if self.parse_mode not in PARSE_MODES:
+            raise ValueError(f"PARSE_MODE inválido: {self.parse_mode}")
+        self.agent = SAPAgent() if self.parse_mode != 'parser' else None
+        # Lotes multi-tabla para páginas pequeñas (solo modo asíncrono)
+        self.llm_batch_enabled = os.getenv('LLM_BATCH_ENABLED', 'false').lower() == 'true'
+        self.llm_batch_token_budget = int(os.getenv('LLM_BATCH_TOKEN_BUDGET', 8000))
+        self.llm_batch_max_table_tokens = int(os.getenv('LLM_BATCH_MAX_TABLE_TOKENS', 1500))
+        self.llm_batch_max_wait = float(os.getenv('LLM_BATCH_MAX_WAIT', 2))
+        self.batcher: Optional[LLMBatcher] = None
+        # Pipeline asíncrono: tamaño de las colas entre etapas y workers de interpretación
+        self.pipeline_queue_size = int(os.getenv('PIPELINE_QUEUE_SIZE', 100))
+        self.interpret_workers = int(os.getenv('INTERPRET_WORKERS', 16))
+        self.manifest_path = os.getenv('MANIFEST_PATH', 'logs/manifest.jsonl')
+        self.manifest: Optional[RunManifest] = None
         self.tables_to_scrape: Optional[Set[str]] = None
+        # files: un JSON por tabla en contracts/<namespace>/; packed: un único archivo indexado
+        self.contract_storage = os.getenv('CONTRACT_STORAGE', 'files')
+        self.contract_packed_path = os.getenv('CONTRACT_PACKED_PATH', 'contracts/contracts.jsonl')
+        self.contract_store: Optional[PackedContractStore] = None
+        self._contract_template: Optional[Dict] = None
+        self._contract_dirs: Set[str] = set()
+        # Detección de cambios: las tablas con el mismo hash de contenido no se reinterpretan ni reescriben
+        self.change_tracking = os.getenv('CHANGE_TRACKING_ENABLED', 'true').lower() == 'true'
+        self.change_tracking_path = os.getenv('CHANGE_TRACKING_PATH', 'cache/content_hashes.sqlite')
+        self.changelog_dir = os.getenv('CHANGELOG_DIR', 'logs')
+        self.force = False
+        self.change_tracker: Optional[ChangeTracker] = None
 
     def get_table_list(self) -> List[Dict]:
         """Obtiene la lista de tablas SAP disponibles"""
         try:
             logger.info(f"Obteniendo lista de tablas desde {self.base_url}")
-            response = self.session.get(self.base_url)
-            response.raise_for_status()
-            soup = BeautifulSoup(response.text, 'lxml')
-            tables = []
-            
-            for row in soup.select("table.table tr")[2:]:  # Saltamos los encabezados
-                cols = row.select("td")
-                if len(cols) >= 3:
-                    table_link = cols[1].select_one("a")
-                    if table_link:
-                        href = table_link.get("href", "")
-                        # Corregir la construcción de la URL
-                        if href.startswith("/"):
-                            url = f"https://www.sapdatasheet.org{href}"
-                        else:
-                            url = href if href.startswith("http") else f"{self.base_url}{href}"
-                        
-                        table_name = table_link.text.strip()
-                        tables.append({
-                            "name": table_name,
-                            "url": url,
-                            "description": cols[2].text.strip()
-                        })
+            html = self.fetch_html(self.base_url)
+            with PARSE_SECONDS.labels('parse_index_page').time():
+                tables = parse_index_page(html, self.base_url)["tables"]
                         
             total_tables = len(tables)
             logger.info(f"Se encontraron {total_tables} tablas")
@@ -79,6 +112,62 @@ class SAPTableScraper:
             logger.exception(e)
             return []
 
+    async def iter_table_list_async(self, session: aiohttp.ClientSession, limiter: RateLimiter) -> AsyncIterator[Dict]:
+        """
+        Recorre el índice completo (A-Z, CLUSTER, POOL, SLASH y su paginación) descargando
+        las páginas en paralelo y entregando cada tabla en cuanto se parsea su página.
+        """
+        logger.info(f"Recorriendo índice de tablas desde {self.base_url}")
+        results: asyncio.Queue = asyncio.Queue()
+        seen_pages: Set[str] = set()
+        seen_tables: Set[str] = set()
+        tasks = set()
+
+        async def fetch_index(url: str):
+            try:
+                raw = await self.fetch_bytes_async(session, limiter, url)
+                index = await self.run_parser(parse_index_page, raw, url)
+                await results.put((url, index, None))
+            except Exception as e:
+                await results.put((url, None, e))
+
+        def schedule(url: str):
+            if url not in seen_pages:
+                seen_pages.add(url)
+                task = asyncio.create_task(fetch_index(url))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+
+        schedule(self.base_url)
+        pending = 1
+        yielded = 0
+        try:
+            while pending:
+                url, index, error = await results.get()
+                pending -= 1
+                if error:
+                    logger.error(f"Error obteniendo índice {url}: {error}")
+                    continue
+
+                before = len(seen_pages)
+                for page_url in index["links"]:
+                    schedule(page_url)
+                pending += len(seen_pages) - before
+
+                for table in index["tables"]:
+                    if table['name'] in seen_tables:
+                        continue
+                    seen_tables.add(table['name'])
+                    yield table
+                    yielded += 1
+                    if self.limit and yielded >= self.limit:
+                        logger.info(f"Limitando a {self.limit} tablas")
+                        return
+        finally:
+            for task in list(tasks):
+                task.cancel()
+            logger.info(f"Índice recorrido: {len(seen_pages)} páginas, {len(seen_tables)} tablas")
+
     def load_tables_to_scrape(self, filename: str = "tables_to_scrape.txt") -> Set[str]:
         """Carga la lista de tablas específicas a scrapear"""
         tables = set()
@@ -94,70 +183,310 @@ class SAPTableScraper:
             logger.info(f"No se encontró {filename}, se procesarán todas las tablas")
             return set()
 
-    async def scrape_table_async(self, session: aiohttp.ClientSession, table: Dict) -> Dict:
-        """Versión asíncrona de scrape_table"""
+    def fetch_html(self, url: str) -> str:
+        """Descarga una página usando la caché HTTP con GET condicional"""
+        cached = self.http_cache.get(url) if self.http_cache else None
+        headers = self.http_cache.conditional_headers(cached) if self.http_cache else {}
         try:
-            async with session.get(table['url']) as response:
-                html = await response.text()
-                
-                # Extraer información adicional
-                soup = BeautifulSoup(html, 'lxml')
-                category_elem = soup.select_one(".table-category")
-                source_info = {
-                    "url": table['url'],
-                    "category": category_elem.text.strip() if category_elem else "Unknown",
-                    "scrape_timestamp": datetime.utcnow().isoformat()
-                }
-                
-                # Usar el agente para interpretar
-                table_info = self.agent.interpret_table_structure(html)
-                if not table_info:
-                    return {}
-                    
-                # Agregar información de fuente
-                table_info["source"] = source_info
-                
-                return table_info
-        except Exception as e:
-            logger.error(f"Error scraping {table['name']}: {e}")
+            with HTTP_FETCH_SECONDS.labels('sync').time():
+                response = self.session.get(url, headers=headers)
+        except Exception:
+            HTTP_RESPONSES.labels('error').inc()
+            raise
+        HTTP_RESPONSES.labels(str(response.status_code)).inc()
+        if response.status_code == 304 and cached:
+            self.http_cache.touch(url)
+            return cached["body"].decode('utf-8', errors='replace')
+        response.raise_for_status()
+        if self.http_cache:
+            self.http_cache.store(url, response.content, response.headers)
+        return response.text
+
+    async def fetch_bytes_async(self, session: aiohttp.ClientSession, limiter: RateLimiter, url: str) -> bytes:
+        """Versión asíncrona de fetch_html; devuelve el cuerpo sin decodificar"""
+        cached = self.http_cache.get(url) if self.http_cache else None
+        headers = self.http_cache.conditional_headers(cached) if self.http_cache else {}
+        async with limiter.limit(url):
+            # La latencia se mide sin la espera del limitador
+            started = time.perf_counter()
+            try:
+                async with session.get(url, headers=headers) as response:
+                    HTTP_RESPONSES.labels(str(response.status)).inc()
+                    if response.status == 304 and cached:
+                        self.http_cache.touch(url)
+                        return cached["body"]
+                    response.raise_for_status()
+                    body = await response.read()
+            except (aiohttp.ClientConnectionError, asyncio.TimeoutError):
+                HTTP_RESPONSES.labels('error').inc()
+                raise
+            finally:
+                HTTP_FETCH_SECONDS.labels('async').observe(time.perf_counter() - started)
+        if self.http_cache:
+            self.http_cache.store(url, body, response.headers)
+        return body
+
+    async def run_parser(self, func, *args):
+        """Ejecuta una función de parseo en el pool de procesos si está configurado"""
+        with PARSE_SECONDS.labels(func.__name__).time():
+            if self.parse_pool is None:
+                return func(*args)
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self.parse_pool, func, *args)
+
+    def _source_info(self, parsed: Dict, table: Dict) -> Dict:
+        return {
+            "url": table['url'],
+            "category": parsed["category"],
+            "scrape_timestamp": datetime.utcnow().isoformat()
+        }
+
+    def _needs_llm(self, parsed: Dict) -> bool:
+        return not parsed["table_info"] and self.parse_mode != 'parser'
+
+    def _complete_table_info(self, table_info: Dict, parsed: Dict, table: Dict) -> Dict:
+        """Agrega la información de fuente al resultado del parser o del LLM"""
+        if not table_info:
             return {}
+        table_info.setdefault("name", table_info.get("table_name") or table['name'])
+        table_info["source"] = self._source_info(parsed, table)
+        return table_info
 
-    async def process_tables_async(self, tables: List[Dict]):
-        """Procesa las tablas de forma asíncrona"""
-        async with aiohttp.ClientSession() as session:
-            tasks = []
-            for table in tables:
-                # Si hay lista específica y no está vacía, filtrar
-                if self.tables_to_scrape and len(self.tables_to_scrape) > 0:
-                    if table['name'] not in self.tables_to_scrape:
-                        continue
-                
-                # Esperar entre requests para no sobrecargar el servidor
-                await asyncio.sleep(self.delay)
-                tasks.append(self.scrape_table_async(session, table))
-                
-            results = await asyncio.gather(*tasks)
-            return results
+    def interpret_page(self, parsed: Dict, table: Dict) -> Dict:
+        """Completa una página ya parseada, usando el LLM si el parser no bastó"""
+        table_info = parsed["table_info"]
+        if self._needs_llm(parsed):
+            # Usar el agente para interpretar
+            logger.info(f"Parser incompleto para {table['name']}, usando LLM")
+            table_info = self.agent.interpret_table_content(parsed["content"], parsed["stats"])
+        return self._complete_table_info(table_info, parsed, table)
+
+    async def interpret_page_async(self, parsed: Dict, table: Dict) -> Dict:
+        """Completa una página ya parseada, llamando al LLM sin bloquear el event loop si hace falta"""
+        table_info = parsed["table_info"]
+        if self._needs_llm(parsed):
+            logger.info(f"Parser incompleto para {table['name']}, usando LLM")
+            content, stats = parsed["content"], parsed["stats"]
+            if self.batcher and stats["minimized_tokens"] <= self.llm_batch_max_table_tokens:
+                table_info = await self.batcher.submit(table['name'], content, stats)
+            else:
+                table_info = await self.agent.interpret_table_content_async(content, stats)
+        return self._complete_table_info(table_info, parsed, table)
+
+    def _should_process(self, table: Dict) -> bool:
+        """Aplica la lista de tablas específicas y descarta las ya completadas al reanudar"""
+        # Si hay lista específica y no está vacía, filtrar
+        if self.tables_to_scrape and len(self.tables_to_scrape) > 0:
+            if table['name'] not in self.tables_to_scrape:
+                return False
+        if self.manifest and self.manifest.is_done(table['name']):
+            return False
+        return True
+
+    def _record(self, table_name: str, state: str, error: Optional[str] = None):
+        if state in (SAVED, UNCHANGED, FAILED):
+            TABLES_TOTAL.labels(state).inc()
+        if self.manifest:
+            self.manifest.record(table_name, state, error)
 
-    def save_contract(self, table_name: str, contract: Dict):
+    def _is_unchanged(self, table: Dict, parsed: Dict) -> bool:
+        """Calcula el hash de la página y lo compara con el de la última ejecución"""
+        if not self.change_tracker:
+            return False
+        table['content_hash'] = content_hash(parsed, self.parse_mode)
+        if self.force:
+            return False
+        return self.change_tracker.is_unchanged(table['name'], table['content_hash'])
+
+    def _commit_change(self, table: Dict, table_info: Dict):
+        if self.change_tracker and table.get('content_hash'):
+            self.change_tracker.commit(table['name'], table['content_hash'], table_info.get("fields", []))
+
+    def open_change_tracker(self):
+        if self.change_tracking:
+            self.change_tracker = ChangeTracker(self.change_tracking_path)
+
+    def close_change_tracker(self):
+        if self.change_tracker:
+            self.change_tracker.write_changelog(self.changelog_dir)
+            self.change_tracker.close()
+            self.change_tracker = None
+
+    async def _run_stage(self, name: str, inbox: asyncio.Queue, outbox: Optional[asyncio.Queue],
+                         workers: int, handler, downstream_workers: int = 1):
+        """
+        Ejecuta una etapa del pipeline con `workers` consumidores.
+        Cada item se pasa al handler; si devuelve algo distinto de None se envía a la siguiente etapa,
+        que al terminar recibe una marca de fin por cada uno de sus `downstream_workers`.
+        """
+        async def worker():
+            while True:
+                item = await inbox.get()
+                try:
+                    if item is _STOP:
+                        return
+                    result = await handler(item)
+                    if result is not None and outbox is not None:
+                        await outbox.put(result)
+                except Exception as e:
+                    logger.error(f"Error en etapa {name}: {e}")
+                finally:
+                    inbox.task_done()
+
+        await asyncio.gather(*(worker() for _ in range(workers)))
+        # Avisar a la siguiente etapa que no llegarán más items
+        if outbox is not None:
+            for _ in range(downstream_workers):
+                await outbox.put(_STOP)
+
+    async def process_tables_async(self, tables: Optional[Iterable[Dict]] = None) -> Dict[str, int]:
+        """
+        Procesa las tablas con un pipeline descarga -> interpretación -> guardado.
+        Cada contrato se guarda en cuanto está listo y las colas acotadas mantienen la memoria constante.
+        Sin lista de tablas, el pipeline se alimenta del recorrido asíncrono del índice.
+        """
+        stats = {"queued": 0, "saved": 0, "unchanged": 0, "failed": 0}
+        fetch_queue: asyncio.Queue = asyncio.Queue(maxsize=self.pipeline_queue_size)
+        interpret_queue: asyncio.Queue = asyncio.Queue(maxsize=self.pipeline_queue_size)
+        save_queue: asyncio.Queue = asyncio.Queue(maxsize=self.pipeline_queue_size)
+        fetch_workers = self.max_concurrency
+        interpret_workers = self.interpret_workers
+
+        # El limitador se crea dentro del event loop que lo va a usar
+        limiter = RateLimiter(self.max_concurrency, self.requests_per_second, self.rate_burst)
+        connector = aiohttp.TCPConnector(limit=self.max_concurrency)
+
+        # La profundidad de cada cola se lee al consultar las métricas
+        QUEUE_DEPTH.labels('fetch').set_function(fetch_queue.qsize)
+        QUEUE_DEPTH.labels('interpret').set_function(interpret_queue.qsize)
+        QUEUE_DEPTH.labels('save').set_function(save_queue.qsize)
+
+        async def enqueue(table: Dict):
+            if not self._should_process(table):
+                return
+            stats["queued"] += 1
+            self._record(table['name'], PENDING)
+            await fetch_queue.put(table)
+
+        async def produce():
+            try:
+                if tables is None:
+                    async for table in self.iter_table_list_async(session, limiter):
+                        await enqueue(table)
+                else:
+                    for table in tables:
+                        await enqueue(table)
+            except Exception as e:
+                logger.error(f"Error obteniendo lista de tablas: {e}")
+            finally:
+                for _ in range(fetch_workers):
+                    await fetch_queue.put(_STOP)
+
+        async def fetch(table: Dict):
+            try:
+                # El ritmo de las peticiones lo controla el limitador, no un sleep serial
+                raw = await self.fetch_bytes_async(session, limiter, table['url'])
+                # Solo el diccionario compacto parseado pasa a la siguiente etapa
+                parsed = await self.run_parser(parse_detail_page, raw, self.parse_mode)
+            except Exception as e:
+                logger.error(f"Error scraping {table['name']}: {e}")
+                stats["failed"] += 1
+                self._record(table['name'], FAILED, f"descarga: {e}")
+                return None
+            if self._is_unchanged(table, parsed):
+                # Mismo contenido que en la ejecución anterior: no se interpreta ni se reescribe
+                stats["unchanged"] += 1
+                self._record(table['name'], UNCHANGED)
+                return None
+            self._record(table['name'], FETCHED)
+            return table, parsed
+
+        async def interpret(item):
+            table, parsed = item
+            try:
+                table_info = await self.interpret_page_async(parsed, table)
+            except Exception as e:
+                table_info = {}
+                logger.error(f"Error interpretando {table['name']}: {e}")
+            if not table_info:
+                logger.warning(f"No se pudo extraer información de la tabla {table['name']}")
+                stats["failed"] += 1
+                self._record(table['name'], FAILED, "interpretación: sin información extraída")
+                return None
+            self._record(table['name'], INTERPRETED)
+            return table, table_info
+
+        async def save(item):
+            table, table_info = item
+            if self.save_contract(table['name'], table_info):
+                stats["saved"] += 1
+                self._commit_change(table, table_info)
+                self._record(table['name'], SAVED)
+            else:
+                stats["failed"] += 1
+                self._record(table['name'], FAILED, "guardado: error escribiendo el contrato")
+
+        if self.llm_batch_enabled and self.agent:
+            self.batcher = LLMBatcher(self.agent, self.llm_batch_token_budget, self.llm_batch_max_wait)
+        if self.parse_workers > 0:
+            self.parse_pool = ProcessPoolExecutor(max_workers=self.parse_workers)
+        try:
+            async with aiohttp.ClientSession(connector=connector) as session:
+                await asyncio.gather(
+                    produce(),
+                    self._run_stage("descarga", fetch_queue, interpret_queue, fetch_workers, fetch,
+                                    downstream_workers=interpret_workers),
+                    self._run_stage("interpretación", interpret_queue, save_queue, interpret_workers, interpret),
+                    self._run_stage("guardado", save_queue, None, 1, save),
+                )
+        finally:
+            if self.batcher:
+                await self.batcher.close()
+                self.batcher = None
+            if self.parse_pool:
+                self.parse_pool.shutdown()
+                self.parse_pool = None
+
+        logger.info(
+            f"Pipeline terminado: {stats['saved']} guardadas, {stats['unchanged']} sin cambios, "
+            f"{stats['failed']} fallidas de {stats['queued']}"
+        )
+        return stats
+
+    def _load_contract_template(self) -> Dict:
+        if self._contract_template is None:
+            template_path = os.path.join(os.getcwd(), 'templates', 'data_contract_template.json')
+            with open(template_path, 'r', encoding='utf-8') as f:
+                self._contract_template = json.load(f)
+        return self._contract_template
+
+    def _write_contract_file(self, namespace: str, safe_name: str, final_contract: Dict) -> str:
+        contract_dir = os.path.join(os.getcwd(), 'contracts', namespace)
+        # El directorio se crea una sola vez por ejecución
+        if contract_dir not in self._contract_dirs:
+            os.makedirs(contract_dir, exist_ok=True)
+            self._contract_dirs.add(contract_dir)
+        filename = os.path.join(contract_dir, f"{safe_name}.json")
+        with open(filename, 'w', encoding='utf-8') as f:
+            json.dump(final_contract, f, indent=2, ensure_ascii=False)
+        return filename
+
+    def _write_contract_packed(self, namespace: str, safe_name: str, final_contract: Dict) -> str:
+        if self.contract_store is None:
+            self.contract_store = PackedContractStore(self.contract_packed_path)
+        # La clave conserva la ruta relativa que tendría el archivo para poder exportarlo igual;
+        # las tablas con namespace (/1BEA/...) tienen namespace vacío y van a la raíz, como en modo files
+        key = f"{namespace}/{safe_name}" if namespace else safe_name
+        self.contract_store.put(key, final_contract)
+        return f"{self.contract_packed_path}#{key}"
+
+    def save_contract(self, table_name: str, contract: Dict) -> bool:
         """Guarda el contrato con información mejorada"""
         try:
             # Crear estructura de directorios basada en el nombre de la tabla
             namespace = table_name.split('/')[0] if '/' in table_name else table_name.split('_')[0]
-            contract_dir = os.path.join(os.getcwd(), 'contracts', namespace)
-            
-            # Asegurar que el directorio existe y tiene permisos correctos
-            os.makedirs(contract_dir, exist_ok=True)
-            os.chmod(contract_dir, 0o755)
-            
-            # Construir path completo del archivo
             safe_name = table_name.replace('/', '_')
-            filename = os.path.join(contract_dir, f"{safe_name}.json")
-            
-            # Cargar template
-            template_path = os.path.join(os.getcwd(), 'templates', 'data_contract_template.json')
-            with open(template_path, 'r', encoding='utf-8') as f:
-                template = json.load(f)
+            template = self._load_contract_template()
                 
             # Mejorar el contrato con más información
             source_info = contract.get("source", {})
@@ -169,6 +498,7 @@ class SAPTableScraper:
                     "last_updated": datetime.utcnow().isoformat(),
                     "source_system": "SAP",
                     "validation": contract.get("_metadata", {}),
+                    "prompt_stats": contract.get("_prompt_stats", {}),
                     "status": {
                         "is_complete": bool(contract.get("fields")),
                         "has_source": bool(source_info),
@@ -191,39 +521,56 @@ class SAPTableScraper:
                     del final_contract[section]
                     
             # Guardar contrato
-            with open(filename, 'w', encoding='utf-8') as f:
-                json.dump(final_contract, f, indent=2, ensure_ascii=False)
+            if self.contract_storage == 'packed':
+                location = self._write_contract_packed(namespace, safe_name, final_contract)
+            else:
+                location = self._write_contract_file(namespace, safe_name, final_contract)
                 
-            logger.info(f"Contrato guardado en {filename}")
-            
-            # Verificar que el archivo se creó correctamente
-            if not os.path.exists(filename):
-                raise Exception(f"El archivo {filename} no se creó correctamente")
+            logger.info(f"Contrato guardado en {location}")
+            return True
                 
         except Exception as e:
             logger.error(f"Error guardando contrato para {table_name}: {e}")
             logger.exception(e)
+            return False
+
+    def close_contract_store(self):
+        if self.contract_store:
+            self.contract_store.close()
+            self.contract_store = None
+
+    def open_manifest(self, resume: bool = False):
+        """Abre el manifiesto de la ejecución; con resume se saltan las tablas ya guardadas"""
+        self.manifest = RunManifest(self.manifest_path, resume=resume)
+
+    def close_manifest(self):
+        if self.manifest:
+            logger.info(f"Estado final del manifiesto: {self.manifest.summary()}")
+            self.manifest.close()
+            self.manifest = None
 
-    async def run_async(self, limit: int = None):
+    async def run_async(self, limit: int = None, resume: bool = False):
         """Versión asíncrona del método run"""
         self.limit = limit
         logger.info("Iniciando proceso de scraping asíncrono")
         
         # Cargar tablas específicas si existe el archivo
         self.tables_to_scrape = self.load_tables_to_scrape()
-        
-        tables = self.get_table_list()
-        if not tables:
+
+        self.open_manifest(resume)
+        self.open_change_tracker()
+        try:
+            # Las tablas llegan del recorrido del índice y los contratos se guardan a medida que se completan
+            stats = await self.process_tables_async()
+        finally:
+            self.close_manifest()
+            self.close_contract_store()
+            self.close_change_tracker()
+
+        if not stats["queued"]:
             logger.error("No se encontraron tablas para procesar")
-            return
-            
-        results = await self.process_tables_async(tables)
-        
-        for table, result in zip(tables, results):
-            if result:
-                self.save_contract(table['name'], result)
 
-    def run(self, limit: int = None):
+    def run(self, limit: int = None, resume: bool = False):
         """Ejecuta el proceso de scraping completo"""
         self.limit = limit
         logger.info("Iniciando proceso de scraping")
@@ -232,28 +579,58 @@ class SAPTableScraper:
         if not tables:
             logger.error("No se encontraron tablas para procesar")
             return
-        
+
+        self.open_manifest(resume)
+        self.open_change_tracker()
+        try:
+            self._run_tables(tables)
+        finally:
+            self.close_manifest()
+            self.close_contract_store()
+            self.close_change_tracker()
+
+    def _run_tables(self, tables: List[Dict]):
+        tables = [table for table in tables if self._should_process(table)]
         logger.info(f"Comenzando procesamiento de {len(tables)} tablas")
         
         for i, table in enumerate(tables, 1):
             try:
                 logger.info(f"Procesando tabla {i}/{len(tables)}: {table['name']}")
+                self._record(table['name'], PENDING)
+                
+                html = self.fetch_html(table['url'])
+                with PARSE_SECONDS.labels('parse_detail_page').time():
+                    parsed = parse_detail_page(html, self.parse_mode)
+                if self._is_unchanged(table, parsed):
+                    logger.info(f"Sin cambios en {table['name']}, se omite")
+                    self._record(table['name'], UNCHANGED)
+                    time.sleep(self.delay)
+                    continue
                 
-                table_data = self.scrape_table(table['url'])
+                table_data = self.interpret_page(parsed, table)
                 if not table_data:
                     logger.warning(f"No se pudo extraer información de la tabla {table['name']}")
+                    self._record(table['name'], FAILED, "sin información extraída")
                     continue
                 
-                contract = self.agent.generate_data_contract(table_data)
+                # Sin agente (modo parser) se guarda directamente lo extraído
+                contract = self.agent.generate_data_contract(table_data) if self.agent else table_data
                 if not contract:
                     logger.warning(f"No se pudo generar contrato para la tabla {table['name']}")
+                    self._record(table['name'], FAILED, "no se pudo generar el contrato")
                     continue
+                self._record(table['name'], INTERPRETED)
                 
-                self.save_contract(table['name'], contract)
+                if self.save_contract(table['name'], contract):
+                    self._commit_change(table, table_data)
+                    self._record(table['name'], SAVED)
+                else:
+                    self._record(table['name'], FAILED, "guardado: error escribiendo el contrato")
                 time.sleep(self.delay)
                 
             except Exception as e:
                 logger.error(f"Error procesando tabla {table.get('name', 'unknown')}: {e}")
+                self._record(table['name'], FAILED, str(e))
                 continue
 
 def main():
@@ -261,20 +638,38 @@ def main():
     parser.add_argument('--limit', type=int, help='Límite de tablas a procesar')
     parser.add_argument('--tables-file', help='Archivo con lista de tablas a procesar')
     parser.add_argument('--async-mode', action='store_true', help='Usar modo asíncrono')
+    parser.add_argument('--parse-mode', choices=PARSE_MODES,
+                        help='hybrid: parser con respaldo LLM, parser: solo parser, llm: solo LLM')
+    parser.add_argument('--llm-batch', action='store_true',
+                        help='Agrupar tablas pequeñas en un solo prompt (modo asíncrono)')
+    parser.add_argument('--parse-workers', type=int,
+                        help='Procesos para parsear HTML fuera del event loop (modo asíncrono)')
+    parser.add_argument('--force', action='store_true',
+                        help='Reprocesa todas las tablas aunque su contenido no haya cambiado')
+    parser.add_argument('--resume', action='store_true',
+                        help='Reanudar la ejecución anterior saltando las tablas ya guardadas')
     args = parser.parse_args()
 
-    scraper = SAPTableScraper()
+    scraper = SAPTableScraper(parse_mode=args.parse_mode)
+    if args.llm_batch:
+        scraper.llm_batch_enabled = True
+    if args.parse_workers is not None:
+        scraper.parse_workers = args.parse_workers
+    scraper.force = args.force
+    start_metrics_server()
     
     try:
         if args.async_mode:
-            asyncio.run(scraper.run_async(limit=args.limit))
+            asyncio.run(scraper.run_async(limit=args.limit, resume=args.resume))
         else:
-            scraper.run(limit=args.limit)
+            scraper.run(limit=args.limit, resume=args.resume)
             
     except KeyboardInterrupt:
         logger.info("Scraper detenido por el usuario")
     except Exception as e:
         logger.error(f"Error en la ejecución principal: {e}")
+    finally:
+        dump_metrics_textfile()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
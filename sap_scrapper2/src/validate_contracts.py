@@ -1,57 +1,256 @@
 import os
 import json
-import logging
-from typing import Dict, List
+import hashlib
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Tuple
 
-def validate_contracts(contracts_dir: str) -> Dict[str, List[str]]:
+# Secciones mínimas que debe tener cualquier contrato
+REQUIRED_SECTIONS = ["metadata", "source_information"]
+
+TYPE_MAP = {
+    "string": str,
+    "boolean": bool,
+    "number": (int, float),
+    "integer": int,
+    "array": list,
+    "object": dict
+}
+
+# Por debajo de este número de archivos no compensa levantar procesos
+PARALLEL_THRESHOLD = 200
+
+_rules: Dict = {}
+_strict = False
+
+
+def compile_rules(template_path: str) -> Dict[str, Dict[str, Dict]]:
+    """Compila las reglas (requeridos, enums y tipos) de cada sección del template"""
+    with open(template_path, 'r', encoding='utf-8') as f:
+        template = json.load(f)
+
+    rules = {}
+    for section, definition in template.items():
+        section_rules = {}
+        for prop, spec in definition.get("properties", {}).items():
+            section_rules[prop] = {
+                "required": bool(spec.get("required", False)),
+                "type": spec.get("type") if spec.get("type") in TYPE_MAP else None,
+                "enum": spec.get("enum")
+            }
+        rules[section] = section_rules
+    return rules
+
+
+def validate_contract(contract: Dict, rules: Dict, strict: bool = False) -> Tuple[List[str], List[str]]:
+    """Valida un contrato contra las reglas compiladas. Devuelve (errores, advertencias)"""
+    errors, warnings = [], []
+
+    # Validar estructura básica
+    if not all(k in contract for k in REQUIRED_SECTIONS):
+        return ["Falta estructura básica"], warnings
+
+    for section, section_rules in rules.items():
+        values = contract.get(section)
+        if not isinstance(values, dict):
+            continue
+        for prop, rule in section_rules.items():
+            if prop not in values:
+                if rule["required"]:
+                    message = f"{section}.{prop}: campo requerido ausente"
+                    (errors if strict else warnings).append(message)
+                continue
+            value = values[prop]
+            if rule["type"] and value is not None and not isinstance(value, TYPE_MAP[rule["type"]]):
+                errors.append(f"{section}.{prop}: se esperaba {rule['type']}")
+            if rule["enum"] and value not in rule["enum"]:
+                errors.append(f"{section}.{prop}: valor '{value}' fuera de {rule['enum']}")
+
+    # Validar campos completos
+    metadata = contract["metadata"].get("validation", {})
+    if not metadata.get("is_complete", False):
+        errors.append(
+            f"Campos incompletos ({metadata.get('processed_fields', 0)} de {metadata.get('total_fields', 0)})"
+        )
+
+    return errors, warnings
+
+
+def _init_worker(rules: Dict, strict: bool):
+    global _rules, _strict
+    _rules = rules
+    _strict = strict
+
+
+def _validate_file(args: Tuple[str, str, Optional[str]]) -> Dict:
+    """Valida un archivo; si su hash coincide con el cacheado no vuelve a parsearlo"""
+    file_path, rel_path, cached_hash = args
+    result = {"file": rel_path, "status": "valid", "errors": [], "warnings": []}
+    try:
+        with open(file_path, 'rb') as f:
+            raw = f.read()
+        result["sha256"] = hashlib.sha256(raw).hexdigest()
+        if cached_hash and cached_hash == result["sha256"]:
+            result["status"] = "unchanged"
+            return result
+
+        contract = json.loads(raw)
+        errors, warnings = validate_contract(contract, _rules, _strict)
+        result["errors"], result["warnings"] = errors, warnings
+        if errors:
+            result["status"] = "invalid"
+    except Exception as e:
+        result["status"] = "error"
+        result["errors"] = [str(e)]
+    return result
+
+
+def _load_cache(cache_path: str, fingerprint: str) -> Dict:
+    try:
+        with open(cache_path, 'r', encoding='utf-8') as f:
+            cache = json.load(f)
+        # Si cambian las reglas o el modo estricto, la caché no sirve
+        if cache.get("fingerprint") == fingerprint:
+            return cache.get("files", {})
+    except (FileNotFoundError, json.JSONDecodeError):
+        pass
+    return {}
+
+
+def _save_cache(cache_path: str, fingerprint: str, files: Dict):
+    directory = os.path.dirname(cache_path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp_path = f"{cache_path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump({"fingerprint": fingerprint, "files": files}, f)
+    os.replace(tmp_path, cache_path)
+
+
+def validate_contracts_detailed(contracts_dir: str,
+                                template_path: str = "templates/data_contract_template.json",
+                                workers: Optional[int] = None,
+                                cache_path: Optional[str] = "cache/validation_cache.json",
+                                strict: bool = False) -> List[Dict]:
+    """
+    Valida todos los contratos en paralelo.
+    Los archivos cuyo mtime, tamaño o hash no cambiaron desde la última validación se saltan.
+    """
+    rules = compile_rules(template_path)
+    fingerprint = hashlib.sha256(json.dumps([rules, strict], sort_keys=True).encode('utf-8')).hexdigest()
+    cached_files = _load_cache(cache_path, fingerprint) if cache_path else {}
+
+    results: List[Dict] = []
+    to_validate = []
+    stats = {}
+    for root, _, files in os.walk(contracts_dir):
+        for file in files:
+            if not file.endswith('.json'):
+                continue
+            file_path = os.path.join(root, file)
+            rel_path = os.path.relpath(file_path, contracts_dir)
+            st = os.stat(file_path)
+            stats[rel_path] = {"mtime_ns": st.st_mtime_ns, "size": st.st_size}
+            cached = cached_files.get(rel_path)
+            if cached and cached["mtime_ns"] == st.st_mtime_ns and cached["size"] == st.st_size:
+                results.append(dict(cached["result"], cached=True))
+            else:
+                to_validate.append((file_path, rel_path, cached["sha256"] if cached else None))
+
+    if len(to_validate) >= PARALLEL_THRESHOLD and workers != 1:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(rules, strict)) as pool:
+            validated = list(pool.map(_validate_file, to_validate, chunksize=64))
+    else:
+        _init_worker(rules, strict)
+        validated = [_validate_file(args) for args in to_validate]
+
+    new_cache = {}
+    for result in validated:
+        rel_path = result["file"]
+        if result["status"] == "unchanged":
+            # Mismo contenido con otro mtime: se reutiliza el resultado anterior
+            result = dict(cached_files[rel_path]["result"], cached=True)
+        results.append(result)
+    for result in results:
+        rel_path = result["file"]
+        previous = cached_files.get(rel_path, {})
+        sha = result.get("sha256") or previous.get("sha256")
+        if result["status"] != "error" and sha:
+            stored = {k: v for k, v in result.items() if k not in ("cached", "sha256")}
+            new_cache[rel_path] = dict(stats[rel_path], sha256=sha, result=stored)
+
+    if cache_path:
+        _save_cache(cache_path, fingerprint, new_cache)
+
+    for result in results:
+        result.pop("sha256", None)
+
+    results.sort(key=lambda r: r["file"])
+    return results
+
+
+def validate_contracts(contracts_dir: str, **kwargs) -> Dict[str, List[str]]:
     """Valida todos los contratos generados"""
     results = {
         "valid": [],
         "invalid": [],
         "errors": []
     }
-    
-    for root, _, files in os.walk(contracts_dir):
-        for file in files:
-            if file.endswith('.json'):
-                file_path = os.path.join(root, file)
-                try:
-                    with open(file_path, 'r', encoding='utf-8') as f:
-                        contract = json.load(f)
-                        
-                    # Validar estructura básica
-                    if not all(k in contract for k in ["metadata", "source_information"]):
-                        results["invalid"].append(f"{file}: Falta estructura básica")
-                        continue
-                        
-                    # Validar campos completos
-                    metadata = contract["metadata"].get("validation", {})
-                    if not metadata.get("is_complete", False):
-                        results["invalid"].append(
-                            f"{file}: Campos incompletos ({metadata.get('processed_fields', 0)} de {metadata.get('total_fields', 0)})"
-                        )
-                        continue
-                        
-                    results["valid"].append(file)
-                    
-                except Exception as e:
-                    results["errors"].append(f"{file}: {str(e)}")
-                    
+    for result in validate_contracts_detailed(contracts_dir, **kwargs):
+        if result["status"] == "valid":
+            results["valid"].append(result["file"])
+        elif result["status"] == "invalid":
+            results["invalid"].append(f"{result['file']}: {'; '.join(result['errors'])}")
+        else:
+            results["errors"].append(f"{result['file']}: {'; '.join(result['errors'])}")
     return results
 
+
+def main():
+    parser = argparse.ArgumentParser(description='Validador de contratos de datos')
+    parser.add_argument('contracts_dir', nargs='?', default='contracts', help='Directorio de contratos')
+    parser.add_argument('--template', default='templates/data_contract_template.json',
+                        help='Template del que se compilan las reglas')
+    parser.add_argument('--workers', type=int, help='Procesos de validación (default: núcleos disponibles)')
+    parser.add_argument('--cache', default='cache/validation_cache.json', help='Archivo de caché incremental')
+    parser.add_argument('--no-cache', action='store_true', help='Validar todos los archivos')
+    parser.add_argument('--strict', action='store_true', help='Los campos requeridos ausentes son errores')
+    parser.add_argument('--json', action='store_true', help='Emitir resultados en JSON')
+    args = parser.parse_args()
+
+    detailed = validate_contracts_detailed(
+        args.contracts_dir,
+        template_path=args.template,
+        workers=args.workers,
+        cache_path=None if args.no_cache else args.cache,
+        strict=args.strict
+    )
+    summary = {status: sum(1 for r in detailed if r["status"] == status) for status in ("valid", "invalid", "error")}
+
+    if args.json:
+        print(json.dumps({"summary": summary, "results": detailed}, indent=2, ensure_ascii=False))
+    else:
+        print("\nResultados de validación:")
+        print(f"Contratos válidos: {summary['valid']}")
+        print(f"Contratos inválidos: {summary['invalid']}")
+        print(f"Errores: {summary['error']}")
+
+        invalid = [r for r in detailed if r["status"] == "invalid"]
+        if invalid:
+            print("\nContratos inválidos:")
+            for inv in invalid:
+                print(f"- {inv['file']}: {'; '.join(inv['errors'])}")
+
+        errors = [r for r in detailed if r["status"] == "error"]
+        if errors:
+            print("\nErrores encontrados:")
+            for err in errors:
+                print(f"- {err['file']}: {'; '.join(err['errors'])}")
+
+    # Código de salida distinto de cero para usarlo como gate de CI
+    return 0 if summary["invalid"] == 0 and summary["error"] == 0 else 1
+
+
 if __name__ == "__main__":
-    results = validate_contracts("contracts")
-    print("\nResultados de validación:")
-    print(f"Contratos válidos: {len(results['valid'])}")
-    print(f"Contratos inválidos: {len(results['invalid'])}")
-    print(f"Errores: {len(results['errors'])}")
-    
-    if results["invalid"]:
-        print("\nContratos inválidos:")
-        for inv in results["invalid"]:
-            print(f"- {inv}")
-            
-    if results["errors"]:
-        print("\nErrores encontrados:")
-        for err in results["errors"]:
-            print(f"- {err}") 
\ No newline at end of file
+    raise SystemExit(main())
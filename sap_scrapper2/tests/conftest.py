@@ -0,0 +1,86 @@
+import json
+import os
+import shutil
+import sys
+import tempfile
+
+import pytest
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(PROJECT_DIR, 'src'))
+
+# scraper.py configura el logging al importarse; fuera del directorio del proyecto no hay logs/
+os.environ.setdefault('LOG_FILE', os.path.join(tempfile.gettempdir(), 'sap_scrapper2-tests.log'))
+
+INDEX_PAGE = """
+<html><body><table class="table">
+<tr><th>#</th><th>Table</th><th>Description</th></tr><tr><th></th><th></th><th></th></tr>
+{rows}
+</table></body></html>
+"""
+
+DETAIL_PAGE = """
+<html><body>
+<div class="card-header sapds-card-header">{name}</div>
+<div class="card-body sapds-card-body"><p>Tabla {name}</p><span class="table-category">TRANSP</span>
+<table class="table">
+<tr><th>Key</th><th>Field</th><th>Description</th><th>Type</th><th>Length</th></tr><tr><th></th><th></th><th></th><th></th><th></th></tr>
+<tr><td>Key</td><td>MANDT</td><td>Client</td><td>CLNT</td><td>3</td></tr>
+<tr><td></td><td>FIELD1</td><td>Campo de {name}</td><td>CHAR</td><td>10</td></tr>
+</table></div></body></html>
+"""
+
+
+class FakeResponse:
+    def __init__(self, text):
+        self.text = text
+        self.usage_metadata = None
+
+
+class CountingModel:
+    """Modelo falso que cuenta las llamadas y devuelve un contrato mínimo"""
+
+    def __init__(self):
+        self.calls = 0
+
+    def generate_content(self, prompt):
+        self.calls += 1
+        return FakeResponse(json.dumps({"name": "contract", "fields": [{"name": "MANDT"}]}))
+
+
+@pytest.fixture
+def workspace(tmp_path, monkeypatch):
+    """Directorio de trabajo aislado con el template de contratos y sin esperas ni red"""
+    shutil.copytree(os.path.join(PROJECT_DIR, 'templates'), tmp_path / 'templates')
+    monkeypatch.chdir(tmp_path)
+    for name, value in {
+        'GOOGLE_API_KEY': 'test',
+        'PARSE_MODE': 'hybrid',
+        'DELAY_BETWEEN_REQUESTS': '0',
+        'REQUESTS_PER_SECOND': '0',
+        'HTTP_CACHE_ENABLED': 'false',
+        'CHANGE_TRACKING_ENABLED': 'false',
+        'LLM_CACHE_ENABLED': 'true',
+        'LLM_CACHE_PATH': str(tmp_path / 'cache' / 'llm_cache.sqlite'),
+        'LLM_CASSETTE_MODE': 'off',
+        'MANIFEST_PATH': str(tmp_path / 'logs' / 'manifest.jsonl'),
+    }.items():
+        monkeypatch.setenv(name, value)
+    return tmp_path
+
+
+def make_scraper(tables, model=None):
+    """SAPTableScraper que lee las páginas de memoria en lugar de la red"""
+    from scraper import SAPTableScraper
+
+    scraper = SAPTableScraper()
+    rows = "".join(
+        f'<tr><td>{number}</td><td><a href="{name.lower()}.html">{name}</a></td><td>Tabla {name}</td></tr>'
+        for number, name in enumerate(tables, 1)
+    )
+    pages = {scraper.base_url: INDEX_PAGE.format(rows=rows)}
+    pages.update({f"{scraper.base_url}{name.lower()}.html": DETAIL_PAGE.format(name=name) for name in tables})
+    scraper.fetch_html = pages.__getitem__
+    if model is not None:
+        scraper.agent.model = model
+    return scraper
@@ -0,0 +1,44 @@
+import json
+
+from conftest import CountingModel, make_scraper
+
+TABLES = ["MARA", "MARC", "MAKT"]
+
+
+def _run(workspace, monkeypatch, force=False):
+    monkeypatch.setenv('CHANGE_TRACKING_ENABLED', 'true')
+    monkeypatch.setenv('CHANGELOG_DIR', str(workspace / 'changelogs'))
+    scraper = make_scraper(TABLES, CountingModel())
+    scraper.force = force
+    scraper.run()
+
+
+def _changelogs(workspace):
+    return sorted((workspace / 'changelogs').glob('changelog-*.json'))
+
+
+def test_forced_rerun_without_changes_writes_no_changelog(workspace, monkeypatch):
+    _run(workspace, monkeypatch)
+    first = _changelogs(workspace)
+    assert len(first) == 1
+    assert json.loads(first[0].read_text(encoding='utf-8'))["new_tables"] == len(TABLES)
+
+    first[0].unlink()
+
+    _run(workspace, monkeypatch, force=True)
+    assert _changelogs(workspace) == []
+
+
+def test_changed_fields_are_reported(tmp_path):
+    from change_tracker import ChangeTracker
+
+    tracker = ChangeTracker(str(tmp_path / 'hashes.sqlite'))
+    tracker.commit('MARA', 'v1', [{"name": "MANDT", "type": "CLNT"}, {"name": "MATNR", "type": "CHAR"}])
+    tracker.close()
+
+    tracker = ChangeTracker(str(tmp_path / 'hashes.sqlite'))
+    tracker.commit('MARA', 'v1', [{"name": "MANDT", "type": "CLNT"}, {"name": "MATNR", "type": "CHAR"}])
+    assert tracker.changes == {}
+    tracker.commit('MARA', 'v2', [{"name": "MANDT", "type": "CLNT"}, {"name": "MATNR", "type": "NUMC"}])
+    assert tracker.changes == {"MARA": {"status": "changed", "changed": ["MATNR"]}}
+    tracker.close()
@@ -0,0 +1,84 @@
+import itertools
+from types import SimpleNamespace
+
+import http_cache
+from http_cache import HTTPCache
+
+URL = "https://www.sapdatasheet.org/abap/tabl/mara.html"
+
+
+class FakeResponse:
+    def __init__(self, status_code, body=b"", headers=None):
+        self.status_code = status_code
+        self.content = body
+        self.text = body.decode('utf-8')
+        self.headers = headers or {}
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise RuntimeError(f"HTTP {self.status_code}")
+
+
+class FakeSession:
+    """Responde 304 cuando el ETag enviado coincide con el actual"""
+
+    def __init__(self, body, etag):
+        self.body = body
+        self.etag = etag
+        self.requests = []
+
+    def get(self, url, headers=None):
+        self.requests.append(dict(headers or {}))
+        if (headers or {}).get("If-None-Match") == self.etag:
+            return FakeResponse(304)
+        return FakeResponse(200, self.body, {"ETag": self.etag})
+
+
+def test_conditional_get_serves_body_from_cache_on_304(workspace, monkeypatch):
+    monkeypatch.setenv('HTTP_CACHE_ENABLED', 'true')
+    monkeypatch.setenv('HTTP_CACHE_PATH', str(workspace / 'cache' / 'http_cache.sqlite'))
+    from scraper import SAPTableScraper
+
+    scraper = SAPTableScraper(parse_mode='parser')
+    scraper.session = FakeSession(b"<html>MARA v1</html>", '"v1"')
+    assert scraper.fetch_html(URL) == "<html>MARA v1</html>"
+    assert scraper.session.requests[0] == {}
+
+    # Segunda descarga: GET condicional, el servidor responde 304 y el cuerpo sale de la caché
+    assert scraper.fetch_html(URL) == "<html>MARA v1</html>"
+    assert scraper.session.requests[1] == {"If-None-Match": '"v1"'}
+
+    # Si la página cambió llega un 200 y la caché se actualiza
+    scraper.session.body, scraper.session.etag = b"<html>MARA v2</html>", '"v2"'
+    assert scraper.fetch_html(URL) == "<html>MARA v2</html>"
+    assert scraper.http_cache.get(URL)["etag"] == '"v2"'
+    scraper.http_cache.close()
+
+
+def test_responses_without_validators_are_not_stored(tmp_path):
+    cache = HTTPCache(str(tmp_path / 'http_cache.sqlite'), max_bytes=1024)
+    cache.store(URL, b"sin validadores", {})
+    assert cache.get(URL) is None
+    cache.close()
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path, monkeypatch):
+    clock = itertools.count(1)
+    monkeypatch.setattr(http_cache, 'time', SimpleNamespace(time=lambda: next(clock)))
+    cache = HTTPCache(str(tmp_path / 'http_cache.sqlite'), max_bytes=250)
+    for name in ("mara", "marc", "makt"):
+        cache.store(f"{name}.html", b"x" * 100, {"ETag": f'"{name}"'})
+        if name == "marc":
+            # mara se vuelve a usar: la menos reciente pasa a ser marc
+            cache.touch("mara.html")
+
+    assert cache.get("marc.html") is None
+    assert cache.get("mara.html") is not None
+    assert cache.get("makt.html") is not None
+    assert cache.total_bytes == 200
+    cache.close()
+
+    # El tamaño total se recalcula al reabrir
+    cache = HTTPCache(str(tmp_path / 'http_cache.sqlite'), max_bytes=250)
+    assert cache.total_bytes == 200
+    cache.close()
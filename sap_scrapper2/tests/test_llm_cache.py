@@ -0,0 +1,33 @@
+from prometheus_client import REGISTRY
+
+from conftest import CountingModel, make_scraper
+
+TABLES = ["MARA", "MARC", "MAKT", "T001", "BKPF"]
+
+
+def _cache_hits():
+    return REGISTRY.get_sample_value('scraper_llm_cache_hits_total') or 0
+
+
+def test_contract_prompt_ignores_volatile_keys(workspace):
+    from agent import SAPAgent
+
+    agent = SAPAgent()
+    agent.model = CountingModel()
+    table_info = {"name": "MARA", "fields": [{"name": "MANDT"}], "_prompt_stats": {"raw_bytes": 1}}
+    agent.generate_data_contract({**table_info, "source": {"url": "u", "scrape_timestamp": "2024-01-01T00:00:00"}})
+    agent.generate_data_contract({**table_info, "source": {"url": "u", "scrape_timestamp": "2024-06-01T12:00:00"}})
+    assert agent.model.calls == 1
+
+
+def test_rerun_serves_contracts_from_cache(workspace):
+    model = CountingModel()
+    make_scraper(TABLES, model).run()
+    assert model.calls == len(TABLES)
+
+    hits_before = _cache_hits()
+    model = CountingModel()
+    make_scraper(TABLES, model).run()
+    assert model.calls == 0
+    assert _cache_hits() - hits_before == len(TABLES)
+    assert len(list((workspace / 'contracts').rglob('*.json'))) == len(TABLES)
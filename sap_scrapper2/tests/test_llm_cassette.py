@@ -0,0 +1,33 @@
+from prometheus_client import REGISTRY
+
+from conftest import CountingModel, make_scraper
+
+TABLES = ["MARA", "MARC", "MAKT", "T001", "BKPF"]
+
+
+def _cassette_misses():
+    return REGISTRY.get_sample_value('scraper_llm_errors_total', {'kind': 'cassette_miss'}) or 0
+
+
+def test_recorded_run_replays_offline(workspace, monkeypatch):
+    cassette = workspace / 'cassettes' / 'run.jsonl'
+    monkeypatch.setenv('LLM_CASSETTE_PATH', str(cassette))
+
+    monkeypatch.setenv('LLM_CASSETTE_MODE', 'record')
+    model = CountingModel()
+    scraper = make_scraper(TABLES)
+    scraper.agent.cassette.model = model
+    scraper.run()
+    assert model.calls == len(TABLES)
+    assert len(cassette.read_text(encoding='utf-8').splitlines()) == len(TABLES)
+
+    # La reproducción no necesita credenciales ni modelo, y la fecha de scraping ya es otra
+    monkeypatch.setenv('LLM_CASSETTE_MODE', 'replay')
+    monkeypatch.setenv('LLM_CASSETTE_TIME_SCALE', '0')
+    monkeypatch.delenv('GOOGLE_API_KEY')
+    for path in (workspace / 'contracts').rglob('*.json'):
+        path.unlink()
+    misses_before = _cassette_misses()
+    make_scraper(TABLES).run()
+    assert _cassette_misses() == misses_before
+    assert len(list((workspace / 'contracts').rglob('*.json'))) == len(TABLES)
@@ -0,0 +1,67 @@
+import json
+
+from conftest import CountingModel, make_scraper
+from manifest import FAILED, SAVED, RunManifest
+
+TABLES = ["MARA", "MARC", "MAKT"]
+
+
+def _tracking_scraper(tables, fail=()):
+    """Scraper que anota las páginas de detalle pedidas y falla en las tablas indicadas"""
+    scraper = make_scraper(tables, CountingModel())
+    pages = scraper.fetch_html
+    fetched = []
+
+    def fetch_html(url):
+        if url != scraper.base_url:
+            fetched.append(url.rsplit('/', 1)[-1])
+            if any(url.endswith(f"{name.lower()}.html") for name in fail):
+                raise ConnectionError("timeout")
+        return pages(url)
+
+    scraper.fetch_html = fetch_html
+    return scraper, fetched
+
+
+def test_resume_skips_saved_tables_and_retries_failed(workspace):
+    scraper, fetched = _tracking_scraper(TABLES, fail=["MARC"])
+    scraper.run()
+    assert fetched == ["mara.html", "marc.html", "makt.html"]
+
+    scraper, fetched = _tracking_scraper(TABLES)
+    scraper.run(resume=True)
+    assert fetched == ["marc.html"]
+
+    manifest = RunManifest(str(workspace / 'logs' / 'manifest.jsonl'), resume=True)
+    assert {name: entry["state"] for name, entry in manifest.states.items()} == dict.fromkeys(TABLES, SAVED)
+    manifest.close()
+
+
+def test_run_without_resume_starts_a_new_manifest(workspace):
+    scraper, _ = _tracking_scraper(TABLES, fail=["MARC"])
+    scraper.run()
+
+    scraper, fetched = _tracking_scraper(TABLES)
+    scraper.run()
+    assert fetched == ["mara.html", "marc.html", "makt.html"]
+
+
+def test_torn_last_line_is_ignored_on_resume(tmp_path):
+    path = tmp_path / 'manifest.jsonl'
+    path.write_text(
+        json.dumps({"table": "MARA", "state": SAVED}) + "\n"
+        + json.dumps({"table": "MARC", "state": FAILED}) + "\n"
+        + '{"table": "MAKT", "sta',
+        encoding='utf-8'
+    )
+    manifest = RunManifest(str(path), resume=True)
+    assert manifest.is_done("MARA")
+    assert not manifest.is_done("MARC")
+    assert "MAKT" not in manifest.states
+
+    # La siguiente entrada empieza en una línea nueva
+    manifest.record("MAKT", SAVED)
+    manifest.close()
+    manifest = RunManifest(str(path), resume=True)
+    assert manifest.is_done("MAKT")
+    manifest.close()
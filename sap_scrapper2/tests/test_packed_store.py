@@ -0,0 +1,110 @@
+import os
+
+import pytest
+
+from conftest import PROJECT_DIR
+from packed_store import PackedContractStore
+
+
+def test_put_compact_get_round_trip(tmp_path):
+    path = str(tmp_path / 'contracts.jsonl')
+    store = PackedContractStore(path)
+    store.put('MARA/MARA', {"version": 1})
+    store.put('_1BEA_BBEA_BDH', {"version": 1, "name": "/1BEA/BBEA_BDH"})
+    store.put('MARA/MARA', {"version": 2})
+    size_before = os.path.getsize(path)
+
+    store.compact()
+    assert os.path.getsize(path) < size_before
+    assert store.get('MARA/MARA') == {"version": 2}
+    assert store.get('_1BEA_BBEA_BDH') == {"version": 1, "name": "/1BEA/BBEA_BDH"}
+
+    # Tras compactar se sigue pudiendo escribir y reabrir
+    store.put('MARC/MARC', {"version": 1})
+    store.close()
+    reopened = PackedContractStore(path)
+    assert sorted(reopened.keys()) == ['MARA/MARA', 'MARC/MARC', '_1BEA_BBEA_BDH']
+    assert dict(reopened.items())['MARA/MARA'] == {"version": 2}
+    reopened.close()
+
+
+def test_torn_tail_is_truncated_and_unindexed_records_recovered(tmp_path):
+    path = str(tmp_path / 'contracts.jsonl')
+    store = PackedContractStore(path)
+    store.put('MARA/MARA', {"version": 1})
+    store.close()
+
+    # Registro completo que no llegó al índice y otro cortado a mitad de escritura
+    with open(path, 'ab') as f:
+        f.write(b'MARC/MARC\t{"version":1}\n')
+        f.write(b'MAKT/MAKT\t{"vers')
+    with open(f"{path}.idx", 'a', encoding='utf-8') as f:
+        f.write('MARC/MA')
+
+    store = PackedContractStore(path)
+    assert store.get('MARA/MARA') == {"version": 1}
+    assert store.get('MARC/MARC') == {"version": 1}
+    assert 'MAKT/MAKT' not in store
+    with open(path, 'rb') as f:
+        assert f.read().endswith(b'\n')
+
+    store.put('MAKT/MAKT', {"version": 1})
+    assert store.get('MAKT/MAKT') == {"version": 1}
+    store.close()
+
+    # La entrada a medias del índice se recortó: las nuevas no quedan pegadas a ella
+    store = PackedContractStore(path)
+    assert sorted(store.keys()) == ['MAKT/MAKT', 'MARA/MARA', 'MARC/MARC']
+    assert {key: store.get(key) for key in store.keys()} == {
+        'MARA/MARA': {"version": 1}, 'MARC/MARC': {"version": 1}, 'MAKT/MAKT': {"version": 1}
+    }
+    assert dict(store.items()) == {key: store.get(key) for key in store.keys()}
+    store.close()
+
+
+def test_missing_index_is_rebuilt(tmp_path):
+    path = str(tmp_path / 'contracts.jsonl')
+    store = PackedContractStore(path)
+    store.put('MARA/MARA', {"version": 1})
+    store.put('MARA/MARA', {"version": 2})
+    store.close()
+    os.remove(f"{path}.idx")
+
+    store = PackedContractStore(path)
+    assert store.get('MARA/MARA') == {"version": 2}
+    assert len(store) == 1
+    store.close()
+
+
+def test_two_writers_share_the_store(tmp_path):
+    path = str(tmp_path / 'contracts.jsonl')
+    api = PackedContractStore(path)
+    orchestrator = PackedContractStore(path)
+    api.put('MARA/MARA', {"version": 1})
+    orchestrator.put('MARC/MARC', {"version": 1})
+    api.put('MARA/MARA', {"version": 2})
+
+    # Cada uno ve lo que escribió el otro y ningún registro se solapa
+    assert orchestrator.get('MARA/MARA') == {"version": 2}
+    assert api.get('MARC/MARC') == {"version": 1}
+
+    # Tras compactar en un proceso, el otro sigue leyendo y escribiendo sobre los archivos nuevos
+    api.compact()
+    orchestrator.put('MAKT/MAKT', {"version": 1})
+    assert api.get('MAKT/MAKT') == {"version": 1}
+    api.close()
+    orchestrator.close()
+
+    reopened = PackedContractStore(path)
+    assert dict(reopened.items()) == {
+        'MARA/MARA': {"version": 2}, 'MARC/MARC': {"version": 1}, 'MAKT/MAKT': {"version": 1}
+    }
+    reopened.close()
+
+
+def test_sap_scrapper_copy_is_identical():
+    copy = os.path.join(os.path.dirname(PROJECT_DIR), 'sap_scrapper', 'src', 'contracts', 'packed_store.py')
+    if not os.path.exists(copy):
+        pytest.skip("sap_scrapper no está junto a este proyecto (por ejemplo en la imagen de Docker)")
+    with open(os.path.join(PROJECT_DIR, 'src', 'packed_store.py'), 'rb') as a, open(copy, 'rb') as b:
+        assert a.read() == b.read()
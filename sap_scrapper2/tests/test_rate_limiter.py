@@ -0,0 +1,51 @@
+import asyncio
+import time
+
+from rate_limiter import RateLimiter
+
+
+async def _fetch_all(limiter, urls, in_flight=None, hold=0.0):
+    started = time.monotonic()
+    finished = {}
+
+    async def fetch(url):
+        async with limiter.limit(url):
+            if in_flight is not None:
+                in_flight.append(len(in_flight) + 1)
+            await asyncio.sleep(hold)
+            if in_flight is not None:
+                in_flight.pop()
+        finished.setdefault(url.split('/')[2], []).append(time.monotonic() - started)
+
+    await asyncio.gather(*(fetch(url) for url in urls))
+    return finished
+
+
+def test_each_host_has_its_own_bucket():
+    limiter = RateLimiter(max_concurrency=10, requests_per_second=10, burst=1)
+    urls = [f"https://{host}/tabl/{n}.html" for n in range(3) for host in ("a.example", "b.example")]
+    finished = asyncio.run(_fetch_all(limiter, urls))
+
+    # Cada host hace 3 peticiones a 10/s con ráfaga 1: ~0.2 s, no ~0.5 s como con un bucket compartido
+    for host in ("a.example", "b.example"):
+        assert len(finished[host]) == 3
+        assert 0.15 <= max(finished[host]) < 0.4
+
+
+def test_concurrency_is_bounded_across_hosts():
+    limiter = RateLimiter(max_concurrency=2, requests_per_second=0)
+    urls = [f"https://{host}/tabl/{n}.html" for n in range(4) for host in ("a.example", "b.example")]
+    in_flight, peak = [], []
+
+    async def run():
+        async def watch():
+            while True:
+                peak.append(len(in_flight))
+                await asyncio.sleep(0.001)
+
+        watcher = asyncio.create_task(watch())
+        await _fetch_all(limiter, urls, in_flight, hold=0.01)
+        watcher.cancel()
+
+    asyncio.run(run())
+    assert max(peak) == 2
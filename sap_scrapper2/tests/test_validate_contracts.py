@@ -0,0 +1,83 @@
+import json
+import os
+import sys
+
+import pytest
+
+import validate_contracts
+from validate_contracts import validate_contracts_detailed
+
+TEMPLATE = {
+    "metadata": {"properties": {
+        "contract_name": {"type": "string", "required": True},
+        "status": {"type": "string", "enum": ["draft", "active"]}
+    }},
+    "source_information": {"properties": {}}
+}
+
+
+def _contract(name=None, status="active"):
+    metadata = {"status": status, "validation": {"is_complete": True}}
+    if name:
+        metadata["contract_name"] = name
+    return {"metadata": metadata, "source_information": {}}
+
+
+@pytest.fixture
+def contracts(tmp_path):
+    directory = tmp_path / 'contracts'
+    (directory / 'sap').mkdir(parents=True)
+    template = tmp_path / 'template.json'
+    template.write_text(json.dumps(TEMPLATE), encoding='utf-8')
+    for name in ("mara", "marc", "makt"):
+        (directory / 'sap' / f"{name}.json").write_text(json.dumps(_contract(name.upper())), encoding='utf-8')
+    return directory, template, tmp_path / 'validation_cache.json'
+
+
+def _validate(contracts, **kwargs):
+    directory, template, cache = contracts
+    results = validate_contracts_detailed(str(directory), template_path=str(template), cache_path=str(cache), **kwargs)
+    return {os.path.basename(result["file"]): result for result in results}
+
+
+def test_only_modified_contracts_are_revalidated(contracts):
+    first = _validate(contracts)
+    assert all(result["status"] == "valid" and "cached" not in result for result in first.values())
+    assert all(result.get("cached") for result in _validate(contracts).values())
+
+    directory = contracts[0]
+    (directory / 'sap' / 'marc.json').write_text(json.dumps(_contract("MARC", status="retired")), encoding='utf-8')
+    # Mismo contenido con otro mtime: el hash coincide y se reutiliza el resultado
+    stat = os.stat(directory / 'sap' / 'makt.json')
+    os.utime(directory / 'sap' / 'makt.json', ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+
+    results = _validate(contracts)
+    assert results["marc.json"]["status"] == "invalid"
+    assert "cached" not in results["marc.json"]
+    assert results["mara.json"]["cached"] and results["makt.json"]["cached"]
+
+
+def test_template_or_strict_change_invalidates_the_cache(contracts):
+    _validate(contracts)
+    assert not any(result.get("cached") for result in _validate(contracts, strict=True).values())
+
+    template = contracts[1]
+    rules = dict(TEMPLATE, source_information={"properties": {"system": {"type": "string"}}})
+    template.write_text(json.dumps(rules), encoding='utf-8')
+    assert not any(result.get("cached") for result in _validate(contracts).values())
+
+
+def test_strict_turns_missing_required_fields_into_a_failing_exit_code(contracts, monkeypatch, capsys):
+    directory, template, cache = contracts
+    (directory / 'sap' / 'makt.json').write_text(json.dumps(_contract()), encoding='utf-8')
+    argv = ['validate_contracts.py', str(directory), '--template', str(template), '--cache', str(cache), '--json']
+
+    monkeypatch.setattr(sys, 'argv', argv)
+    assert validate_contracts.main() == 0
+    report = json.loads(capsys.readouterr().out)
+    makt = next(result for result in report["results"] if result["file"].endswith('makt.json'))
+    assert makt["warnings"] == ["metadata.contract_name: campo requerido ausente"]
+
+    monkeypatch.setattr(sys, 'argv', argv + ['--strict'])
+    assert validate_contracts.main() == 1
+    assert json.loads(capsys.readouterr().out)["summary"] == {"valid": 2, "invalid": 1, "error": 0}